@@ -0,0 +1,243 @@
+"""
+Batch processing of many GEO series.
+
+PubMed ids and abstracts for the whole batch are looked up with batched
+E-utilities calls, the abstract chunks of every series are annotated with
+MedCAT bulk calls (or an in-process model, `--medcat-backend local`), and
+then the series run through `process_gse_pipeline` with bounded
+concurrency, sharing one HTTP connection pool.
+
+Results go to `<output_dir>/<GSE>.json` and a per-series report to
+`<output_dir>/status.json`; series already marked "ok" there are skipped,
+so an interrupted batch can be re-run with the same output directory.
+
+    python -m app.batch GSE12345 GSE67890 --output-dir batch_results/run1
+    python -m app.batch --ids-file accessions.txt --output-dir batch_results/run2 --concurrency 8
+"""
+import os
+import re
+import sys
+import json
+import time
+import logging
+import argparse
+import threading
+import contextvars
+from pathlib import Path
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, List, Optional
+
+from app.core.config import config
+from app.controllers import process_gse_pipeline
+from app.services.abstract_loader import extract_pubmed_ids, fetch_abstracts, clean_abstract_text, chunk_text
+from app.services.abstract_to_fol import annotate_with_medcat, annotate_with_medcat_bulk, cached_annotation
+from app.services.medcat_backend import use_local_medcat
+from app.utils.instrumentation import track_job, span
+
+GSE_ID_PATTERN = re.compile(r"^GSE\d+$")
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+class BatchStatus:
+    """Thread-safe per-series status report, rewritten atomically on every change."""
+
+    def __init__(self, path: Path, gse_ids: List[str]):
+        self.path = path
+        self._lock = threading.Lock()
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                self.data = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.data = {"series": {}}
+        for gse_id in gse_ids:
+            self.data["series"].setdefault(gse_id, {"status": "pending"})
+        self.data["started"] = _now()
+        self.data.pop("finished", None)
+        self._save()
+
+    def status(self, gse_id: str) -> str:
+        with self._lock:
+            return self.data["series"][gse_id]["status"]
+
+    def update(self, gse_id: str, **fields) -> Dict:
+        with self._lock:
+            entry = self.data["series"][gse_id]
+            entry.update(fields)
+            self._save()
+            return {"gse_id": gse_id, **entry}
+
+    def finish(self, metrics: Dict) -> Dict:
+        with self._lock:
+            self.data["finished"] = _now()
+            self.data["metrics"] = metrics
+            self._save()
+            return self.summary()
+
+    def summary(self) -> Dict:
+        counts = {}
+        for entry in self.data["series"].values():
+            counts[entry["status"]] = counts.get(entry["status"], 0) + 1
+        return {"total": len(self.data["series"]), "counts": counts}
+
+    def _save(self):
+        self.data["summary"] = self.summary()
+        tmp = self.path.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, self.path)
+
+
+def prefetch_articles(gse_ids: List[str]) -> Dict[str, Dict]:
+    """
+    {gse_id: {"pubmed_id", "article", "error"}} from batched esearch/esummary/efetch
+    calls; "error" is set when the series' lookup batch failed.
+    """
+    lookup_errors, fetch_errors = {}, {}
+    pubmed_ids = extract_pubmed_ids(gse_ids, errors=lookup_errors)
+    abstracts = fetch_abstracts([pmid for pmid in pubmed_ids.values() if pmid], errors=fetch_errors)
+    return {
+        gse_id: {
+            "pubmed_id": pmid,
+            "article": abstracts.get(str(pmid)) if pmid else None,
+            "error": lookup_errors.get(gse_id) or fetch_errors.get(str(pmid)),
+        }
+        for gse_id, pmid in pubmed_ids.items() if pmid or gse_id in lookup_errors
+    }
+
+
+def prefetch_annotations(articles: List[str]) -> Dict[str, Dict]:
+    """MedCAT responses for every abstract chunk not in the annotation cache, keyed by chunk text, in bulk calls."""
+    # Same cleaning and chunking as the pipeline, so the chunk texts match
+    chunks = [
+        chunk for chunk in dict.fromkeys(
+            chunk for article in articles for chunk in chunk_text(clean_abstract_text(article))
+        )
+        if cached_annotation(chunk) is None
+    ]
+    annotations = {}
+    # The local model spreads one call over its worker processes, so it gets every chunk at once
+    size = max(1, len(chunks)) if use_local_medcat() else config.MEDCAT_BULK_SIZE
+    for start in range(0, len(chunks), size):
+        batch = chunks[start:start + size]
+        try:
+            annotations.update(zip(batch, annotate_with_medcat_bulk(batch)))
+        except Exception as e:
+            # Those chunks fall back to one MedCAT call each
+            logging.warning(f"MedCAT bulk call for {len(batch)} chunks failed: {e}")
+    return annotations
+
+
+def run_gse_batch(gse_ids: List[str], output_dir: str, concurrency: int = 4,
+                  send_progress: Optional[Callable[[str], None]] = None) -> Dict:
+    """
+    Process a list of GSE ids into `output_dir` and return the batch summary.
+
+    `send_progress` receives JSON messages: {"batch_progress": {gse_id, message}}
+    for stage updates and {"batch_status": {...}} when a series finishes.
+    """
+    output = Path(output_dir)
+    output.mkdir(parents=True, exist_ok=True)
+    gse_ids = list(dict.fromkeys(gse_id.strip().upper() for gse_id in gse_ids if gse_id.strip()))
+    status = BatchStatus(output / "status.json", gse_ids)
+
+    def report(payload: Dict):
+        if send_progress:
+            send_progress(json.dumps(payload, ensure_ascii=False))
+
+    pending = []
+    for gse_id in gse_ids:
+        if not GSE_ID_PATTERN.match(gse_id):
+            report({"batch_status": status.update(gse_id, status="failed", error="Invalid GSE ID")})
+        elif status.status(gse_id) != "ok":
+            pending.append(gse_id)
+
+    with track_job(f"batch:{output.name}") as metrics:
+        with span("batch.prefetch_articles"):
+            articles = prefetch_articles(pending)
+        with span("batch.prefetch_annotations"):
+            annotations = prefetch_annotations([a["article"] for a in articles.values() if a["article"]])
+
+        def annotate(chunk):
+            cached = annotations.get(chunk)
+            return cached if cached is not None else annotate_with_medcat(chunk)
+
+        def process(gse_id: str):
+            def series_progress(message: str):
+                # Stage updates only; the full payloads end up in the result file
+                if not message.lstrip().startswith("{"):
+                    status.update(gse_id, stage=message)
+                    report({"batch_progress": {"gse_id": gse_id, "message": message}})
+
+            prefetched = articles.get(gse_id, {})
+            # A failed batched lookup is retried per series by the pipeline; keep the cause either way
+            status.update(gse_id, status="running", started=_now(), prefetch_error=prefetched.get("error"))
+            start = time.perf_counter()
+            try:
+                result = process_gse_pipeline(
+                    gse_id, series_progress,
+                    pubmed_id=prefetched.get("pubmed_id"), article=prefetched.get("article"),
+                    annotate=annotate,
+                )
+            except Exception as e:
+                logging.exception(f"Batch series {gse_id} failed")
+                return status.update(gse_id, status="error", error=str(e),
+                                     seconds=round(time.perf_counter() - start, 3))
+            seconds = round(time.perf_counter() - start, 3)
+            if not isinstance(result, dict):
+                # The pipeline reports expected failures as a list of messages
+                return status.update(gse_id, status="failed", error="; ".join(map(str, result)), seconds=seconds)
+            result_path = output / f"{gse_id}.json"
+            with open(result_path, "w", encoding="utf-8") as f:
+                json.dump(result, f, ensure_ascii=False, indent=2)
+            return status.update(
+                gse_id, status="ok", error=None, seconds=seconds, result=result_path.name,
+                abstract_predicates=len(result["abstract_predicates"]),
+                gse_metadata_predicates=len(result["gse_metadata_predicates"]),
+            )
+
+        with ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="batch") as pool:
+            # Each series gets its own copy of the context so its job nests under the batch job
+            futures = [pool.submit(contextvars.copy_context().run, process, gse_id) for gse_id in pending]
+            for future in as_completed(futures):
+                report({"batch_status": future.result()})
+
+    summary = status.finish(metrics.summary())
+    report({"batch_summary": summary})
+    return summary
+
+
+def read_gse_ids(values: List[str], ids_file: Optional[str]) -> List[str]:
+    gse_ids = list(values)
+    if ids_file:
+        with open(ids_file, "r", encoding="utf-8") as f:
+            gse_ids.extend(token for line in f for token in re.split(r"[\s,]+", line.strip()) if token)
+    return gse_ids
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Process a batch of GEO series")
+    parser.add_argument("gse_ids", nargs="*", help="GSE accessions")
+    parser.add_argument("--ids-file", help="File with GSE accessions (whitespace or comma separated)")
+    parser.add_argument("--output-dir", default=os.path.join(config.BATCH_OUTPUT_DIR, "cli"),
+                        help="Where results and status.json are written")
+    parser.add_argument("--concurrency", type=int, default=4, help="Series processed in parallel (default: 4)")
+    parser.add_argument("--medcat-backend", choices=("http", "local"), default=config.MEDCAT_BACKEND,
+                        help="Annotate through medcat-service (http) or an in-process model from MEDCAT_MODEL_DIR")
+    args = parser.parse_args(argv)
+    config.MEDCAT_BACKEND = args.medcat_backend
+
+    gse_ids = read_gse_ids(args.gse_ids, args.ids_file)
+    if not gse_ids:
+        parser.error("no GSE ids given")
+    summary = run_gse_batch(gse_ids, args.output_dir, args.concurrency,
+                            send_progress=lambda message: print(message, file=sys.stderr))
+    print(json.dumps(summary, indent=2))
+    return 0 if set(summary["counts"]) <= {"ok"} else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,135 @@
+import re
+import ast
+import json
+import time
+import random
+from typing import Dict, List, Optional
+
+from app.utils import ai_provider
+from app.utils.ai_provider import AIResponse
+from app.utils.instrumentation import span, record_llm_usage
+
+
+class FakeAIClient:
+    """
+    Drop-in stand-in for `UnifiedAIClient` that answers every prompt used in
+    this codebase with well-formed output after a configurable delay.
+
+    latency: fixed seconds per call (time to first token)
+    tokens_per_second: completion generation rate, 0 for instant
+    completion_tokens: approximate size of each answer
+    """
+
+    def __init__(self, latency: float = 0.05, tokens_per_second: float = 0.0,
+                 completion_tokens: int = 120, seed: int = 0):
+        self.provider = "fake"
+        self.model = "fake-llm"
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.completion_tokens = completion_tokens
+        self._random = random.Random(seed)
+        self.calls = 0
+
+    def chat(self, messages: List[Dict[str, str]], model: Optional[str] = None,
+             temperature: Optional[float] = None, max_tokens: Optional[int] = None,
+             use_cache: bool = True) -> AIResponse:
+        with span("llm.chat", kind="external"):
+            self.calls += 1
+            system = "\n".join(m["content"] for m in messages if m.get("role") == "system")
+            user = "\n".join(m["content"] for m in messages if m.get("role") == "user")
+            content = self._answer(system, user)
+            completion_tokens = max(1, len(content) // 4)
+            delay = self.latency
+            if self.tokens_per_second:
+                delay += completion_tokens / self.tokens_per_second
+            time.sleep(delay)
+        prompt_tokens = max(1, (len(system) + len(user)) // 4)
+        record_llm_usage(self.provider, self.model, prompt_tokens, completion_tokens)
+        return AIResponse(content, prompt_tokens, completion_tokens)
+
+    def _answer(self, system: str, user: str) -> str:
+        if "knowledge graph extraction" in system:
+            return self._abstract_triples(user)
+        if "data standardization" in system:
+            return self._column_mapping(user)
+        if "knowledge graph extractor" in system:
+            return self._paper_triples(user)
+        # GSE metadata aspects: draft and refinement prompts
+        return self._metadata_predicates(user)
+
+    def _abstract_triples(self, prompt: str) -> str:
+        concepts = re.findall(r"- Concept: ([^(]+?) \(", prompt) or ["entity"]
+        triples = []
+        for subject, obj in zip(concepts, concepts[1:] + concepts[:1]):
+            triples.append({"subject": subject.lower(), "predicate": "associated_with", "object": obj.lower()})
+        return "```json\n" + json.dumps({"triples": triples}) + "\n```"
+
+    def _column_mapping(self, prompt: str) -> str:
+        match = re.search(r"\[.*?\]", prompt, re.DOTALL)
+        columns = ast.literal_eval(match.group(0)) if match else []
+        mapping = {col: ("uniqueId" if col == "Unique_ID" else re.sub(r"\W+", "", col.title())) for col in columns}
+        return "```json\n" + json.dumps(mapping) + "\n```"
+
+    def _paper_triples(self, prompt: str) -> str:
+        words = re.findall(r"[A-Za-z][A-Za-z0-9]{3,}", prompt.split("Text:", 1)[-1])[:40] or ["entity"]
+        count = max(1, self.completion_tokens // 8)
+        return "\n".join(
+            f"({self._random.choice(words)} regulates {self._random.choice(words)})" for _ in range(count)
+        )
+
+    def _metadata_predicates(self, prompt: str) -> str:
+        values = re.findall(r": ([A-Za-z][A-Za-z0-9 ]{2,30})", prompt)[:20] or ["Unknown"]
+        count = max(1, self.completion_tokens // 10)
+        return "\n".join(
+            f"hasValue{i}({re.sub(r'[^A-Za-z0-9]', '', self._random.choice(values)) or 'Unknown'})"
+            for i in range(count)
+        )
+
+
+class FakeTokenizer:
+    """
+    Offline stand-in for the tiktoken encoding: one token per word or
+    punctuation mark (with its leading whitespace), so token counts and
+    chunk boundaries are the same on every run, with or without network.
+    """
+
+    PIECES = re.compile(r"\s*\w+|\s*[^\w\s]|\s+")
+
+    def __init__(self):
+        self._ids: Dict[str, int] = {}
+        self._pieces: List[str] = []
+
+    def encode(self, text: str) -> List[int]:
+        tokens = []
+        for piece in self.PIECES.findall(text):
+            token = self._ids.get(piece)
+            if token is None:
+                token = self._ids[piece] = len(self._pieces)
+                self._pieces.append(piece)
+            tokens.append(token)
+        return tokens
+
+    def decode(self, tokens: List[int]) -> str:
+        return "".join(self._pieces[token] for token in tokens)
+
+
+def install_fake_tokenizer(tokenizer: Optional[FakeTokenizer] = None) -> FakeTokenizer:
+    """Count and split OpenAI tokens with a local stand-in instead of tiktoken."""
+    tokenizer = tokenizer or FakeTokenizer()
+    ai_provider._openai_encoding = tokenizer
+    return tokenizer
+
+
+def uninstall_fake_tokenizer():
+    ai_provider._openai_encoding = None
+
+
+def install_fake_ai_client(client: Optional[FakeAIClient] = None) -> FakeAIClient:
+    """Route `ai_generate` (and everything built on it) through a fake client."""
+    client = client or FakeAIClient()
+    ai_provider._cached_client = client
+    return client
+
+
+def uninstall_fake_ai_client():
+    ai_provider._cached_client = None
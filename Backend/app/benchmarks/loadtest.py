@@ -0,0 +1,326 @@
+"""
+Load generator for the API.
+
+Every virtual client opens `/ws/{client_id}`, starts a `/process` job, waits
+for the "Done " progress message and then fetches a GSM through `/get_gsm`
+and `/gsm_to_metta`. Latency percentiles, throughput and errors are reported
+per endpoint, together with event loop lag and memory growth scraped from
+`/metrics` before and after the run.
+
+Without `--base-url` a uvicorn server running `app.benchmarks.offline_app`
+(fake LLM, MedCAT / E-utilities stubs, synthetic SOFT file) is started:
+
+    python -m app.benchmarks.loadtest --clients 50 --workers 2 --output load.json
+    python -m app.benchmarks.loadtest --base-url http://localhost:8000 --gse-id GSE12345 --gsm-ids GSM1,GSM2
+
+With several uvicorn workers a job and its websocket may land in different
+processes; progress is then lost, which shows up as `progress_delivered` < 1.
+`/metrics` is served by whichever worker takes the scrape.
+"""
+import os
+import re
+import sys
+import json
+import time
+import socket
+import asyncio
+import argparse
+import platform
+import subprocess
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+import httpx
+import websockets
+
+from app.benchmarks.run import BENCH_GSE_ID, percentile, git_commit
+
+DONE_PREFIX = "Done "
+_SAMPLE_RE = re.compile(r"^([a-zA-Z_:][a-zA-Z0-9_:]*)(\{[^}]*\})?\s+(\S+)$")
+
+
+def parse_metrics(text: str) -> Dict[str, float]:
+    """Prometheus text format to {"name{labels}": value}"""
+    samples = {}
+    for line in text.splitlines():
+        match = _SAMPLE_RE.match(line.strip())
+        if match:
+            name, labels, value = match.groups()
+            samples[name + (labels or "")] = float(value)
+    return samples
+
+
+def histogram_quantile(before: Dict[str, float], after: Dict[str, float], name: str, q: float) -> Optional[float]:
+    """Upper bucket bound holding the q-quantile of observations made between two scrapes"""
+    buckets = []
+    for key, value in after.items():
+        if key.startswith(f"{name}_bucket{{") and 'le="' in key:
+            bound = key.split('le="', 1)[1].rstrip('"}')
+            buckets.append((float("inf") if bound == "+Inf" else float(bound), value - before.get(key, 0.0)))
+    buckets.sort()
+    if not buckets or buckets[-1][1] <= 0:
+        return None
+    target = q * buckets[-1][1]
+    for bound, cumulative in buckets:
+        if cumulative >= target:
+            return bound
+    return buckets[-1][0]
+
+
+def latency_summary(latencies: List[float], errors: int, elapsed: float) -> Dict:
+    return {
+        "requests": len(latencies) + errors,
+        "errors": errors,
+        "p50_s": round(percentile(latencies, 0.50), 4),
+        "p95_s": round(percentile(latencies, 0.95), 4),
+        "p99_s": round(percentile(latencies, 0.99), 4),
+        "max_s": round(max(latencies), 4) if latencies else 0.0,
+        "throughput_per_s": round(len(latencies) / elapsed, 3) if elapsed else None,
+    }
+
+
+class LoadRecorder:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+        self.error_samples: List[str] = []
+        self.progress_messages = 0
+        self.jobs = 0
+        self.jobs_with_done = 0
+
+    def ok(self, name: str, seconds: float):
+        self.latencies.setdefault(name, []).append(seconds)
+
+    def fail(self, name: str, error: str):
+        self.errors[name] = self.errors.get(name, 0) + 1
+        if len(self.error_samples) < 20:
+            self.error_samples.append(f"{name}: {error}")
+
+    def report(self, elapsed: float) -> Dict:
+        names = sorted(set(self.latencies) | set(self.errors))
+        return {
+            name: latency_summary(self.latencies.get(name, []), self.errors.get(name, 0), elapsed)
+            for name in names
+        }
+
+
+async def timed_post(http: httpx.AsyncClient, recorder: LoadRecorder, name: str, path: str, params: Dict):
+    start = time.perf_counter()
+    try:
+        response = await http.post(path, params=params)
+        response.raise_for_status()
+        response.json()
+    except Exception as e:
+        recorder.fail(name, repr(e))
+        return False
+    recorder.ok(name, time.perf_counter() - start)
+    return True
+
+
+async def run_client(args, index: int, iteration: int, http: httpx.AsyncClient,
+                     recorder: LoadRecorder, ws_url: str):
+    client_id = f"load-{index}-{iteration}"
+    gsm_id = args.gsm_ids[(index + iteration) % len(args.gsm_ids)]
+    done = asyncio.Event()
+
+    async def read_progress(ws):
+        async for message in ws:
+            recorder.progress_messages += 1
+            if isinstance(message, str) and message.startswith(DONE_PREFIX):
+                done.set()
+
+    start = time.perf_counter()
+    try:
+        ws = await websockets.connect(f"{ws_url}/ws/{client_id}", open_timeout=args.timeout)
+    except Exception as e:
+        recorder.fail("ws_connect", repr(e))
+        return
+    recorder.ok("ws_connect", time.perf_counter() - start)
+
+    reader = asyncio.create_task(read_progress(ws))
+    try:
+        recorder.jobs += 1
+        job_start = time.perf_counter()
+        if await timed_post(http, recorder, "process", "/process",
+                            {"client_id": client_id, "gse_id": args.gse_id}):
+            # Progress is sent from a worker thread, so the last message can trail the response
+            try:
+                await asyncio.wait_for(done.wait(), timeout=args.done_grace)
+                recorder.jobs_with_done += 1
+                recorder.ok("job_done", time.perf_counter() - job_start)
+            except asyncio.TimeoutError:
+                pass
+        params = {"gse_id": args.gse_id, "gsm_id": gsm_id}
+        await timed_post(http, recorder, "get_gsm", "/get_gsm", params)
+        await timed_post(http, recorder, "gsm_to_metta", "/gsm_to_metta", params)
+    finally:
+        reader.cancel()
+        await ws.close()
+
+
+async def scrape_metrics(http: httpx.AsyncClient) -> Dict[str, float]:
+    try:
+        response = await http.get("/metrics")
+        response.raise_for_status()
+    except httpx.HTTPError:
+        return {}
+    return parse_metrics(response.text)
+
+
+def server_report(before: Dict[str, float], after: Dict[str, float]) -> Dict:
+    if not after:
+        return {}
+    lag_count = after.get("event_loop_lag_seconds_count", 0.0) - before.get("event_loop_lag_seconds_count", 0.0)
+    lag_sum = after.get("event_loop_lag_seconds_sum", 0.0) - before.get("event_loop_lag_seconds_sum", 0.0)
+    memory_before = before.get("process_resident_memory_bytes", 0.0)
+    memory_after = after.get("process_resident_memory_bytes", 0.0)
+    return {
+        "event_loop_lag": {
+            "samples": int(lag_count),
+            "mean_s": round(lag_sum / lag_count, 4) if lag_count else None,
+            "p99_bucket_s": histogram_quantile(before, after, "event_loop_lag_seconds", 0.99),
+            "max_s": round(after.get("event_loop_lag_max_seconds", 0.0), 4),
+        },
+        "memory": {
+            "rss_before_bytes": int(memory_before),
+            "rss_after_bytes": int(memory_after),
+            "growth_bytes": int(memory_after - memory_before),
+        },
+    }
+
+
+async def run_load(args) -> Dict:
+    recorder = LoadRecorder()
+    ws_url = "ws" + args.base_url[len("http"):]
+    limits = httpx.Limits(max_connections=args.clients * 2)
+    timeout = httpx.Timeout(args.timeout)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=timeout) as http:
+        before = await scrape_metrics(http)
+        start = time.perf_counter()
+        deadline = start + args.duration if args.duration else None
+
+        async def worker(index: int):
+            iteration = 0
+            while True:
+                if deadline is None and iteration >= args.iterations:
+                    return
+                if deadline is not None and time.perf_counter() >= deadline:
+                    return
+                await run_client(args, index, iteration, http, recorder, ws_url)
+                iteration += 1
+
+        await asyncio.gather(*(worker(i) for i in range(args.clients)))
+        elapsed = time.perf_counter() - start
+        after = await scrape_metrics(http)
+
+    return {
+        "elapsed_s": round(elapsed, 3),
+        "jobs": recorder.jobs,
+        "progress_delivered": round(recorder.jobs_with_done / recorder.jobs, 3) if recorder.jobs else None,
+        "progress_messages": recorder.progress_messages,
+        "endpoints": recorder.report(elapsed),
+        "server": server_report(before, after),
+        "error_samples": recorder.error_samples,
+    }
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_offline_server(args) -> subprocess.Popen:
+    port = _free_port()
+    env = dict(os.environ)
+    env.update({
+        "BENCH_SAMPLES": str(args.samples),
+        "BENCH_ROWS": str(args.rows),
+        "BENCH_LLM_LATENCY": str(args.llm_latency),
+        "BENCH_MEDCAT_LATENCY": str(args.medcat_latency),
+        "BENCH_EUTILS_LATENCY": str(args.eutils_latency),
+    })
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.benchmarks.offline_app:app",
+         "--host", "127.0.0.1", "--port", str(port), "--workers", str(args.workers),
+         "--log-level", "warning"],
+        env=env,
+    )
+    args.base_url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"uvicorn exited with code {process.returncode}")
+        try:
+            if httpx.get(f"{args.base_url}/metrics", timeout=1).status_code == 200:
+                return process
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.25)
+    process.terminate()
+    raise RuntimeError("uvicorn did not start within 60s")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Concurrent load test for /process, /get_gsm and /gsm_to_metta")
+    parser.add_argument("--base-url", help="Running server to test (default: start the offline app)")
+    parser.add_argument("--clients", type=int, default=50, help="Concurrent virtual clients (default: 50)")
+    parser.add_argument("--iterations", type=int, default=1, help="Jobs per client (default: 1)")
+    parser.add_argument("--duration", type=float, default=0.0, help="Run for this many seconds instead of --iterations")
+    parser.add_argument("--gse-id", default=BENCH_GSE_ID, help="GSE to process")
+    parser.add_argument("--gsm-ids", default="", help="Comma-separated GSMs for /get_gsm (default: synthetic GSMs)")
+    parser.add_argument("--timeout", type=float, default=300.0, help="Per-request timeout in seconds")
+    parser.add_argument("--done-grace", type=float, default=5.0,
+                        help="Seconds to wait for 'Done' after /process returns")
+    parser.add_argument("--output", default="-", help="Where to write JSON results (default: stdout)")
+    offline = parser.add_argument_group("offline server (ignored with --base-url)")
+    offline.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    offline.add_argument("--samples", type=int, default=24, help="GSMs in the synthetic SOFT file")
+    offline.add_argument("--rows", type=int, default=500, help="Table rows per GSM")
+    offline.add_argument("--llm-latency", type=float, default=0.02, help="Fake LLM seconds per call")
+    offline.add_argument("--medcat-latency", type=float, default=0.005, help="MedCAT stub seconds per call")
+    offline.add_argument("--eutils-latency", type=float, default=0.005, help="E-utilities stub seconds per call")
+    args = parser.parse_args(argv)
+    if args.gsm_ids:
+        args.gsm_ids = [gsm.strip() for gsm in args.gsm_ids.split(",") if gsm.strip()]
+    else:
+        args.gsm_ids = [f"GSM{9_000_000 + i}" for i in range(args.samples)]
+    return args
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    server = None if args.base_url else start_offline_server(args)
+    try:
+        print(f"[load] {args.clients} clients against {args.base_url}...", file=sys.stderr)
+        results = asyncio.run(run_load(args))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=30)
+
+    for name, row in results["endpoints"].items():
+        print(f"[load] {name}: p50 {row['p50_s']:.3f}s p95 {row['p95_s']:.3f}s p99 {row['p99_s']:.3f}s "
+              f"errors {row['errors']}", file=sys.stderr)
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "cpu_count": os.cpu_count(),
+            "params": {k: v for k, v in vars(args).items() if k not in ("output",)},
+        },
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output == "-":
+        print(text)
+    else:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    return 1 if any(row["errors"] for row in results["endpoints"].values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
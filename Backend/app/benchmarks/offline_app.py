@@ -0,0 +1,63 @@
+"""
+The FastAPI app wired to the offline stand-ins, for load tests.
+
+    uvicorn app.benchmarks.offline_app:app --port 8001 --workers 2
+
+Each worker process starts its own MedCAT / E-utilities stub server, writes
+the synthetic SOFT file into a temporary GEO data dir and installs the fake
+LLM client. Sizes and latencies come from the environment:
+
+    BENCH_SAMPLES, BENCH_ROWS, BENCH_DONORS, BENCH_ABSTRACT_SENTENCES,
+    BENCH_LLM_LATENCY, BENCH_LLM_TOKENS_PER_SECOND,
+    BENCH_MEDCAT_LATENCY, BENCH_EUTILS_LATENCY
+"""
+import os
+import atexit
+import shutil
+import tempfile
+
+from app.core.config import config
+from app.benchmarks.fakes import FakeAIClient, install_fake_ai_client
+from app.benchmarks.stubs import StandInServer
+from app.benchmarks.synthetic import write_soft_file
+from app.benchmarks.run import BENCH_GSE_ID
+from app.main import app  # noqa: F401  (served by uvicorn)
+
+
+def _env_number(name: str, default, cast=float):
+    value = os.getenv(name)
+    return cast(value) if value not in (None, "") else default
+
+
+def _install_stand_ins():
+    workdir = tempfile.mkdtemp(prefix="loadtest_")
+    server = StandInServer(
+        medcat_latency=_env_number("BENCH_MEDCAT_LATENCY", 0.005),
+        eutils_latency=_env_number("BENCH_EUTILS_LATENCY", 0.005),
+        abstract_sentences=_env_number("BENCH_ABSTRACT_SENTENCES", 12, int),
+    ).start()
+    config.MEDCAT_URL = server.medcat_url
+    config.EUTILS_BASE_URL = server.eutils_base_url
+    config.GEO_DATA_DIR = os.path.join(workdir, "data")
+    config.TRIPLE_STORE_DIR = os.path.join(workdir, "triple_store")
+    config.CACHE_BACKEND = "none"
+    write_soft_file(
+        config.GEO_DATA_DIR, BENCH_GSE_ID,
+        samples=_env_number("BENCH_SAMPLES", 24, int),
+        rows=_env_number("BENCH_ROWS", 500, int),
+        donors=_env_number("BENCH_DONORS", 8, int),
+    )
+    install_fake_ai_client(FakeAIClient(
+        latency=_env_number("BENCH_LLM_LATENCY", 0.02),
+        tokens_per_second=_env_number("BENCH_LLM_TOKENS_PER_SECOND", 0.0),
+    ))
+
+    def cleanup():
+        server.stop()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    atexit.register(cleanup)
+    return server
+
+
+stand_ins = _install_stand_ins()
@@ -0,0 +1,284 @@
+"""
+Offline benchmark suite.
+
+Runs every pipeline stage and the full `process_gse_pipeline` / `PaperProcessor`
+paths against local stand-ins (fake LLM client, MedCAT and E-utilities stub
+server, synthetic SOFT files and PDFs) and writes machine-readable results.
+
+    python -m app.benchmarks.run --output bench.json
+    python -m app.benchmarks.run --output new.json --compare bench.json --fail-on-regression
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import argparse
+import tempfile
+import statistics
+import subprocess
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+from app.core.config import config
+from app.benchmarks.fakes import (
+    FakeAIClient, install_fake_ai_client, uninstall_fake_ai_client, install_fake_tokenizer, uninstall_fake_tokenizer
+)
+from app.benchmarks.stubs import StandInServer
+from app.benchmarks.synthetic import write_soft_file, make_pdf, synthetic_paper_pages
+from app.utils.instrumentation import track_job
+
+BENCH_GSE_ID = "GSE900001"
+
+
+def percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, round(q * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(latencies: List[float], items_per_run: int) -> Dict:
+    total = sum(latencies)
+    return {
+        "runs": len(latencies),
+        "items_per_run": items_per_run,
+        "mean_s": round(statistics.fmean(latencies), 6),
+        "p50_s": round(percentile(latencies, 0.50), 6),
+        "p95_s": round(percentile(latencies, 0.95), 6),
+        "min_s": round(min(latencies), 6),
+        "max_s": round(max(latencies), 6),
+        "throughput_per_s": round(items_per_run * len(latencies) / total, 3) if total else None,
+    }
+
+
+def measure(fn: Callable[[], object], repeat: int, items_per_run: int = 1, warmup: int = 1) -> Dict:
+    for _ in range(warmup):
+        fn()
+    latencies = []
+    with track_job("benchmark") as metrics:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn()
+            latencies.append(time.perf_counter() - start)
+    result = summarize(latencies, items_per_run)
+    # Per-span breakdown across the measured runs
+    result["spans"] = metrics.summary()["spans"]
+    result["llm"] = metrics.summary()["totals"]
+    return result
+
+
+@contextmanager
+def offline_environment(args, workdir: str):
+    """Point config at the stand-ins and swap in the fake LLM client and tokenizer."""
+    papers = {
+        f"paper{i}.pdf": make_pdf(synthetic_paper_pages(args.pages, args.words_per_page, seed=i))
+        for i in range(args.papers)
+    }
+    server = StandInServer(
+        medcat_latency=args.medcat_latency,
+        eutils_latency=args.eutils_latency,
+        abstract_sentences=args.abstract_sentences,
+        files=papers,
+    ).start()
+    saved = (config.MEDCAT_URL, config.EUTILS_BASE_URL, config.GEO_DATA_DIR, config.TRIPLE_STORE_DIR,
+             config.CACHE_BACKEND, config.AI_PROVIDER)
+    config.MEDCAT_URL = server.medcat_url
+    config.EUTILS_BASE_URL = server.eutils_base_url
+    config.GEO_DATA_DIR = os.path.join(workdir, "data")
+    config.TRIPLE_STORE_DIR = os.path.join(workdir, "triple_store")
+    # Measure the uncached work; repeats would otherwise be served from the cache
+    config.CACHE_BACKEND = "none"
+    # Token counting and chunking use the local stand-in tokenizer, never a provider or a download
+    config.AI_PROVIDER = "openai"
+    install_fake_tokenizer()
+    write_soft_file(config.GEO_DATA_DIR, BENCH_GSE_ID, samples=args.samples,
+                    rows=args.rows, donors=args.donors)
+    client = install_fake_ai_client(FakeAIClient(
+        latency=args.llm_latency, tokens_per_second=args.llm_tokens_per_second
+    ))
+    try:
+        yield server, client
+    finally:
+        uninstall_fake_ai_client()
+        uninstall_fake_tokenizer()
+        (config.MEDCAT_URL, config.EUTILS_BASE_URL, config.GEO_DATA_DIR, config.TRIPLE_STORE_DIR,
+         config.CACHE_BACKEND, config.AI_PROVIDER) = saved
+        server.stop()
+
+
+def build_benchmarks(args, server: StandInServer, workdir: str) -> Dict[str, Callable[[], Dict]]:
+    from app.controllers import process_gse_pipeline
+    from app.services.gse_loader import load_gse_data
+    from app.services.abstract_loader import (
+        extract_pubmed_id, fetch_abstract, clean_abstract_text, chunk_text
+    )
+    from app.services.abstract_to_fol import annotate_with_medcat, generate_valid_predicates_from_abstract
+    from app.services.metadata_to_fol import get_all_metadata_samples, generate_valid_predicates_from_gse
+    from app.services.fol_to_metta import iter_metta_records
+    from app.services.triple_store import TripleStore
+    from app.services.full_paper_semantic_parsing import (
+        PaperProcessor, PaperInfo, RateLimiter
+    )
+
+    gse = load_gse_data(BENCH_GSE_ID)
+    abstract = clean_abstract_text(fetch_abstract(extract_pubmed_id(BENCH_GSE_ID)))
+    chunks = chunk_text(abstract)
+    predicates_text = " ".join(
+        f"regulates(Gene{i}, Process{i % 97}) expressedIn(Gene{i})" for i in range(args.predicates // 2)
+    )
+
+    def run_papers():
+        processor = PaperProcessor(output_dir=os.path.join(workdir, "output"),
+                                   temp_dir=os.path.join(workdir, "temp_pdfs"))
+        processor.rate_limiter = RateLimiter(0.0)
+        papers = [
+            PaperInfo(f"Synthetic paper {i}", "summary", f"{server.url}/files/paper{i}.pdf",
+                      "2024-01-01", ["Doe J"], f"9999.{i:05d}v1")
+            for i in range(args.papers)
+        ]
+        processor.fetcher.fetch_papers = lambda query, max_results: papers
+        try:
+            return processor.process_papers("benchmark", args.papers, workers=args.workers)
+        finally:
+            processor.close()
+
+    stores = {}
+
+    def run_triple_queries():
+        # Built during the warmup run; measured runs are 100 pattern lookups each
+        store = stores.get("triples")
+        if store is None:
+            store = stores["triples"] = TripleStore()
+            store.add((f"Gene{i % 50000}", f"rel{i % 20}", f"Target{i // 7}", None)
+                      for i in range(args.triples))
+            store.count()
+        return [
+            store.count(predicate="rel3", obj=f"Target{i}") + sum(1 for _ in store.match(subject=f"Gene{i}"))
+            for i in range(100)
+        ]
+
+    repeat = args.repeat
+    return {
+        "geo.load_soft": lambda: measure(lambda: load_gse_data(BENCH_GSE_ID), repeat, args.samples),
+        "metadata.format_samples": lambda: measure(lambda: get_all_metadata_samples(gse), repeat, args.samples),
+        "eutils.abstract": lambda: measure(
+            lambda: fetch_abstract(extract_pubmed_id(BENCH_GSE_ID)), repeat),
+        "abstract.chunk": lambda: measure(lambda: chunk_text(abstract), repeat),
+        "medcat.annotate": lambda: measure(lambda: [annotate_with_medcat(c) for c in chunks], repeat, len(chunks)),
+        "abstract.predicates": lambda: measure(
+            lambda: generate_valid_predicates_from_abstract(chunks), repeat, len(chunks)),
+        "gse_metadata.predicates": lambda: measure(lambda: generate_valid_predicates_from_gse(gse), repeat),
+        "fol_to_metta.stream": lambda: measure(
+            lambda: sum(1 for _ in iter_metta_records([predicates_text])), repeat, args.predicates),
+        "pipeline.process_gse": lambda: measure(
+            lambda: process_gse_pipeline(BENCH_GSE_ID, send_progress=lambda message: None), repeat),
+        "paper.process_papers": lambda: measure(run_papers, repeat, args.papers),
+        "triple_store.match": lambda: measure(run_triple_queries, repeat, 100),
+    }
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current: Dict, baseline: Dict, threshold: float) -> List[Dict]:
+    """Compare p50 latency per benchmark; ratio > 1 + threshold is a regression."""
+    rows = []
+    for name, result in current["results"].items():
+        base = baseline.get("results", {}).get(name)
+        if not base or not base.get("p50_s"):
+            continue
+        ratio = result["p50_s"] / base["p50_s"]
+        rows.append({"name": name, "baseline_p50_s": base["p50_s"], "p50_s": result["p50_s"],
+                     "ratio": round(ratio, 3), "regression": ratio > 1 + threshold})
+    return rows
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Offline benchmarks for the semantic parsing pipelines")
+    parser.add_argument("--output", default="-", help="Where to write JSON results (default: stdout)")
+    parser.add_argument("--only", default="", help="Comma-separated benchmark names to run")
+    parser.add_argument("--repeat", type=int, default=3, help="Measured runs per benchmark (default: 3)")
+    parser.add_argument("--samples", type=int, default=24, help="GSMs in the synthetic SOFT file")
+    parser.add_argument("--rows", type=int, default=500, help="Table rows per GSM")
+    parser.add_argument("--donors", type=int, default=8, help="Distinct donor ids across GSMs")
+    parser.add_argument("--abstract-sentences", type=int, default=12, help="Sentences per synthetic abstract")
+    parser.add_argument("--predicates", type=int, default=20000, help="Predicates for the FOL→MeTTa benchmark")
+    parser.add_argument("--triples", type=int, default=1000000, help="Triples in the pattern query benchmark")
+    parser.add_argument("--papers", type=int, default=3, help="Synthetic papers for PaperProcessor")
+    parser.add_argument("--pages", type=int, default=12, help="Pages per synthetic paper")
+    parser.add_argument("--words-per-page", type=int, default=400, help="Words per synthetic page")
+    parser.add_argument("--workers", type=int, default=1, help="PaperProcessor workers")
+    parser.add_argument("--llm-latency", type=float, default=0.02, help="Fake LLM seconds per call")
+    parser.add_argument("--llm-tokens-per-second", type=float, default=0.0, help="Fake LLM generation rate")
+    parser.add_argument("--medcat-latency", type=float, default=0.005, help="MedCAT stub seconds per call")
+    parser.add_argument("--eutils-latency", type=float, default=0.005, help="E-utilities stub seconds per call")
+    parser.add_argument("--compare", help="Baseline results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed p50 slowdown ratio (default: 0.2)")
+    parser.add_argument("--fail-on-regression", action="store_true", help="Exit 1 when a regression is found")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    selected = {name.strip() for name in args.only.split(",") if name.strip()}
+    workdir = tempfile.mkdtemp(prefix="bench_")
+    results = {}
+    try:
+        with offline_environment(args, workdir) as (server, client):
+            benchmarks = build_benchmarks(args, server, workdir)
+            unknown = selected - set(benchmarks)
+            if unknown:
+                print(f"Unknown benchmarks: {', '.join(sorted(unknown))}", file=sys.stderr)
+                return 2
+            for name, run in benchmarks.items():
+                if selected and name not in selected:
+                    continue
+                print(f"[bench] {name}...", file=sys.stderr)
+                results[name] = run()
+                print(f"[bench] {name}: p50 {results[name]['p50_s']:.4f}s", file=sys.stderr)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "params": {k: v for k, v in vars(args).items() if k not in ("output", "compare")},
+        },
+        "results": results,
+    }
+
+    exit_code = 0
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            report["comparison"] = compare(report, json.load(f), args.threshold)
+        for row in report["comparison"]:
+            flag = "REGRESSION" if row["regression"] else "ok"
+            print(f"[compare] {row['name']}: {row['baseline_p50_s']:.4f}s -> {row['p50_s']:.4f}s "
+                  f"(x{row['ratio']}) {flag}", file=sys.stderr)
+        if args.fail_on_regression and any(row["regression"] for row in report["comparison"]):
+            exit_code = 1
+
+    text = json.dumps(report, indent=2)
+    if args.output == "-":
+        print(text)
+    else:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,203 @@
+import re
+import json
+import time
+import zlib
+import random
+import threading
+from pathlib import Path
+from string import Template
+from typing import Dict, Optional
+from urllib.parse import urlparse, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures" / "eutils"
+
+_WORDS = (
+    "tumor suppressor TP53 regulates apoptosis in hepatocytes while BRCA1 mutation increases "
+    "breast carcinoma risk and interleukin signaling modulates macrophage activation during "
+    "inflammation with insulin resistance affecting glucose metabolism in adipose tissue"
+).split()
+
+
+def synthetic_abstract(sentences: int = 12, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    return " ".join(
+        " ".join(rng.choice(_WORDS) for _ in range(rng.randint(12, 24))).capitalize() + "."
+        for _ in range(sentences)
+    )
+
+
+class StandInServer:
+    """
+    Local HTTP stand-in for the MedCAT service, NCBI E-utilities and static
+    downloads (e.g. PDFs), served from one background thread.
+
+    MedCAT:     {url}/medcat/api/process, /api/process_bulk, /api/info
+    E-utilities:{url}/eutils/esearch.fcgi, esummary.fcgi, efetch.fcgi, elink.fcgi
+    Files:      {url}/files/<name>
+    """
+
+    def __init__(self, medcat_latency: float = 0.0, eutils_latency: float = 0.0,
+                 abstract_sentences: int = 12, files: Optional[Dict[str, bytes]] = None):
+        self.medcat_latency = medcat_latency
+        self.eutils_latency = eutils_latency
+        self.abstract_sentences = abstract_sentences
+        self.files = dict(files or {})
+        self.requests = {"medcat": 0, "eutils": 0, "files": 0}
+        self._lock = threading.Lock()
+        self._fixtures = {path.name: Template(path.read_text()) for path in FIXTURES_DIR.iterdir()}
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def medcat_url(self) -> str:
+        return f"{self.url}/medcat/api/process"
+
+    @property
+    def eutils_base_url(self) -> str:
+        return f"{self.url}/eutils/"
+
+    def start(self) -> "StandInServer":
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _count(self, kind: str):
+        with self._lock:
+            self.requests[kind] += 1
+
+    # MedCAT
+
+    def annotate(self, text: str) -> Dict:
+        entities = {}
+        for i, match in enumerate(re.finditer(r"[A-Za-z][A-Za-z0-9]{5,}", text)):
+            word = match.group(0)
+            entities[str(i)] = {
+                "pretty_name": word.lower(),
+                "detected_name": word.lower(),
+                "cui": f"C{zlib.crc32(word.lower().encode()) % 10_000_000:07d}",
+                "types": ["Gene or Genome" if word.isupper() else "Biologic Function"],
+                "start": match.start(),
+                "end": match.end(),
+            }
+        return {"text": text, "annotations": [entities], "success": True}
+
+    # E-utilities
+
+    def eutils_response(self, endpoint: str, params: Dict[str, str]) -> (str, str):
+        """
+        Fill the recorded fixtures deterministically: GSE<n> has GDS uid
+        200000000 + n and is linked to PubMed id 30000000 + n. Batched
+        requests (several accessions or ids) get one record per item.
+        """
+        if endpoint == "esearch.fcgi":
+            numbers = [int(n) for n in re.findall(r"GSE(\d+)", params.get("term", ""))] or [0]
+        else:
+            offset = 200_000_000 if endpoint == "esummary.fcgi" else 30_000_000
+            numbers = [int(uid) - offset for uid in params.get("id", "0").split(",") if uid] or [0]
+        name = {
+            "esearch.fcgi": "esearch_gds.json",
+            "esummary.fcgi": "esummary_gds.json",
+            "elink.fcgi": "elink_pmc.json",
+            "efetch.fcgi": "efetch_pubmed.txt",
+        }[endpoint]
+        filled = [self._fixtures[name].substitute(self._fixture_values(number)) for number in numbers]
+        if name.endswith(".txt"):
+            return "\n".join(filled), "text/plain"
+        return json.dumps(self._merge_records(endpoint, [json.loads(body) for body in filled])), "application/json"
+
+    def _fixture_values(self, number: int) -> Dict:
+        return {
+            "accession": f"GSE{number}",
+            "number": number,
+            "uid": 200_000_000 + number,
+            "pmid": 30_000_000 + number,
+            "abstract": synthetic_abstract(self.abstract_sentences, seed=number),
+        }
+
+    @staticmethod
+    def _merge_records(endpoint: str, records):
+        merged = records[0]
+        if endpoint == "esearch.fcgi":
+            ids = [uid for record in records for uid in record["esearchresult"]["idlist"]]
+            merged["esearchresult"].update(idlist=ids, count=str(len(ids)), retmax=str(len(ids)))
+        elif endpoint == "esummary.fcgi":
+            for record in records[1:]:
+                merged["result"].update({k: v for k, v in record["result"].items() if k != "uids"})
+                merged["result"]["uids"].extend(record["result"]["uids"])
+        return merged
+
+    def _handler_class(self):
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _reply(self, status: int, body: bytes, content_type: str):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _json(self, payload, status: int = 200):
+                self._reply(status, json.dumps(payload).encode(), "application/json")
+
+            def do_GET(self):
+                parsed = urlparse(self.path)
+                params = {k: v[0] for k, v in parse_qs(parsed.query).items()}
+                if parsed.path == "/medcat/api/info":
+                    stand_in._count("medcat")
+                    return self._json({"service_app_name": "MedCAT stand-in", "model_card": {
+                        "Model ID": "stand-in-0001", "Basic CDB Stats": {"Number of concepts": 0}}})
+                if parsed.path.startswith("/eutils/"):
+                    stand_in._count("eutils")
+                    time.sleep(stand_in.eutils_latency)
+                    endpoint = parsed.path.rsplit("/", 1)[-1]
+                    try:
+                        body, content_type = stand_in.eutils_response(endpoint, params)
+                    except KeyError:
+                        return self._reply(404, b"unknown endpoint", "text/plain")
+                    return self._reply(200, body.encode(), content_type)
+                if parsed.path.startswith("/files/"):
+                    stand_in._count("files")
+                    data = stand_in.files.get(parsed.path[len("/files/"):])
+                    if data is None:
+                        return self._reply(404, b"not found", "text/plain")
+                    return self._reply(200, data, "application/octet-stream")
+                self._reply(404, b"not found", "text/plain")
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                payload = json.loads(self.rfile.read(length) or b"{}")
+                path = urlparse(self.path).path
+                if path == "/medcat/api/process":
+                    stand_in._count("medcat")
+                    time.sleep(stand_in.medcat_latency)
+                    return self._json({"result": stand_in.annotate(payload["content"]["text"])})
+                if path == "/medcat/api/process_bulk":
+                    stand_in._count("medcat")
+                    texts = [item["text"] for item in payload["content"]]
+                    time.sleep(stand_in.medcat_latency * max(1, len(texts)) ** 0.5)
+                    return self._json({"result": [stand_in.annotate(text) for text in texts]})
+                self._reply(404, b"not found", "text/plain")
+
+        return Handler
@@ -0,0 +1,115 @@
+import gzip
+import random
+from pathlib import Path
+from typing import List
+
+_TISSUES = ["liver", "brain", "heart", "kidney", "lung", "adipose tissue"]
+_TREATMENTS = ["vehicle control", "dexamethasone 10 nM", "insulin 100 nM", "LPS 1 ug/ml"]
+_SEXES = ["male", "female"]
+
+
+def write_soft_file(data_dir: str, gse_id: str = "GSE900001", samples: int = 24,
+                    rows: int = 500, donors: int = 8, seed: int = 0) -> Path:
+    """
+    Write a synthetic `<gse_id>_family.soft.gz` that GEOparse can load.
+
+    `samples` GSMs share one platform with `rows` probes each. Characteristics
+    vary by tissue, treatment, sex, donor and replicate so metadata diversity
+    can be tuned independently of the sample count.
+    """
+    rng = random.Random(seed)
+    path = Path(data_dir) / f"{gse_id}_family.soft.gz"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    gsm_ids = [f"GSM{9_000_000 + i}" for i in range(samples)]
+    probes = [f"{1_000_000 + i}_at" for i in range(rows)]
+
+    lines = [
+        "^DATABASE = GeoMiame",
+        "!Database_name = Gene Expression Omnibus (GEO)",
+        f"^SERIES = {gse_id}",
+        f"!Series_title = Synthetic expression profiling series {gse_id}",
+        f"!Series_geo_accession = {gse_id}",
+        "!Series_summary = Transcriptional response of human tissues to glucocorticoid and insulin treatment.",
+        "!Series_overall_design = Tissues from donors were treated and profiled on Affymetrix arrays in replicate.",
+        "!Series_type = Expression profiling by array",
+        f"!Series_pubmed_id = {30_000_000 + int(gse_id[3:])}",
+    ]
+    lines += [f"!Series_sample_id = {gsm}" for gsm in gsm_ids]
+    lines += [
+        "^PLATFORM = GPL570",
+        "!Platform_title = [HG-U133_Plus_2] Affymetrix Human Genome U133 Plus 2.0 Array",
+        "!Platform_geo_accession = GPL570",
+        "#ID = Affymetrix probe set ID",
+        "#Gene Symbol = gene symbol",
+        "!platform_table_begin",
+        "ID\tGene Symbol",
+    ]
+    lines += [f"{probe}\tGENE{i % 2000}" for i, probe in enumerate(probes)]
+    lines.append("!platform_table_end")
+
+    for i, gsm in enumerate(gsm_ids):
+        lines += [
+            f"^SAMPLE = {gsm}",
+            f"!Sample_title = sample {i}",
+            f"!Sample_geo_accession = {gsm}",
+            f"!Sample_source_name_ch1 = {_TISSUES[i % len(_TISSUES)]}",
+            "!Sample_organism_ch1 = Homo sapiens",
+            f"!Sample_characteristics_ch1 = tissue: {_TISSUES[i % len(_TISSUES)]}",
+            f"!Sample_characteristics_ch1 = treatment: {_TREATMENTS[i % len(_TREATMENTS)]}",
+            f"!Sample_characteristics_ch1 = Sex: {_SEXES[i % 2]}",
+            f"!Sample_characteristics_ch1 = donor: D{i % donors}",
+            f"!Sample_characteristics_ch1 = replicate: {i // donors + 1}",
+            f"!Sample_treatment_protocol_ch1 = Cells were treated with {_TREATMENTS[i % len(_TREATMENTS)]} for 24 h.",
+            "!Sample_molecule_ch1 = total RNA",
+            "!Sample_extract_protocol_ch1 = RNA was extracted with TRIzol.",
+            "!Sample_label_ch1 = biotin",
+            "!Sample_label_protocol_ch1 = Standard Affymetrix labeling protocol.",
+            "!Sample_hyb_protocol_ch1 = Hybridized for 16 h at 45C.",
+            "!Sample_scan_protocol = GeneChip Scanner 3000.",
+            "!Sample_data_processing = RMA normalization with log2 transform.",
+            "!Sample_platform_id = GPL570",
+            "#ID_REF = ",
+            "#VALUE = RMA normalized log2 signal",
+            "#DETECTION_P = detection p-value",
+            "!sample_table_begin",
+            "ID_REF\tVALUE\tDETECTION_P",
+        ]
+        lines += [f"{probe}\t{rng.uniform(2, 14):.3f}\t{rng.random():.4f}" for probe in probes]
+        lines.append("!sample_table_end")
+
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+    return path
+
+
+def make_pdf(pages: List[str]) -> bytes:
+    """Build a minimal text PDF (one Helvetica text line per page) readable by PyPDF2."""
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", "", "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for text in pages:
+        escaped = text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+        stream = f"BT /F1 10 Tf 72 720 Td ({escaped}) Tj ET"
+        objects.append(f"<< /Length {len(stream.encode())} >>\nstream\n{stream}\nendstream")
+        objects.append(
+            "<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>"
+        )
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>"
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{body}\nendobj\n".encode()
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    out += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode()
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return bytes(out)
+
+
+def synthetic_paper_pages(pages: int = 12, words_per_page: int = 400, seed: int = 0) -> List[str]:
+    from app.benchmarks.stubs import _WORDS
+    rng = random.Random(seed)
+    return [" ".join(rng.choice(_WORDS) for _ in range(words_per_page)) for _ in range(pages)]
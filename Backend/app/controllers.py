@@ -1,12 +1,16 @@
-from .services.gse_loader import fetch_gse_data, load_gse_data
+from .services.gse_loader import fetch_gse_data, load_gsm_table
 from .services.abstract_loader import extract_pubmed_id, fetch_pubmed_article, fetch_abstract, chunk_text, clean_abstract_text
 from .services.metadata_to_fol import generate_valid_predicates_from_gse as generate_valid_predicates_from_gse_metadata
-from .services.abstract_to_fol import generate_valid_predicates_from_abstract as generate_valid_predicates_from_abstract
+from .services.abstract_to_fol import iter_valid_predicates_from_abstract, annotate_with_medcat
 from .services.fol_to_metta import convert_all_to_metta, validate_metta_lines, split_predicates
-from .services.gsm_to_metta import generate_metta_from_gsm, load_gsm_data
+from .services.fol_to_metta import aiter_metta_records, format_metta_record
+from .services.gsm_to_metta import sample_gsm_rows, map_gsm_columns, declare_instances
+from .services.triple_store import predicate_records, atom_records, ingest_records
+from .core.executors import run_cpu, run_io
+from .utils.ai_provider import provider_model_name
+from .utils.instrumentation import track_job, current_job, span
 import logging
 import json
-import GEOparse
 
 logging.basicConfig(level=logging.INFO)
 
@@ -16,20 +20,27 @@ def send_or_log(message, send_progress):
     else:
         logging.info(message)
 
-def process_gse_pipeline(gse_id: str, send_progress) -> list:
+def process_gse_pipeline(gse_id: str, send_progress, pubmed_id=None, article=None, annotate=None) -> list:
     """
     Orchestrates the GSE to predicate pipeline.
     
     Args:
         gse_id (str): GEO Series identifier (e.g., 'GSE12345').
+        pubmed_id, article (optional): Pre-fetched by batch runs; looked up when missing.
+        annotate (callable, optional): chunk -> MedCAT response, defaults to one MedCAT call per chunk.
 
     Returns:
         list: A list of predicates generated from the GSE and PubMed article.
     """
+    with track_job(gse_id):
+        return _run_gse_pipeline(gse_id, send_progress, pubmed_id, article, annotate)
+
+def _run_gse_pipeline(gse_id: str, send_progress, pubmed_id=None, article=None, annotate=None):
 
     send_or_log("Fetching GSE data...", send_progress)
  
-    gse_data = fetch_gse_data(gse_id)
+    with span("pipeline.fetch_gse"):
+        gse_data = fetch_gse_data(gse_id)
     if not gse_data:
         return ["Failed to fetch GSE data"]
     logging.info("GSE data fetched successfully.")
@@ -46,14 +57,18 @@ def process_gse_pipeline(gse_id: str, send_progress) -> list:
     send_or_log(json.dumps(gsms_result, ensure_ascii=False), send_progress)
 
     send_or_log("Extracting PubMed ID...", send_progress)
-    pubmed_id = extract_pubmed_id(gse_id)
+    if pubmed_id is None:
+        with span("pipeline.extract_pubmed_id"):
+            pubmed_id = extract_pubmed_id(gse_id)
     if not pubmed_id:
         return ["No PubMed ID found for this GSE"]
     logging.info(f"PubMed ID extracted: {pubmed_id}")
     send_or_log("Fetching PubMed article...", send_progress)
 
 
-    article = fetch_abstract(pubmed_id)
+    if article is None:
+        with span("pipeline.fetch_abstract"):
+            article = fetch_abstract(pubmed_id)
     if not article:
         return ["Failed to fetch PubMed article"]
     # return article
@@ -65,17 +80,27 @@ def process_gse_pipeline(gse_id: str, send_progress) -> list:
 
 
     send_or_log("chunking abstract...", send_progress)
-    chunks= chunk_text(cleanned_article)
+    with span("pipeline.chunk_abstract"):
+        chunks= chunk_text(cleanned_article)
     if not chunks:
         return ["Failed to chunk the abstract"]
     logging.info("Abstract chunked successfully.")
     
     send_or_log("Generating predicates from abstract...", send_progress)
 
-    
-    send_or_log("Generating predicates from abstract...", send_progress)
-
-    abstract_predicates = generate_valid_predicates_from_abstract(chunks)
+    model = provider_model_name()
+    abstract_predicates = []
+    triple_records = []
+    with span("pipeline.abstract_predicates"):
+        for chunk_result in iter_valid_predicates_from_abstract(chunks, annotate or annotate_with_medcat):
+            # Partial results, so clients see predicates before every chunk is done
+            abstract_predicates.extend(chunk_result["predicates"])
+            triple_records.extend(predicate_records(
+                chunk_result["predicates"], source="abstract", gse=gse_id,
+                pmid=str(pubmed_id), chunk=chunk_result["chunk"], model=model,
+            ))
+            chunk_message = {"abstract_predicates_chunk": {**chunk_result, "chunks": len(chunks)}}
+            send_or_log(json.dumps(chunk_message, ensure_ascii=False), send_progress)
     if not abstract_predicates:
         return ["Failed to generate predicates from abstract"]
     logging.info("Predicates from abstract generated successfully.")
@@ -83,19 +108,28 @@ def process_gse_pipeline(gse_id: str, send_progress) -> list:
     send_or_log(json.dumps(abstract_predicates_result, ensure_ascii=False), send_progress)
 
     send_or_log("Generating predicates from GSE metadata...", send_progress)
-    gse_predicates = generate_valid_predicates_from_gse_metadata(gse_data)
+    with span("pipeline.gse_metadata_predicates"):
+        gse_predicates = generate_valid_predicates_from_gse_metadata(gse_data)
     if not gse_predicates:
         return ["Failed to generate predicates from GSE metadata"]
     logging.info("Predicates from GSE metadata generated successfully.")
 
+    triple_records.extend(predicate_records(gse_predicates, source="gse_metadata", gse=gse_id, model=model))
+    with span("pipeline.store_triples"):
+        ingest_records(triple_records)
+
     gse_predicates_result = {"gse_metadata_predicates": gse_predicates}
     send_or_log(json.dumps(gse_predicates_result,ensure_ascii=False), send_progress)
 
+    metrics = current_job().summary()
+    send_or_log(json.dumps({"metrics": metrics}, ensure_ascii=False), send_progress)
+
     result = {
     "abstract": article,
     "cleanned_abstract": cleanned_article,
     "abstract_predicates": abstract_predicates,
-    "gse_metadata_predicates": gse_predicates
+    "gse_metadata_predicates": gse_predicates,
+    "metrics": metrics
         }
     
     send_or_log("Done ", send_progress)
@@ -115,20 +149,32 @@ def convert_fol_string_to_metta(text_block: str) -> dict:
         "metta_invalid": invalid_lines,
         "original_predicates": predicates
     }
+
+async def stream_fol_to_metta(body_chunks, output_format: str = "ndjson"):
+    """
+    Convert a FOL text stream to MeTTa line by line (NDJSON records or plain MeTTa text).
+    """
+    async for record in aiter_metta_records(body_chunks):
+        yield format_metta_record(record, output_format)
+
 def get_gsm_data(gse_id: str, gsm_id: str) -> dict:
 
-    gse= load_gse_data(gse_id)
-    data= load_gsm_data(gse, gsm_id)
+    data= load_gsm_table(gse_id, gsm_id)
 
     return data.head(15)
 
-def gsm_to_metta(gse_id: str, gsm_id: str) -> dict:
-    
-    gse= load_gse_data(gse_id)
-    data= load_gsm_data(gse, gsm_id)
-    metta = generate_metta_from_gsm(data, gsm_id)
-    result_instances = {
-        "table_metta": metta
-    }
+def sample_gsm_table(gse_id: str, gsm_id: str):
+    # Parses the SOFT file; run in the process pool and only ship the sampled rows back
+    data= load_gsm_table(gse_id, gsm_id)
+    return sample_gsm_rows(data, gsm_id)
 
-    return result_instances
\ No newline at end of file
+async def gsm_to_metta_async(gse_id: str, gsm_id: str) -> dict:
+    """
+    MeTTa instances for a GSM table: SOFT parsing in the process pool, the LLM call in the I/O pool.
+    """
+    sample_data = await run_cpu(sample_gsm_table, gse_id, gsm_id)
+    predicate_mapping = await run_io(map_gsm_columns, list(sample_data.columns))
+    instances = declare_instances(sample_data, predicate_mapping)
+    records = atom_records(instances, source="gsm", gse=gse_id, gsm=gsm_id, model=provider_model_name())
+    await run_io(ingest_records, records)
+    return {"table_metta": instances}
\ No newline at end of file
@@ -6,6 +6,56 @@ class Config:
     NCBI_API_KEY= os.getenv("NCBI_API_KEY")
     GROQ_API_KEY = os.getenv("API_KEY")
     MEDCAT_URL = os.getenv("MEDCAT_URL","http://localhost:5000")
+    EUTILS_BASE_URL = os.getenv("EUTILS_BASE_URL", "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/")
+    GEO_DATA_DIR = os.getenv("GEO_DATA_DIR", "./data")
+    # Optional; derived from MEDCAT_URL (.../api/process -> .../api/process_bulk) when unset
+    MEDCAT_BULK_URL = os.getenv("MEDCAT_BULK_URL")
+    # Model version for the annotation cache; derived like MEDCAT_BULK_URL (.../api/info) when unset
+    MEDCAT_INFO_URL = os.getenv("MEDCAT_INFO_URL")
+    MEDCAT_INFO_TTL_SECONDS = float(os.getenv("MEDCAT_INFO_TTL_SECONDS", "300"))
+    # How long an unanswered /api/info is remembered before it is asked again
+    MEDCAT_INFO_RETRY_SECONDS = float(os.getenv("MEDCAT_INFO_RETRY_SECONDS", "60"))
+    # "http" (medcat-service at MEDCAT_URL) or "local": load the model from MEDCAT_MODEL_DIR
+    # in-process (needs the medcat package) and annotate bulk chunk lists in MEDCAT_PROCESSES processes
+    MEDCAT_BACKEND = os.getenv("MEDCAT_BACKEND", "http").lower()
+    MEDCAT_MODEL_DIR = os.getenv("MEDCAT_MODEL_DIR", "./models")
+    MEDCAT_PROCESSES = int(os.getenv("MEDCAT_PROCESSES", str(min(4, os.cpu_count() or 1))))
+
+    # Shared HTTP connection pool and batch sizes for batch processing
+    HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "32"))
+    EUTILS_BATCH_SIZE = int(os.getenv("EUTILS_BATCH_SIZE", "200"))
+    MEDCAT_BULK_SIZE = int(os.getenv("MEDCAT_BULK_SIZE", "32"))
+    BATCH_OUTPUT_DIR = os.getenv("BATCH_OUTPUT_DIR", "./batch_results")
+
+    # Executor pools for blocking work: threads for network/LLM calls, processes for SOFT parsing
+    IO_WORKERS = int(os.getenv("IO_WORKERS", "32"))
+    CPU_WORKERS = int(os.getenv("CPU_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+    # Websocket progress: messages kept per client for resume, per-connection queue bound
+    PROGRESS_HISTORY_SIZE = int(os.getenv("PROGRESS_HISTORY_SIZE", "500"))
+    PROGRESS_QUEUE_SIZE = int(os.getenv("PROGRESS_QUEUE_SIZE", "100"))
+    PROGRESS_RETENTION_SECONDS = float(os.getenv("PROGRESS_RETENTION_SECONDS", "600"))
+
+    # Append-only log of generated triples; empty keeps the store in memory only
+    TRIPLE_STORE_DIR = os.getenv("TRIPLE_STORE_DIR", "./triple_store")
+    # Log size after which the store is snapshotted and the log emptied (0: never)
+    TRIPLE_STORE_COMPACT_BYTES = int(os.getenv("TRIPLE_STORE_COMPACT_BYTES", str(64 * 1024 ** 2)))
+
+    # Cache for LLM completions, E-utilities responses, GSM tables and column mappings:
+    # "sqlite" (one file shared by every worker on the host), "memory" (per process) or "none"
+    CACHE_BACKEND = os.getenv("CACHE_BACKEND", "sqlite").lower()
+    CACHE_PATH = os.getenv("CACHE_PATH", "./cache/cache.sqlite3")
+    CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "100000"))
+    # Size cap of the sqlite file's values (pickled GSM tables can be large); one value may use 1/8 of it
+    CACHE_MAX_BYTES = int(os.getenv("CACHE_MAX_BYTES", str(1024 ** 3)))
+    # Deterministic (temperature 0) LLM completions: kept this long, or not at all with LLM_CACHE=false
+    LLM_CACHE = os.getenv("LLM_CACHE", "true").lower() in ("1", "true", "yes")
+    LLM_CACHE_TTL_SECONDS = float(os.getenv("LLM_CACHE_TTL_SECONDS", str(7 * 86400)))
+    # E-utilities records change upstream; other entries are keyed on the model or file they came from
+    EUTILS_CACHE_TTL_SECONDS = float(os.getenv("EUTILS_CACHE_TTL_SECONDS", "86400"))
+
+    # Upper bound on the GSM metadata summary sent with each aspect prompt
+    METADATA_TOKEN_BUDGET = int(os.getenv("METADATA_TOKEN_BUDGET", "6000"))
 
     AI_PROVIDER = os.getenv("AI_PROVIDER", "openai").lower()
 
@@ -18,5 +68,11 @@ class Config:
     GEMINI_MODEL = os.getenv("GEMINI_MODEL", "models/gemini-2.0-flash")
     GEMINI_TEMPERATURE = float(os.getenv("GEMINI_TEMPERATURE", "0.0"))
     GEMINI_MAX_TOKENS = int(os.getenv("GEMINI_MAX_TOKENS", "4096"))
+    # Configured GenerativeModel objects kept per distinct system instruction
+    GEMINI_MODEL_CACHE_SIZE = int(os.getenv("GEMINI_MODEL_CACHE_SIZE", "32"))
+    # Explicit context caching of system instructions that repeat and are at least this long
+    GEMINI_CONTEXT_CACHE = os.getenv("GEMINI_CONTEXT_CACHE", "false").lower() in ("1", "true", "yes")
+    GEMINI_CONTEXT_CACHE_MIN_TOKENS = int(os.getenv("GEMINI_CONTEXT_CACHE_MIN_TOKENS", "4096"))
+    GEMINI_CONTEXT_CACHE_TTL_SECONDS = int(os.getenv("GEMINI_CONTEXT_CACHE_TTL_SECONDS", "3600"))
 # Create a config instance
 config = Config()
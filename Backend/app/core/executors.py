@@ -0,0 +1,93 @@
+import time
+import asyncio
+import threading
+import functools
+import contextvars
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from typing import Callable, Optional
+from app.core.config import config
+from app.utils.metrics import REGISTRY
+
+EXECUTOR_WORKERS = REGISTRY.gauge(
+    "executor_workers", "Configured workers per executor pool", ("pool",))
+EXECUTOR_TASKS_IN_FLIGHT = REGISTRY.gauge(
+    "executor_tasks_in_flight", "Tasks submitted to an executor pool and not finished", ("pool",))
+EXECUTOR_QUEUE_WAIT = REGISTRY.histogram(
+    "executor_queue_wait_seconds", "Time a task waited for a free worker", ("pool",))
+EXECUTOR_TASK_DURATION = REGISTRY.histogram(
+    "executor_task_duration_seconds", "Time a task ran on a worker", ("pool",))
+
+IO_POOL = "io"
+CPU_POOL = "cpu"
+# The server process already runs threads (I/O pool, to_thread), and forking a
+# threaded process can deadlock the child on a lock held at fork time
+CPU_START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+_lock = threading.Lock()
+_io_executor: Optional[ThreadPoolExecutor] = None
+_cpu_executor: Optional[ProcessPoolExecutor] = None
+
+
+def io_executor() -> ThreadPoolExecutor:
+    """Thread pool for blocking network work (GEO, E-utilities, MedCAT, LLM calls)."""
+    global _io_executor
+    with _lock:
+        if _io_executor is None:
+            _io_executor = ThreadPoolExecutor(max_workers=config.IO_WORKERS, thread_name_prefix="io")
+            EXECUTOR_WORKERS.set(config.IO_WORKERS, pool=IO_POOL)
+        return _io_executor
+
+
+def cpu_executor() -> ProcessPoolExecutor:
+    """Process pool for CPU-heavy work (SOFT parsing, DataFrame processing)."""
+    global _cpu_executor
+    with _lock:
+        if _cpu_executor is None:
+            _cpu_executor = ProcessPoolExecutor(max_workers=config.CPU_WORKERS,
+                                                mp_context=multiprocessing.get_context(CPU_START_METHOD))
+            EXECUTOR_WORKERS.set(config.CPU_WORKERS, pool=CPU_POOL)
+        return _cpu_executor
+
+
+def _timed_call(fn: Callable):
+    # Runs on the worker; wall clock so the start time is comparable across processes
+    return time.time(), fn()
+
+
+async def _run(pool: str, executor, call: Callable):
+    loop = asyncio.get_running_loop()
+    submitted = time.time()
+    EXECUTOR_TASKS_IN_FLIGHT.inc(pool=pool)
+    try:
+        started, result = await loop.run_in_executor(executor, functools.partial(_timed_call, call))
+    finally:
+        EXECUTOR_TASKS_IN_FLIGHT.dec(pool=pool)
+    EXECUTOR_QUEUE_WAIT.observe(max(0.0, started - submitted), pool=pool)
+    EXECUTOR_TASK_DURATION.observe(max(0.0, time.time() - started), pool=pool)
+    return result
+
+
+async def run_io(fn: Callable, *args, **kwargs):
+    """Run a blocking call on the I/O pool, keeping context vars (job metrics) intact."""
+    context = contextvars.copy_context()
+    return await _run(IO_POOL, io_executor(), functools.partial(context.run, fn, *args, **kwargs))
+
+
+async def run_cpu(fn: Callable, *args, **kwargs):
+    """
+    Run a CPU-bound call in the process pool.
+
+    `fn`, its arguments and its result must be picklable, so return small
+    results (a slice of a table, not a whole GSE object).
+    """
+    return await _run(CPU_POOL, cpu_executor(), functools.partial(fn, *args, **kwargs))
+
+
+def shutdown_executors(wait: bool = True):
+    global _io_executor, _cpu_executor
+    with _lock:
+        executors, _io_executor, _cpu_executor = (_io_executor, _cpu_executor), None, None
+    for executor in executors:
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
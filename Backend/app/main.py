@@ -1,12 +1,31 @@
+import asyncio
+import contextlib
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.routes import router  # Import the router from routes.py
+from app.utils.metrics import MetricsMiddleware, monitor_event_loop_lag
+from app.core.executors import shutdown_executors
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Event loop lag shows up on /metrics; blocking work on the loop makes it spike
+    lag_monitor = asyncio.create_task(monitor_event_loop_lag())
+    yield
+    lag_monitor.cancel()
+    with contextlib.suppress(asyncio.CancelledError):
+        await lag_monitor
+    shutdown_executors()
+
 
 app = FastAPI(
     title="FastAPI App",
     description="A simple FastAPI service",
-    version="1.0"
+    version="1.0",
+    lifespan=lifespan
 )
 
 # Allow CORS for frontend on localhost
@@ -18,6 +37,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Request latency per route, served on /metrics
+app.add_middleware(MetricsMiddleware)
+
 # Include the routes
 app.include_router(router)
 
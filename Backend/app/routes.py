@@ -1,54 +1,199 @@
-from fastapi import APIRouter, WebSocket, Query, WebSocketDisconnect
+from fastapi import APIRouter, WebSocket, Query, WebSocketDisconnect, Request
+from fastapi import Response, Path, HTTPException
+from fastapi.responses import StreamingResponse
+from app.utils.streaming import DuplexStreamingResponse, progress_event, format_event
+from app.utils.metrics import REGISTRY, CONTENT_TYPE, PIPELINE_JOBS_IN_PROGRESS, PIPELINE_JOBS
 from app.controllers import process_gse_pipeline  # assumed to be a sync function
-from app.controllers import convert_fol_string_to_metta, get_gsm_data, gsm_to_metta 
+from app.controllers import convert_fol_string_to_metta, get_gsm_data, gsm_to_metta_async
+from app.controllers import stream_fol_to_metta
+from app.core.executors import run_io, run_cpu
+from app.core.config import config
+from app.batch import run_gse_batch
+from app.utils.progress import progress_bus, format_frames, Subscriber, SlowConsumer
+from app.services.triple_query import parse_pattern, run_query
 from fastapi import Body
+from typing import List, Optional
 import asyncio
+import contextlib
+import logging
+import os
+import uuid
 import json
 
 router = APIRouter()
-connections = {}
+logger = logging.getLogger(__name__)
+
+
+async def _send_progress(websocket: WebSocket, subscriber: Subscriber, envelope: bool, max_frame: int):
+    try:
+        while True:
+            seq, message = await subscriber.get()
+            for frame in format_frames(seq, message, envelope, max_frame):
+                await websocket.send_text(frame)
+    except SlowConsumer as e:
+        # 1013 "try again later"; the client reconnects with ?offset= to catch up
+        with contextlib.suppress(WebSocketDisconnect, RuntimeError):
+            await websocket.close(code=1013, reason=str(e))
+    except (WebSocketDisconnect, RuntimeError) as e:
+        # The client went away between frames; the receive loop ends the connection
+        logger.debug(f"Progress websocket closed while sending: {e!r}")
+    except Exception:
+        logger.exception("Sending progress over the websocket failed")
+
 
 @router.websocket("/ws/{client_id}")
-async def websocket_endpoint(websocket: WebSocket, client_id: str):
+async def websocket_endpoint(websocket: WebSocket, client_id: str,
+                             offset: Optional[int] = Query(None, ge=0),
+                             envelope: bool = Query(False),
+                             max_frame: int = Query(0, ge=0)):
+    # permessage-deflate is negotiated by uvicorn, so large JSON payloads go out compressed
     await websocket.accept()
-    connections[client_id] = websocket
+    subscriber = progress_bus.subscribe(client_id, offset)
+    sender = asyncio.create_task(_send_progress(websocket, subscriber, envelope, max_frame))
     try:
         while True:
             await websocket.receive_text()  # keep connection open
-    except WebSocketDisconnect:
-        connections.pop(client_id, None)
+    except (WebSocketDisconnect, RuntimeError):
+        # RuntimeError: the sender already closed the socket (slow consumer)
+        pass
+    finally:
+        sender.cancel()
+        # Collect the sender so its outcome is never left unretrieved
+        with contextlib.suppress(asyncio.CancelledError):
+            await sender
+        progress_bus.unsubscribe(client_id, subscriber)
+
+async def _run_tracked_pipeline(gse_id: str, send_progress):
+    PIPELINE_JOBS_IN_PROGRESS.inc()
+    status = "error"
+    try:
+        result = await run_io(process_gse_pipeline, gse_id, send_progress=send_progress)
+        status = "ok"
+        return result
+    finally:
+        PIPELINE_JOBS_IN_PROGRESS.dec()
+        PIPELINE_JOBS.inc(status=status)
 
 @router.post("/process")
 async def run_pipeline(client_id: str = Query(...), gse_id: str = Query(...)):
     if not gse_id:
         return {"result": "GSE ID is required"}
 
+    # Non-blocking and thread-safe; slow websocket clients never stall the pipeline thread
+    send_progress = progress_bus.publisher(client_id)
+    await _run_tracked_pipeline(gse_id, send_progress)
+    return {"status": "ok"}
+
+@router.post("/process/stream")
+async def run_pipeline_stream(gse_id: str = Query(...), format: str = Query("sse", pattern="^(sse|ndjson)$")):
+    # Progress and partial results in the response itself: no websocket or client_id needed
     loop = asyncio.get_running_loop()
+    messages: asyncio.Queue = asyncio.Queue()
+    finished = object()
 
-    # async wrapper to send progress
-    async def send_progress(message: str):
-        if client_id in connections:
-            await connections[client_id].send_text(message)
+    def send_progress(message: str):
+        loop.call_soon_threadsafe(messages.put_nowait, message)
 
-    # sync-safe wrapper
-    def progress_wrapper(message: str):
-        asyncio.run_coroutine_threadsafe(send_progress(message), loop)
+    def job_done(job: asyncio.Future):
+        # The job outlives a disconnected client; retrieve its exception so it is not reported as lost
+        if not job.cancelled():
+            job.exception()
+        # Progress is queued before the job completes, so `finished` always comes last
+        messages.put_nowait(finished)
 
-    await asyncio.to_thread(process_gse_pipeline, gse_id, send_progress=progress_wrapper)
-    return {"status": "ok"}
+    async def events():
+        job = asyncio.ensure_future(_run_tracked_pipeline(gse_id, send_progress))
+        job.add_done_callback(job_done)
+        while True:
+            message = await messages.get()
+            if message is finished:
+                break
+            event, data = progress_event(message)
+            yield format_event(event, data, format)
+        try:
+            result = job.result()
+        except Exception as e:
+            yield format_event("error", {"message": str(e)}, format)
+            return
+        if isinstance(result, dict):
+            yield format_event("done", {"status": "ok"}, format)
+        else:
+            # The pipeline reports early failures as a list of messages
+            yield format_event("error", {"message": "; ".join(map(str, result))}, format)
+
+    media_type = "text/event-stream" if format == "sse" else "application/x-ndjson"
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    return StreamingResponse(events(), media_type=media_type, headers=headers)
+
+# Running batches, kept referenced until they finish
+batch_jobs = {}
+
+@router.post("/process/batch")
+async def run_pipeline_batch(gse_ids: List[str] = Body(..., embed=True, min_length=1),
+                             concurrency: int = Body(4, embed=True, ge=1, le=32),
+                             client_id: Optional[str] = Body(None, embed=True)):
+    # Long-running: returns at once, progress via /ws/{client_id} and the status endpoint
+    batch_id = uuid.uuid4().hex[:12]
+    output_dir = os.path.join(config.BATCH_OUTPUT_DIR, batch_id)
+    send_progress = progress_bus.publisher(client_id) if client_id else None
+    job = asyncio.ensure_future(run_io(run_gse_batch, gse_ids, output_dir, concurrency, send_progress))
+    batch_jobs[batch_id] = job
+    job.add_done_callback(lambda _: batch_jobs.pop(batch_id, None))
+    return {"batch_id": batch_id, "status_url": f"/process/batch/{batch_id}"}
+
+@router.get("/process/batch/{batch_id}")
+async def get_batch_status(batch_id: str = Path(..., pattern="^[0-9a-f]{12}$")):
+    status_path = os.path.join(config.BATCH_OUTPUT_DIR, batch_id, "status.json")
+    try:
+        with open(status_path, "r", encoding="utf-8") as f:
+            status = json.load(f)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Unknown batch")
+    status["running"] = batch_id in batch_jobs
+    return status
+
+@router.get("/query")
+async def query_triples(pattern: str = Query(..., max_length=2000),
+                        offset: int = Query(0, ge=0), limit: int = Query(100, ge=1, le=1000),
+                        format: str = Query("ndjson", pattern="^(sse|ndjson)$")):
+    # e.g. pattern=(regulates $x TP53) (inhibits $y $x); one "result" event per solution, then "page"
+    try:
+        clauses = parse_pattern(pattern)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    def events():
+        # Sync generator: Starlette iterates it in the threadpool, off the event loop
+        for event, data in run_query(clauses, offset, limit):
+            yield format_event(event, data, format)
+
+    media_type = "text/event-stream" if format == "sse" else "application/x-ndjson"
+    return StreamingResponse(events(), media_type=media_type)
+
+@router.get("/metrics")
+async def metrics():
+    # Prometheus text exposition format
+    return Response(REGISTRY.render(), media_type=CONTENT_TYPE)
 
 @router.post("/convert_fol_to_metta")
 async def convert_fol_to_metta(predicates_raw_string: str = Body(..., media_type="text/plain")):
     return convert_fol_string_to_metta(predicates_raw_string)
 
+@router.post("/convert_fol_to_metta/stream")
+async def convert_fol_to_metta_stream(request: Request, format: str = Query("ndjson", pattern="^(ndjson|text)$")):
+    # Body is consumed incrementally and MeTTa lines are written out as they are converted
+    media_type = "application/x-ndjson" if format == "ndjson" else "text/plain"
+    return DuplexStreamingResponse(stream_fol_to_metta(request.stream(), format), media_type=media_type)
+
 
 @router.post("/get_gsm")
 async def get_gsm(gse_id: str = Query(...), gsm_id: str = Query(...)):
-    result= get_gsm_data(gse_id, gsm_id)
+    # SOFT parsing is CPU-bound; keep it off the event loop and out of the GIL
+    result= await run_cpu(get_gsm_data, gse_id, gsm_id)
     return result
 
 @router.post("/gsm_to_metta")
 async def generate_metta_from_gsm(gse_id: str = Query(...), gsm_id: str = Query(...)):
     # Process the GSM data to generate MeTTa code
-    result= gsm_to_metta(gse_id, gsm_id)
+    result= await gsm_to_metta_async(gse_id, gsm_id)
     return result
@@ -1,19 +1,33 @@
-import requests
 from app.core.config import config
-from typing import Optional, Union, Dict
+from typing import Optional, Union, Dict, List
 import re
-import tiktoken
+import logging
 from io import BytesIO
-from bs4 import BeautifulSoup
 from app.utils.ai_provider import chunk_text_by_provider
+from app.utils.instrumentation import span
+from app.utils.http import http_session
+from app.utils.cache import get_cache, cache_key
 
 NCBI_API_KEY = config.NCBI_API_KEY
+logger = logging.getLogger(__name__)
+
+
+def _cached_eutils(key: str, fetch, store=lambda value: value is not None):
+    """
+    E-utilities answer shared through the cache. Only found records are
+    kept (`store`); misses and errors are asked again next time, since a
+    series can be linked to its paper after it is published.
+    """
+    return get_cache("eutils").get_or_compute(key, fetch, config.EUTILS_CACHE_TTL_SECONDS, store)
 
-tokenizer = tiktoken.encoding_for_model("gpt-3.5-turbo")
 
 def fetch_pmc_id(pmid, api_key):
     """Check if a given PubMed ID (PMID) has a corresponding PMC ID."""
-    base_url = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/elink.fcgi"
+    return _cached_eutils(cache_key("pmc_id", str(pmid)), lambda: _fetch_pmc_id(pmid, api_key))
+
+@span("eutils.elink", kind="external")
+def _fetch_pmc_id(pmid, api_key):
+    base_url = f"{config.EUTILS_BASE_URL}elink.fcgi"
     params = {
         "dbfrom": "pubmed",
         "db": "pmc",
@@ -21,7 +35,7 @@ def fetch_pmc_id(pmid, api_key):
         "retmode": "json",
         "api_key": api_key
     }
-    response = requests.get(base_url, params=params)
+    response = http_session().get(base_url, params=params)
     
     if response.status_code == 200:
         data = response.json()
@@ -68,6 +82,7 @@ def chunk_sections(sections, max_length=1000):
                     chunks.append(p_text)
     return chunks
 
+@span("europepmc.fulltext", kind="external")
 def fetch_pmc_fulltext(pmc_id):
     url = f"https://www.ebi.ac.uk/europepmc/webservices/rest/PMC{pmc_id}/fullTextXML"
     headers = {
@@ -75,8 +90,9 @@ def fetch_pmc_fulltext(pmc_id):
     }
 
     try:
-        response = requests.get(url, headers=headers)
+        response = http_session().get(url, headers=headers)
         response.raise_for_status()
+        from bs4 import BeautifulSoup
         soup = BeautifulSoup(response.text, 'xml')
         return soup
 
@@ -107,7 +123,12 @@ def fetch_pmc_fulltext(pmc_id):
 
 def fetch_abstract(pmid, api_key: Optional[str] = NCBI_API_KEY):
     """Retrieve only the abstract of a PubMed article."""
-    base_url = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/efetch.fcgi"
+    return _cached_eutils(cache_key("abstract", str(pmid)), lambda: _fetch_abstract(pmid, api_key),
+                          store=lambda text: not text.startswith("Error:"))
+
+@span("eutils.efetch_abstract", kind="external")
+def _fetch_abstract(pmid, api_key: Optional[str] = NCBI_API_KEY):
+    base_url = f"{config.EUTILS_BASE_URL}efetch.fcgi"
     params = {
         "db": "pubmed",
         "id": pmid,
@@ -115,18 +136,81 @@ def fetch_abstract(pmid, api_key: Optional[str] = NCBI_API_KEY):
         "rettype": "medline",
         "api_key": api_key
     }
-    response = requests.get(base_url, params=params)
+    response = http_session().get(base_url, params=params)
 
     if response.status_code == 200:
-        text_data = response.text
-        abstract_match = re.search(r"AB  - (.+)", text_data, re.DOTALL)
-        if abstract_match:
-            return abstract_match.group(1).strip()  # Extract abstract
-        return "No abstract available."
+        return parse_medline_abstract(response.text)
     else:
         return f"Error: {response.status_code}, {response.text}"
 
 
+def parse_medline_abstract(text_data: str) -> str:
+    """Abstract of one MEDLINE-format record."""
+    abstract_match = re.search(r"AB  - (.+)", text_data, re.DOTALL)
+    if abstract_match:
+        return abstract_match.group(1).strip()  # Extract abstract
+    return "No abstract available."
+
+
+def _batches(items: List[str], size: int):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def fetch_abstracts(pmids: List[str], api_key: Optional[str] = NCBI_API_KEY,
+                    batch_size: Optional[int] = None,
+                    errors: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+    """
+    Batched `fetch_abstract`: one efetch call per `batch_size` PubMed ids
+    that are not cached yet.
+
+    Returns {pmid: abstract}; ids whose batch failed are left out so callers
+    can fall back to `fetch_abstract`, and get the error in `errors`.
+    """
+    cache = get_cache("eutils")
+    abstracts, missing = {}, []
+    for pmid in dict.fromkeys(str(p) for p in pmids):
+        abstract = cache.get(cache_key("abstract", pmid))
+        if abstract is None:
+            missing.append(pmid)
+        else:
+            abstracts[pmid] = abstract
+    if missing:
+        fetched = _fetch_abstracts(missing, api_key, batch_size, errors)
+        for pmid, abstract in fetched.items():
+            cache.set(cache_key("abstract", pmid), abstract, config.EUTILS_CACHE_TTL_SECONDS)
+        abstracts.update(fetched)
+    return abstracts
+
+
+@span("eutils.efetch_abstracts", kind="external")
+def _fetch_abstracts(pmids: List[str], api_key: Optional[str], batch_size: Optional[int],
+                     errors: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+    abstracts = {}
+    for batch in _batches(pmids, batch_size or config.EUTILS_BATCH_SIZE):
+        params = {
+            "db": "pubmed",
+            "id": ",".join(batch),
+            "retmode": "text",
+            "rettype": "medline",
+            "api_key": api_key
+        }
+        try:
+            response = http_session().get(f"{config.EUTILS_BASE_URL}efetch.fcgi", params=params, timeout=60)
+            response.raise_for_status()
+        except Exception as e:
+            logger.warning(f"Error fetching abstracts for {len(batch)} PubMed ids: {e}")
+            if errors is not None:
+                errors.update((pmid, f"efetch failed: {e}") for pmid in batch)
+            continue
+        # Records are separated by blank lines and each starts with its PMID
+        for record in re.split(r"(?m)^(?=PMID- )", response.text):
+            pmid_match = re.match(r"PMID- (\d+)", record)
+            if pmid_match:
+                abstracts[pmid_match.group(1)] = parse_medline_abstract(record)
+    return abstracts
+
+
 def fetch_pubmed_article(pmid, api_key: Optional[str] = NCBI_API_KEY):
     """Check PMC for full-text availability, otherwise return the abstract."""
     pmc_id = fetch_pmc_id(pmid, api_key)
@@ -146,8 +230,13 @@ def fetch_gse_summary(gse_id: str, api_key: Optional[str] = NCBI_API_KEY) -> Uni
         
     if not re.match(r'^GSE\d+$', gse_id):
         return {"error": "invalid_id", "message": f"Invalid GSE ID format: {gse_id}"}
-    
-    base_url = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/"
+
+    return _cached_eutils(cache_key("gse_summary", gse_id), lambda: _fetch_gse_summary(gse_id, api_key),
+                          store=lambda summary: "error" not in summary)
+
+@span("eutils.gse_summary", kind="external")
+def _fetch_gse_summary(gse_id: str, api_key: Optional[str]):
+    base_url = config.EUTILS_BASE_URL
     headers = {"User-Agent": "GSE_Fetcher/1.0"}
     
     search_params = {
@@ -157,7 +246,7 @@ def fetch_gse_summary(gse_id: str, api_key: Optional[str] = NCBI_API_KEY) -> Uni
             "retmode": "json"
         }
         
-    search_response = requests.get(
+    search_response = http_session().get(
             f"{base_url}esearch.fcgi",
             params=search_params,
             headers=headers,
@@ -178,7 +267,7 @@ def fetch_gse_summary(gse_id: str, api_key: Optional[str] = NCBI_API_KEY) -> Uni
                 "retmode": "json",
                 "api_key": api_key
             }
-    summary_response = requests.get(
+    summary_response = http_session().get(
                 f"{base_url}esummary.fcgi",
                 params=summary_params,
                 headers=headers,
@@ -199,7 +288,11 @@ def extract_pubmed_id(gse_id: str, api_key: Optional[str] = NCBI_API_KEY) -> Opt
     Returns:
         Optional[str]: The PubMed ID if found, else None.
     """
-    base_url = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/"
+    return _cached_eutils(cache_key("pubmed_id", gse_id), lambda: _extract_pubmed_id(gse_id, api_key))
+
+@span("eutils.extract_pubmed_id", kind="external")
+def _extract_pubmed_id(gse_id: str, api_key: Optional[str]) -> Optional[str]:
+    base_url = config.EUTILS_BASE_URL
     headers = {"User-Agent": "GSE_PubMed_Fetcher/1.0"}
 
     # Search for the UID
@@ -210,7 +303,7 @@ def extract_pubmed_id(gse_id: str, api_key: Optional[str] = NCBI_API_KEY) -> Opt
         "api_key": api_key
     }
     try:
-        search_res = requests.get(f"{base_url}esearch.fcgi", params=search_params, headers=headers, timeout=15)
+        search_res = http_session().get(f"{base_url}esearch.fcgi", params=search_params, headers=headers, timeout=15)
         search_res.raise_for_status()
         id_list = search_res.json().get("esearchresult", {}).get("idlist", [])
         if not id_list:
@@ -225,7 +318,7 @@ def extract_pubmed_id(gse_id: str, api_key: Optional[str] = NCBI_API_KEY) -> Opt
             "retmode": "json",
             "api_key": api_key
         }
-        summary_res = requests.get(f"{base_url}esummary.fcgi", params=summary_params, headers=headers, timeout=15)
+        summary_res = http_session().get(f"{base_url}esummary.fcgi", params=summary_params, headers=headers, timeout=15)
         summary_res.raise_for_status()
         result = summary_res.json().get("result", {}).get(uid, {})
         pubmed_ids = result.get("pubmedids", [])
@@ -234,6 +327,71 @@ def extract_pubmed_id(gse_id: str, api_key: Optional[str] = NCBI_API_KEY) -> Opt
         print(f"Error extracting PubMed ID from GSE {gse_id}: {e}")
         return None
 
+def extract_pubmed_ids(gse_ids: List[str], api_key: Optional[str] = NCBI_API_KEY,
+                       batch_size: Optional[int] = None,
+                       errors: Optional[Dict[str, str]] = None) -> Dict[str, Optional[str]]:
+    """
+    Batched `extract_pubmed_id`: one esearch and one esummary call per
+    `batch_size` accessions not cached yet, instead of two calls per series.
+
+    Returns {gse_id: pubmed_id or None}; accessions whose batch failed also
+    get the error in `errors`, to tell them apart from series without a paper.
+    """
+    cache = get_cache("eutils")
+    pubmed_ids = {gse_id: cache.get(cache_key("pubmed_id", gse_id)) for gse_id in gse_ids}
+    missing = [gse_id for gse_id, pubmed_id in pubmed_ids.items() if pubmed_id is None]
+    if missing:
+        found = _extract_pubmed_ids(missing, api_key, batch_size, errors)
+        for gse_id, pubmed_id in found.items():
+            if pubmed_id is not None:
+                cache.set(cache_key("pubmed_id", gse_id), pubmed_id, config.EUTILS_CACHE_TTL_SECONDS)
+        pubmed_ids.update(found)
+    return pubmed_ids
+
+
+@span("eutils.batch_pubmed_ids", kind="external")
+def _extract_pubmed_ids(gse_ids: List[str], api_key: Optional[str], batch_size: Optional[int],
+                        errors: Optional[Dict[str, str]] = None) -> Dict[str, Optional[str]]:
+    base_url = config.EUTILS_BASE_URL
+    headers = {"User-Agent": "GSE_PubMed_Fetcher/1.0"}
+    pubmed_ids = {gse_id: None for gse_id in gse_ids}
+
+    for batch in _batches(gse_ids, batch_size or config.EUTILS_BATCH_SIZE):
+        search_params = {
+            "db": "gds",
+            "term": " OR ".join(f"{gse_id}[Accession]" for gse_id in batch),
+            # Accession searches can also hit related GDS records
+            "retmax": len(batch) * 4,
+            "retmode": "json",
+            "api_key": api_key
+        }
+        try:
+            search_res = http_session().get(f"{base_url}esearch.fcgi", params=search_params, headers=headers, timeout=30)
+            search_res.raise_for_status()
+            uids = search_res.json().get("esearchresult", {}).get("idlist", [])
+            if not uids:
+                continue
+            summary_params = {
+                "db": "gds",
+                "id": ",".join(uids),
+                "retmode": "json",
+                "api_key": api_key
+            }
+            summary_res = http_session().get(f"{base_url}esummary.fcgi", params=summary_params, headers=headers, timeout=30)
+            summary_res.raise_for_status()
+            summaries = summary_res.json().get("result", {})
+        except Exception as e:
+            logger.warning(f"Error extracting PubMed IDs for {len(batch)} series: {e}")
+            if errors is not None:
+                errors.update((gse_id, f"PubMed id lookup failed: {e}") for gse_id in batch)
+            continue
+        for uid in summaries.get("uids", []):
+            record = summaries.get(uid, {})
+            accession = record.get("accession")
+            if accession in pubmed_ids and record.get("pubmedids"):
+                pubmed_ids[accession] = record["pubmedids"][0]
+    return pubmed_ids
+
 def clean_abstract_text(text):
     # Remove metadata lines like FAU, AU, AD, etc.
     text = re.sub(r"^(FAU|AU|AD|LA|SI)\s+-.*$", "", text, flags=re.MULTILINE)
@@ -1,22 +1,139 @@
-import requests
 import re
+import time
+import hashlib
+import logging
+import threading
+from typing import Dict, Optional
 from app.core.config import config
 import json
 from app.utils.openai_utils import openai_generate
 from app.core.prompts import FOL_generation_prompt 
+from app.utils.instrumentation import span
+from app.utils.http import http_session
+from app.utils.cache import get_cache, cache_key
+from app.services.medcat_backend import local_medcat, use_local_medcat
 
+logger = logging.getLogger(__name__)
 
-def annotate_with_medcat(text, medcat_url= config.MEDCAT_URL):
+
+def annotate_with_medcat(text, medcat_url=None):
     """
-    Sends text to the MedCAT API and returns the JSON response.
+    Sends text to the MedCAT API and returns the JSON response; with
+    MEDCAT_BACKEND=local the in-process model answers in the same shape.
     """
+    if medcat_url is None and use_local_medcat():
+        return local_medcat().annotate(text)
+    return _post_medcat(text, medcat_url or config.MEDCAT_URL)
+
+@span("medcat.annotate", kind="external")
+def _post_medcat(text, medcat_url):
     payload = {"content": {"text": text}}
     headers = {"Content-Type": "application/json"}
 
-    response = requests.post(medcat_url, json=payload, headers=headers)
+    response = http_session().post(medcat_url, json=payload, headers=headers)
+    response.raise_for_status()
+    return response.json()
+
+def medcat_bulk_url():
+    if config.MEDCAT_BULK_URL:
+        return config.MEDCAT_BULK_URL
+    url = config.MEDCAT_URL.rstrip("/")
+    if url.endswith("/api/process"):
+        return url + "_bulk"
+    return url + "/api/process_bulk"
+
+def annotate_with_medcat_bulk(texts, medcat_url=None):
+    """
+    Annotates several texts with one MedCAT `/api/process_bulk` call, or
+    across worker processes with MEDCAT_BACKEND=local.
+
+    Returns one response per text, shaped like `annotate_with_medcat`'s.
+    """
+    if medcat_url is None and use_local_medcat():
+        return local_medcat().annotate_bulk(texts)
+    return _post_medcat_bulk(texts, medcat_url)
+
+@span("medcat.annotate_bulk", kind="external")
+def _post_medcat_bulk(texts, medcat_url=None):
+    payload = {"content": [{"text": text} for text in texts]}
+    headers = {"Content-Type": "application/json"}
+
+    response = http_session().post(medcat_url or medcat_bulk_url(), json=payload, headers=headers)
+    response.raise_for_status()
+    results = response.json().get("result", [])
+    if len(results) != len(texts):
+        raise ValueError(f"MedCAT bulk returned {len(results)} results for {len(texts)} texts")
+    return [{"result": result} for result in results]
+
+def medcat_info_url():
+    if config.MEDCAT_INFO_URL:
+        return config.MEDCAT_INFO_URL
+    url = config.MEDCAT_URL.rstrip("/")
+    if url.endswith("/api/process"):
+        return url[:-len("process")] + "info"
+    return url + "/api/info"
+
+@span("medcat.info", kind="external")
+def _fetch_medcat_info(url):
+    response = http_session().get(url, timeout=10)
     response.raise_for_status()
     return response.json()
 
+_medcat_lock = threading.Lock()
+_medcat_versions: Dict[str, tuple] = {}
+
+def medcat_model_version() -> Optional[str]:
+    """
+    Id of the model pack the MedCAT service has loaded, from its `/api/info`
+    (the model card's "Model ID", else a hash of the whole answer). Re-read
+    every MEDCAT_INFO_TTL_SECONDS; None while the service does not answer,
+    which is remembered for MEDCAT_INFO_RETRY_SECONDS so chunks do not each
+    wait for it.
+    """
+    if use_local_medcat():
+        return local_medcat().model_version()
+    url = medcat_info_url()
+    now = time.monotonic()
+    with _medcat_lock:
+        known = _medcat_versions.get(url)
+        if known and known[0] > now:
+            return known[1]
+    try:
+        info = _fetch_medcat_info(url)
+    except Exception as e:
+        logger.warning(f"MedCAT /api/info unavailable, annotations are not cached: {e}")
+        with _medcat_lock:
+            _medcat_versions[url] = (now + config.MEDCAT_INFO_RETRY_SECONDS, None)
+        return None
+    version = (info.get("model_card") or {}).get("Model ID") or cache_key(info)
+    with _medcat_lock:
+        _medcat_versions[url] = (now + config.MEDCAT_INFO_TTL_SECONDS, version)
+    return version
+
+def _annotation_key(text) -> Optional[str]:
+    if config.CACHE_BACKEND == "none":
+        return None
+    version = medcat_model_version()
+    if version is None:
+        return None
+    return cache_key(version, hashlib.sha256(text.encode("utf-8")).hexdigest())
+
+def cached_annotation(text) -> Optional[Dict]:
+    """The stored `parse_medcat_response` form of `text`, if this model pack annotated it before."""
+    key = _annotation_key(text)
+    return get_cache("medcat").get(key) if key else None
+
+def annotate_cached(text, annotate=annotate_with_medcat) -> Dict:
+    """
+    `parse_medcat_response(annotate(text))`, served from the annotation cache
+    when possible. Annotation is deterministic for a model pack, so entries
+    are keyed on the text hash and the model version and never expire.
+    """
+    key = _annotation_key(text)
+    if key is None:
+        return parse_medcat_response(annotate(text))
+    return get_cache("medcat").get_or_compute(key, lambda: parse_medcat_response(annotate(text)))
+
 def parse_medcat_response(medcat_json):
     """
     Parses MedCAT's response JSON to keep only the required fields.
@@ -124,24 +241,22 @@ def parse_triples_to_predicates(triples_json):
     return predicate_lines
 
 
-def generate_valid_predicates_from_abstract(chunks):
+def iter_valid_predicates_from_abstract(chunks, annotate=annotate_with_medcat):
     """
-    Orchestrates the process of generating valid FOL predicates from a list of abstract chunks.
+    Yields the FOL predicates of each abstract chunk as soon as it is parsed.
 
     Args:
-        chunks (list of str): List of text chunks from the abstract.
+        chunks (iterable of str): Text chunks from the abstract; may be a lazy iterator.
+        annotate (callable): chunk -> MedCAT response; batch runs pass pre-fetched bulk results.
 
-    Returns:
-        list: Combined list of FOL predicate strings from all chunks.
+    Yields:
+        dict: {"chunk": <index>, "predicates": [...], "seconds": <time spent on the chunk>},
+        plus "error" when the LLM output could not be parsed (predicates is then empty).
     """
-    all_predicates = []
-
-    for chunk in chunks:
-        # Step 1: Annotate with MedCAT
-        medcat_json = annotate_with_medcat(chunk)
-
-        # Step 2: Parse MedCAT response
-        parsed_response = parse_medcat_response(medcat_json)
+    for index, chunk in enumerate(chunks):
+        start = time.perf_counter()
+        # Step 1-2: Annotate with MedCAT (or reuse a cached annotation) and parse the response
+        parsed_response = annotate_cached(chunk, annotate)
 
         # Step 3: Generate triples (FOL-like) from concepts via LLM
         triples_text = generate_triples_from_concepts(parsed_response, FOL_generation_prompt)
@@ -153,11 +268,26 @@ def generate_valid_predicates_from_abstract(chunks):
         except json.JSONDecodeError as e:
             print(f"[Chunk Error] JSON parsing failed: {e}")
             print("Raw output:", triples_text)
+            yield {"chunk": index, "predicates": [], "seconds": round(time.perf_counter() - start, 4),
+                   "error": f"JSON parsing failed: {e}"}
             continue  # Skip this chunk
 
         # Step 5: Convert to predicates
         predicates = parse_triples_to_predicates(triples_json)
-        all_predicates.extend(predicates)
+        yield {"chunk": index, "predicates": predicates, "seconds": round(time.perf_counter() - start, 4)}
 
-    return all_predicates
 
+def generate_valid_predicates_from_abstract(chunks):
+    """
+    Orchestrates the process of generating valid FOL predicates from a list of abstract chunks.
+
+    Args:
+        chunks (list of str): List of text chunks from the abstract.
+
+    Returns:
+        list: Combined list of FOL predicate strings from all chunks.
+    """
+    all_predicates = []
+    for result in iter_valid_predicates_from_abstract(chunks):
+        all_predicates.extend(result["predicates"])
+    return all_predicates
@@ -0,0 +1,204 @@
+import re
+import random
+import hashlib
+import threading
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+Triple = Tuple[str, str, str]
+
+SEPARATORS = re.compile(r"[\s_\-]+")
+NON_WORD = re.compile(r"[^\w]+")
+DIGITS = re.compile(r"\d+")
+_MERSENNE_PRIME = (1 << 61) - 1
+
+
+def normalize_key(term: str) -> str:
+    """Lookup key for exact matching: case-folded, separators and punctuation removed."""
+    return NON_WORD.sub("", SEPARATORS.sub("", term.casefold()))
+
+
+def to_atom(term: str) -> str:
+    """A MeTTa-safe symbol for a display name, e.g. 'TP53 gene' -> 'TP53_gene'."""
+    return SEPARATORS.sub("_", term.strip()).replace("(", "").replace(")", "").replace('"', "")
+
+
+def _digest(text: str) -> int:
+    return int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def shingles(key: str, n: int = 3) -> Set[str]:
+    padded = f"#{key}#"
+    return {padded[i:i + n] for i in range(max(1, len(padded) - n + 1))}
+
+
+def jaccard(a: Set[str], b: Set[str]) -> float:
+    return len(a & b) / len(a | b) if a or b else 1.0
+
+
+class MinHashLSH:
+    """
+    Locality-sensitive index over character n-gram sets.
+
+    Signatures of `bands * rows` min-hashes are split into bands; keys that
+    share any band bucket are candidates, to be verified by exact Jaccard.
+    """
+
+    def __init__(self, bands: int = 8, rows: int = 4, seed: int = 1):
+        self.bands = bands
+        self.rows = rows
+        rng = random.Random(seed)
+        self._params = [(rng.randrange(1, _MERSENNE_PRIME), rng.randrange(0, _MERSENNE_PRIME))
+                        for _ in range(bands * rows)]
+        self._buckets: Dict[Tuple[int, Tuple[int, ...]], List[str]] = {}
+
+    def signature(self, grams: Set[str]) -> List[int]:
+        hashes = [_digest(gram) for gram in grams]
+        return [min((a * h + b) % _MERSENNE_PRIME for h in hashes) for a, b in self._params]
+
+    def _bands(self, grams: Set[str]):
+        signature = self.signature(grams)
+        for band in range(self.bands):
+            yield band, tuple(signature[band * self.rows:(band + 1) * self.rows])
+
+    def add(self, key: str, grams: Set[str]):
+        for bucket in self._bands(grams):
+            self._buckets.setdefault(bucket, []).append(key)
+
+    def candidates(self, grams: Set[str]) -> Set[str]:
+        found: Set[str] = set()
+        for bucket in self._bands(grams):
+            found.update(self._buckets.get(bucket, ()))
+        return found
+
+
+class EntityIndex:
+    """
+    Maps entity surface forms to one canonical atom.
+
+    1. Concepts from MedCAT annotations (`add_concepts`) map their pretty
+       and detected names to the concept's pretty name, keyed by CUI.
+    2. Exact index: forms that only differ in case, separators or
+       punctuation share a key (`TP53`, `tp-53`, `Tp_53`).
+    3. Near-duplicate index: MinHash LSH over character 3-grams finds forms
+       at least `threshold` Jaccard-similar to a known one
+       (`interleukin_6_receptor` / `interleukin6_receptors`). Keys shorter
+       than `min_fuzzy_length` only match exactly, so TP53 and TP63 stay apart;
+       longer ones must carry the same numbers (BRCA1 / BRCA2, IL-6 / IL-8
+       differ only there) and must not be tied to different CUIs.
+
+    The first form seen for an entity becomes its canonical atom.
+    """
+
+    def __init__(self, threshold: float = 0.8, min_fuzzy_length: int = 6):
+        self.threshold = threshold
+        self.min_fuzzy_length = min_fuzzy_length
+        self._canonical: Dict[str, str] = {}
+        self._cuis: Dict[str, str] = {}
+        self._cui_atoms: Dict[str, str] = {}
+        self._grams: Dict[str, Set[str]] = {}
+        self._lsh = MinHashLSH()
+        self._lock = threading.Lock()
+
+    def add_concepts(self, annotations: Iterable[Dict]):
+        """Seed from `parse_medcat_response(...)["annotations"]`."""
+        with self._lock:
+            for annotation in annotations:
+                cui, pretty_name = annotation.get("cui"), annotation.get("pretty_name")
+                if not cui or not pretty_name:
+                    continue
+                atom = self._cui_atoms.setdefault(cui, to_atom(pretty_name))
+                for name in (pretty_name, annotation.get("detected_name")):
+                    key = normalize_key(name or "")
+                    if key and key not in self._canonical:
+                        self._register(key, atom)
+                        self._cuis[key] = cui
+
+    def canonical(self, term: str, cui: Optional[str] = None) -> str:
+        """Canonical atom for `term` (whose CUI may be known), registering it as a new entity when unknown."""
+        key = normalize_key(term)
+        if not key:
+            return term
+        with self._lock:
+            atom = self._canonical.get(key)
+            if atom is not None:
+                return atom
+            match = self._similar(key, cui)
+            if match is not None:
+                atom = self._canonical[match]
+                cui = cui or self._cuis.get(match)
+            else:
+                atom = to_atom(term)
+            if cui:
+                self._cuis[key] = cui
+            self._register(key, atom)
+            return atom
+
+    def cui(self, term: str) -> Optional[str]:
+        return self._cuis.get(normalize_key(term))
+
+    def _similar(self, key: str, cui: Optional[str] = None) -> Optional[str]:
+        if len(key) < self.min_fuzzy_length:
+            return None
+        grams = shingles(key)
+        numbers = DIGITS.findall(key)
+        best, best_score = None, self.threshold
+        for candidate in self._lsh.candidates(grams):
+            if DIGITS.findall(candidate) != numbers:
+                continue
+            candidate_cui = self._cuis.get(candidate)
+            if cui and candidate_cui and candidate_cui != cui:
+                continue
+            score = jaccard(grams, self._grams[candidate])
+            if score >= best_score:
+                best, best_score = candidate, score
+        return best
+
+    def _register(self, key: str, atom: str):
+        self._canonical[key] = atom
+        if len(key) >= self.min_fuzzy_length:
+            self._grams[key] = shingles(key)
+            self._lsh.add(key, self._grams[key])
+
+    def __len__(self):
+        return len(self._canonical)
+
+
+class TripleDeduplicator:
+    """
+    Normalizes triple entities through an `EntityIndex` and merges repeats
+    with counts, per document (`merge`) and across all documents merged so
+    far (`merged`), so one instance covers a run.
+    """
+
+    def __init__(self, entities: Optional[EntityIndex] = None):
+        self.entities = entities or EntityIndex()
+        self._counts: Dict[Triple, int] = {}
+        self._documents: Dict[Triple, List[str]] = {}
+        self._lock = threading.Lock()
+
+    def normalize(self, triple: Triple, cuis: Optional[Dict[str, str]] = None) -> Triple:
+        """`cuis` maps `normalize_key` of names annotated in the same text to their CUI."""
+        cuis = cuis or {}
+        subject, predicate, obj = triple
+        return (self.entities.canonical(subject, cuis.get(normalize_key(subject))),
+                to_atom(predicate).lower(),
+                self.entities.canonical(obj, cuis.get(normalize_key(obj))))
+
+    def merge(self, triples: Iterable[Triple], document: Optional[str] = None) -> List[Tuple[Triple, int]]:
+        """[(triple, occurrences)] of already normalized triples in first-seen order; adds them to the run totals."""
+        counts: Dict[Triple, int] = {}
+        for triple in triples:
+            counts[triple] = counts.get(triple, 0) + 1
+        with self._lock:
+            for triple, count in counts.items():
+                self._counts[triple] = self._counts.get(triple, 0) + count
+                documents = self._documents.setdefault(triple, [])
+                if document is not None and document not in documents:
+                    documents.append(document)
+        return list(counts.items())
+
+    def merged(self) -> List[Tuple[Triple, int, List[str]]]:
+        """[(triple, occurrences, documents)] over everything merged so far, in first-seen order."""
+        with self._lock:
+            return [(triple, count, list(self._documents[triple])) for triple, count in self._counts.items()]
+
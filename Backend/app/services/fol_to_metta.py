@@ -1,6 +1,21 @@
 import re
+import sys
+import json
+import string
+import codecs
+import argparse
+from typing import Iterable, Iterator, AsyncIterable, AsyncIterator, List, Optional
 from app.utils.checkMettaCode import validate_metta_syntax
 
+# Precompiled patterns shared by the batch and streaming converters
+PREDICATE_PATTERN = re.compile(r'[a-zA-Z_ ]+\([^()]*\)')
+PREDICATE_CHARS = string.ascii_letters + "_ "
+TWO_ARGS_PATTERN = re.compile(r'^([a-zA-Z_][\w]*)\((.+?),\s*(.+)\)$')
+ONE_ARG_PATTERN = re.compile(r'^([a-zA-Z_][\w]*)\((.+)\)$')
+
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
 def convert_predicate_to_metta(predicate_str: str) -> str:
     """
     Converts FOL-like predicates to MeTTa syntax.
@@ -22,13 +37,13 @@ def convert_predicate_to_metta(predicate_str: str) -> str:
     predicate_str = predicate_str.strip()
 
     # Match 2-argument form: predicate(arg1, arg2)
-    match_two_args = re.match(r'^([a-zA-Z_][\w]*)\((.+?),\s*(.+)\)$', predicate_str)
+    match_two_args = TWO_ARGS_PATTERN.match(predicate_str)
     if match_two_args:
         predicate, subject, obj = match_two_args.groups()
         return f"({sanitize(predicate)} {sanitize(subject)} {sanitize(obj)})"
 
     # Match 1-argument form: predicate(arg)
-    match_one_arg = re.match(r'^([a-zA-Z_][\w]*)\((.+)\)$', predicate_str)
+    match_one_arg = ONE_ARG_PATTERN.match(predicate_str)
     if match_one_arg:
         predicate, arg = match_one_arg.groups()
         return f"({sanitize(predicate)} {sanitize(arg)})"
@@ -47,5 +62,151 @@ def validate_metta_lines(metta_lines: list[str]) -> list[str]:
     return [line for line in metta_lines if validate_metta_syntax(line)[0]]
 
 def split_predicates(text_block: str):
-    pattern = r'[a-zA-Z_ ]+\([^()]*\)'
-    return re.findall(pattern, text_block)
+    return PREDICATE_PATTERN.findall(text_block)
+
+
+class PredicateSplitter:
+    """
+    Incremental version of `split_predicates`.
+
+    Text is fed in arbitrary pieces; complete predicates are returned as soon
+    as their closing parenthesis has been seen. Every match ends with ')', so
+    nothing is left to flush at the end. Only the tail that can still start a
+    match is kept between calls, and pieces without a ')' are never run
+    through the pattern, so long prose costs linear time. The output equals
+    `split_predicates` unless a single predicate is longer than `max_pending`.
+    """
+
+    def __init__(self, max_pending: int = STREAM_CHUNK_SIZE):
+        self.max_pending = max_pending
+        self._pending = ""
+
+    def feed(self, text: str) -> List[str]:
+        if ")" not in text:
+            self._pending = self._trim(self._pending, text)
+            return []
+        buffer = self._pending + text
+        predicates = []
+        end = 0
+        for match in PREDICATE_PATTERN.finditer(buffer):
+            predicates.append(match.group(0))
+            end = match.end()
+        self._pending = self._trim("", buffer[end:])
+        return predicates
+
+    def _trim(self, pending: str, text: str) -> str:
+        # A predicate is a run of name characters, one '(' and the first ')'
+        # after it, so a future match can only start at the run before the
+        # last unclosed '(' or at the run the text ends with. `pending` is
+        # already trimmed, so only the new text has to be looked at.
+        close = text.rfind(")")
+        if close >= 0:
+            pending, text = "", text[close + 1:]
+        opening = text.rfind("(")
+        if opening < 0:
+            if "(" in pending or not text.rstrip(PREDICATE_CHARS):
+                tail = pending + text
+            else:
+                tail = _trailing_run(text)
+        else:
+            head = text[:opening]
+            run = _trailing_run(head)
+            if len(run) == len(head):
+                run = _trailing_run(pending) + run
+            if run:
+                tail = run + text[opening:]
+            else:
+                tail = _trailing_run(text[opening + 1:])
+        if len(tail) > self.max_pending:
+            tail = tail[-self.max_pending:]
+        return tail
+
+
+def _trailing_run(text: str) -> str:
+    return text[len(text.rstrip(PREDICATE_CHARS)):]
+
+
+def convert_predicate_record(predicate: str) -> dict:
+    """Converts one predicate and reports whether the MeTTa line is valid."""
+    metta = convert_predicate_to_metta(predicate)
+    return {
+        "predicate": predicate,
+        "metta": metta,
+        "valid": validate_metta_syntax(metta)[0],
+    }
+
+
+def iter_metta_records(pieces: Iterable[str]) -> Iterator[dict]:
+    """Streams conversion records for text arriving in pieces."""
+    splitter = PredicateSplitter()
+    for piece in pieces:
+        for predicate in splitter.feed(piece):
+            yield convert_predicate_record(predicate)
+
+
+async def aiter_metta_records(pieces: AsyncIterable[bytes], encoding: str = "utf-8") -> AsyncIterator[dict]:
+    """Async counterpart of `iter_metta_records` for raw request bodies."""
+    decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    splitter = PredicateSplitter()
+    async for piece in pieces:
+        for predicate in splitter.feed(decoder.decode(piece)):
+            yield convert_predicate_record(predicate)
+    for predicate in splitter.feed(decoder.decode(b"", final=True)):
+        yield convert_predicate_record(predicate)
+
+
+def format_metta_record(record: dict, output_format: str = "ndjson") -> str:
+    """
+    Renders a conversion record as one output line.
+
+    `ndjson` emits the whole record, `text` emits the MeTTa line and turns
+    invalid output into a comment so the stream stays loadable.
+    """
+    if output_format == "ndjson":
+        return json.dumps(record, ensure_ascii=False) + "\n"
+    if record["valid"]:
+        return record["metta"] + "\n"
+    metta = record["metta"]
+    return (metta if metta.startswith(";") else f"; Invalid MeTTa: {metta}") + "\n"
+
+
+def iter_file_pieces(stream, chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[str]:
+    while True:
+        piece = stream.read(chunk_size)
+        if not piece:
+            break
+        yield piece
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Stream FOL predicates from a file into MeTTa",
+    )
+    parser.add_argument("input", nargs="?", default="-",
+                        help="Input file with FOL predicates (default: stdin)")
+    parser.add_argument("-o", "--output", default="-",
+                        help="Output file (default: stdout)")
+    parser.add_argument("--format", choices=["text", "ndjson"], default="text",
+                        help="Output format (default: text)")
+    args = parser.parse_args(argv)
+
+    source = sys.stdin if args.input == "-" else open(args.input, "r", encoding="utf-8", errors="replace")
+    target = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    total = invalid = 0
+    try:
+        for record in iter_metta_records(iter_file_pieces(source)):
+            target.write(format_metta_record(record, args.format))
+            total += 1
+            invalid += not record["valid"]
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if target is not sys.stdout:
+            target.close()
+
+    print(f"Converted {total} predicates ({invalid} invalid)", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,17 +2,28 @@ import os
 import re
 import time
 import argparse
-from typing import List, Dict, Optional
+import contextlib
+import queue
+import functools
+import contextvars
+import tempfile
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Optional, Iterable, Iterator, Tuple
 from dataclasses import dataclass, asdict
 from pathlib import Path
 from datetime import datetime
 
 import requests
-import PyPDF2
-import arxiv
-import openai
 from dotenv import load_dotenv
-from app.utils.ai_provider import ai_generate
+from app.utils.ai_provider import ai_generate, provider_model_name
+from app.services.paper_store import PaperStore
+from app.services.triple_store import ingest_records
+from app.services.entity_normalization import TripleDeduplicator, normalize_key
+from app.services.metta_columnar import write_columnar
+from app.utils.instrumentation import span, track_job
+from app.core.executors import CPU_START_METHOD
 
 load_dotenv()
 
@@ -25,6 +36,7 @@ class PaperInfo:
     pdf_url: str
     published: str
     authors: List[str]
+    paper_id: str = ""
 
 
 @dataclass
@@ -33,6 +45,7 @@ class FOLTriple:
     subject: str
     predicate: str
     obj: str
+    count: int = 1  # occurrences merged into this triple
     
     def to_tuple(self) -> tuple:
         return (self.subject, self.predicate, self.obj)
@@ -45,7 +58,11 @@ class FOLTriple:
 class PaperFetcher:
     """Handles paper retrieval from arXiv"""
     
-    def __init__(self):
+    def __init__(self, store: Optional[PaperStore] = None, offline: bool = False, refresh: bool = False):
+        self.store = store
+        self.offline = offline
+        # Search arXiv again even when the store has fresh results for the query
+        self.refresh = refresh
         self.logger = self._get_logger()
     
     @staticmethod
@@ -55,9 +72,20 @@ class PaperFetcher:
     
     def fetch_papers(self, query: str, max_results: int = 5) -> List[PaperInfo]:
         """Fetch research papers from arXiv"""
+        if self.store is not None and (self.offline or not self.refresh):
+            # Offline, stale results are better than none
+            cached = self.store.get_search(query, max_results, allow_stale=self.offline)
+            if cached is not None:
+                self.logger(f"Using cached search results for: {query}")
+                return [PaperInfo(**paper) for paper in cached]
+        if self.offline:
+            self.logger(f"Offline and no cached search results for: {query}")
+            return []
+
         try:
             self.logger(f"Searching arXiv for: {query}")
-            
+            import arxiv
+
             search = arxiv.Search(
                 query=query,
                 max_results=max_results,
@@ -65,17 +93,22 @@ class PaperFetcher:
             )
             
             papers = []
-            for result in search.results():
+            with span("arxiv.search", kind="external"):
+                results = list(search.results())
+            for result in results:
                 paper = PaperInfo(
                     title=result.title,
                     summary=result.summary,
                     pdf_url=result.pdf_url,
                     published=str(result.published),
-                    authors=[author.name for author in result.authors]
+                    authors=[author.name for author in result.authors],
+                    paper_id=result.get_short_id()
                 )
                 papers.append(paper)
             
             self.logger(f"Found {len(papers)} papers")
+            if self.store is not None:
+                self.store.put_search(query, max_results, [asdict(paper) for paper in papers])
             return papers
             
         except Exception as e:
@@ -83,54 +116,141 @@ class PaperFetcher:
             return []
 
 
+def _iter_page_range(pdf_path: str, start: int, end: int) -> Iterator[Optional[str]]:
+    """Extract text for pages [start, end) of a PDF, None for unreadable pages"""
+    import PyPDF2
+    with open(pdf_path, 'rb') as f:
+        pdf_reader = PyPDF2.PdfReader(f)
+        for page_num in range(start, min(end, len(pdf_reader.pages))):
+            try:
+                yield pdf_reader.pages[page_num].extract_text()
+            except Exception:
+                print(f"Warning: Could not extract page {page_num}")
+                yield None
+
+
+def _extract_page_range(pdf_path: str, start: int, end: int) -> List[Optional[str]]:
+    """Process-pool entry point for `_iter_page_range`"""
+    return list(_iter_page_range(pdf_path, start, end))
+
+
 class PDFProcessor:
     """Handles PDF download and text extraction"""
     
-    def __init__(self, temp_dir: str = "./temp_pdfs"):
+    def __init__(self, temp_dir: str = "./temp_pdfs", max_workers: Optional[int] = None,
+                 parallel_page_threshold: int = 24, pages_per_task: int = 8,
+                 store: Optional[PaperStore] = None, offline: bool = False):
+        self.store = store
+        self.offline = offline
         self.temp_dir = Path(temp_dir)
         self.temp_dir.mkdir(exist_ok=True)
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.parallel_page_threshold = parallel_page_threshold
+        self.pages_per_task = pages_per_task
+        # One page-extraction pool shared by every download thread, started on first use
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pool_lock = threading.Lock()
         self.logger = lambda msg: print(f"[PDFProcessor] {msg}")
+
+    def _page_pool(self) -> ProcessPoolExecutor:
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.max_workers,
+                                                 mp_context=multiprocessing.get_context(CPU_START_METHOD))
+            return self._pool
+
+    def close(self):
+        """Shut down the page-extraction pool"""
+        with self._pool_lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True, cancel_futures=True)
     
-    def download_and_extract_text(self, pdf_url: str, paper_title: str) -> str:
+    def download_and_extract_text(self, pdf_url: str, paper_title: str, paper_id: str = "") -> str:
         """Download PDF and extract text content"""
+        pages = self.download_and_extract_pages(pdf_url, paper_title, paper_id)
+        return "".join(f"{page}\n" for page in pages)
+
+    def download_and_extract_pages(self, pdf_url: str, paper_title: str, paper_id: str = "") -> List[str]:
+        """Download PDF and extract text content as a list of page strings"""
+        pages = list(self.iter_pages(pdf_url, paper_title, paper_id))
+        self.logger(f"Extracted {sum(len(p) for p in pages)} characters from {len(pages)} pages")
+        return pages
+
+    def iter_pages(self, pdf_url: str, paper_title: str, paper_id: str = "") -> Iterator[str]:
+        """Download PDF and yield page texts in order as soon as each is extracted"""
+        use_store = self.store is not None and bool(paper_id)
+        if use_store:
+            cached_pages = self.store.get_pages(paper_id)
+            if cached_pages is not None:
+                self.logger(f"Using cached text for {paper_id}")
+                yield from cached_pages
+                return
+
+        temp_file = None
         try:
-            self.logger(f"Downloading PDF from {pdf_url[:50]}...")
-            
-            response = requests.get(pdf_url, timeout=30)
-            response.raise_for_status()
-            
-            # Save temporarily with sanitized filename
-            temp_file = self.temp_dir / f"{self._sanitize_filename(paper_title)}.pdf"
-            
-            with open(temp_file, 'wb') as f:
-                f.write(response.content)
-            
-            # Extract text
-            text = self._extract_text_from_pdf(temp_file)
-            
-            # Cleanup
-            temp_file.unlink()
-            
-            self.logger(f"Extracted {len(text)} characters")
-            return text
-            
+            # Pinned so other download threads cannot evict the PDF while it is read
+            with self.store.pinned(paper_id) if use_store else contextlib.nullcontext():
+                pdf_path = self.store.get_pdf_path(paper_id) if use_store else None
+                if pdf_path is None:
+                    if self.offline:
+                        self.logger(f"Offline and no cached PDF for {paper_id or paper_title[:50]}")
+                        return
+                    temp_file = self._download_to_temp(pdf_url, paper_title)
+                    pdf_path = self.store.put_pdf(paper_id, temp_file) if use_store else temp_file
+
+                pages = []
+                for page in self._iter_pages_from_pdf(pdf_path):
+                    pages.append(page)
+                    yield page
+                if use_store:
+                    self.store.put_pages(paper_id, pages)
         except Exception as e:
             self.logger(f"Error: {e}")
-            return ""
-    
-    @staticmethod
-    def _extract_text_from_pdf(pdf_path: Path) -> str:
-        """Extract text from PDF file"""
-        text = ""
+        finally:
+            # Cleanup (a stored PDF has already been moved out of the temp dir)
+            if temp_file is not None:
+                temp_file.unlink(missing_ok=True)
+
+    @span("pdf.download", kind="external")
+    def _download_to_temp(self, pdf_url: str, paper_title: str) -> Path:
+        """Stream the PDF straight to a temp file without holding it in memory"""
+        self.logger(f"Downloading PDF from {pdf_url[:50]}...")
+
+        with requests.get(pdf_url, timeout=30, stream=True) as response:
+            response.raise_for_status()
+            # Save temporarily with sanitized filename
+            fd, temp_name = tempfile.mkstemp(
+                prefix=f"{self._sanitize_filename(paper_title)}_", suffix=".pdf", dir=self.temp_dir
+            )
+            with os.fdopen(fd, 'wb') as f:
+                for block in response.iter_content(chunk_size=64 * 1024):
+                    f.write(block)
+        return Path(temp_name)
+
+    def _iter_pages_from_pdf(self, pdf_path: Path) -> Iterator[str]:
+        """Extract pages sequentially for small PDFs, across a process pool for large ones"""
+        import PyPDF2
         with open(pdf_path, 'rb') as f:
-            pdf_reader = PyPDF2.PdfReader(f)
-            for page_num, page in enumerate(pdf_reader.pages):
-                try:
-                    text += page.extract_text() + "\n"
-                except Exception as e:
-                    print(f"Warning: Could not extract page {page_num}")
-        return text
-    
+            page_count = len(PyPDF2.PdfReader(f).pages)
+
+        if page_count < self.parallel_page_threshold or self.max_workers < 2:
+            yield from (p for p in _iter_page_range(str(pdf_path), 0, page_count) if p is not None)
+            return
+
+        step = self.pages_per_task
+        ranges = [(start, min(start + step, page_count)) for start in range(0, page_count, step)]
+        pool = self._page_pool()
+        futures = [pool.submit(_extract_page_range, str(pdf_path), start, end) for start, end in ranges]
+        try:
+            # Yield in page order; later ranges keep extracting while earlier ones are consumed
+            for future in futures:
+                yield from (p for p in future.result() if p is not None)
+        finally:
+            # An abandoned paper must not keep the shared pool busy
+            for future in futures:
+                future.cancel()
+
     @staticmethod
     def _sanitize_filename(filename: str) -> str:
         """Sanitize filename for file system"""
@@ -172,6 +292,40 @@ class TextProcessor:
         self.logger(f"Created {len(chunks)} text chunks")
         return chunks
 
+    def iter_chunks(self, pages: Iterable[str], chunk_size: int = 2000,
+                    overlap: int = 200) -> Iterator[str]:
+        """
+        Preprocess and chunk a stream of page texts as they arrive.
+
+        Produces the same chunks as `chunk_text(preprocess_text(...))` on the
+        joined pages, but a chunk is yielded as soon as enough words exist.
+        """
+        step = chunk_size - overlap
+        window: List[str] = []
+        carry = ""
+        emitted = 0
+
+        for page in pages:
+            words = self.preprocess_text(carry + page + "\n").split()
+            carry = ""
+            # Keep a trailing hyphenated word so it can be joined with the next page
+            if words and re.search(r'\w-$', words[-1]):
+                carry = words.pop() + " "
+            window.extend(words)
+            while len(window) >= chunk_size:
+                yield ' '.join(window[:chunk_size])
+                emitted += 1
+                window = window[step:]
+
+        if carry:
+            window.extend(self.preprocess_text(carry).split())
+        # Words beyond the overlap have not been emitted yet
+        if window and (emitted == 0 or len(window) > overlap):
+            yield ' '.join(window)
+            emitted += 1
+
+        self.logger(f"Created {emitted} text chunks")
+
 
 class FOLExtractor:
     """Handles FOL triple extraction using LLM with broad bio-domain focus"""
@@ -270,9 +424,11 @@ Output only the FOL triples:
 class METTAWriter:
     """Handles METTA file generation"""
     
-    def __init__(self, output_dir: str = "./output"):
+    def __init__(self, output_dir: str = "./output", columnar: bool = False):
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(exist_ok=True)
+        # Also write a memory-mappable .mettac next to each .metta file
+        self.columnar = columnar
         self.logger = lambda msg: print(f"[METTAWriter] {msg}")
     
     def write_metta(self, title: str, triples: List[FOLTriple], 
@@ -297,14 +453,43 @@ class METTAWriter:
                 f.write("; Research findings\n")
                 for triple in triples:
                     f.write(f"{triple.to_metta()}\n")
+
+                repeated = [triple for triple in triples if triple.count > 1]
+                if repeated:
+                    f.write("\n; Occurrence counts of facts extracted more than once\n")
+                    for triple in repeated:
+                        f.write(f"(occurrences {triple.to_metta()} {triple.count})\n")
             
             self.logger(f"Wrote {len(triples)} triples to {filepath}")
+            if self.columnar:
+                columnar_path = filepath.with_suffix(".mettac")
+                write_columnar((triple.to_tuple() for triple in triples), str(columnar_path), order="spo")
+                self.logger(f"Wrote columnar copy to {columnar_path}")
             return str(filepath)
             
         except Exception as e:
             self.logger(f"Error writing METTA file: {e}")
             return ""
     
+    def write_merged(self, query: str, merged: List[Tuple[Tuple[str, str, str], int, List[str]]]) -> str:
+        """Write the facts of a whole run once each, with occurrence counts and the papers reporting them"""
+        try:
+            safe_query = re.sub(r'[^\w\s-]', '', query)[:50]
+            filepath = self.output_dir / f"merged_{safe_query}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.metta"
+            with open(filepath, 'w') as f:
+                f.write(f"; Facts merged across papers\n; Query: {query}\n; Distinct Triples: {len(merged)}\n")
+                f.write(f"; Generated: {datetime.now().isoformat()}\n\n")
+                for triple, count, papers in merged:
+                    atom = FOLTriple(*triple).to_metta()
+                    f.write(f"{atom}\n(occurrences {atom} {count})\n")
+                    for paper in papers:
+                        f.write(f'(reported-in {atom} "{paper}")\n')
+            self.logger(f"Wrote {len(merged)} merged triples to {filepath}")
+            return str(filepath)
+        except Exception as e:
+            self.logger(f"Error writing merged METTA file: {e}")
+            return ""
+
     @staticmethod
     def _generate_header(title: str, paper_info: PaperInfo, 
                         triple_count: int) -> str:
@@ -327,49 +512,107 @@ class METTAWriter:
 (: object-property (-> Symbol))"""
 
 
+class RateLimiter:
+    """Spaces calls at least `min_interval` seconds apart, shared across threads"""
+
+    def __init__(self, min_interval: float = 1.0):
+        self.min_interval = min_interval
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.min_interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class ProgressReporter:
+    """Counts finished papers per pipeline stage and prints a status line"""
+
+    def __init__(self, total: int, stages: Iterable[str]):
+        self.total = total
+        self.done = {stage: 0 for stage in stages}
+        self._lock = threading.Lock()
+        self.logger = lambda msg: print(f"[Progress] {msg}")
+
+    def advance(self, stage: str):
+        with self._lock:
+            self.done[stage] += 1
+            status = " | ".join(f"{name} {count}/{self.total}" for name, count in self.done.items())
+        self.logger(status)
+
+
 class PaperProcessor:
     """Orchestrates the complete processing pipeline"""
     
-    def __init__(self, api_key: Optional[str] = None):
-        self.fetcher = PaperFetcher()
-        self.pdf_processor = PDFProcessor()
+    def __init__(self, api_key: Optional[str] = None,
+                 store: Optional[PaperStore] = None, offline: bool = False,
+                 medcat_entities: bool = False, refresh: bool = False,
+                 output_dir: str = "./output", temp_dir: str = "./temp_pdfs"):
+        self.fetcher = PaperFetcher(store, offline, refresh)
+        self.pdf_processor = PDFProcessor(temp_dir, store=store, offline=offline)
         self.text_processor = TextProcessor()
         self.fol_extractor = FOLExtractor(api_key)
-        self.metta_writer = METTAWriter()
+        self.metta_writer = METTAWriter(output_dir)
+        self.rate_limiter = RateLimiter(1.0)
+        # The same entity gets one atom across the chunks and papers of a run;
+        # with medcat_entities, MedCAT concepts of each chunk seed it with CUIs
+        self.deduplicator = TripleDeduplicator()
+        self.medcat_entities = medcat_entities
+        self.metrics: Optional[Dict] = None
         self.logger = lambda msg: print(f"[PaperProcessor] {msg}")
     
+    def close(self):
+        """Release the page-extraction processes"""
+        self.pdf_processor.close()
+
     def process_paper(self, paper_info: PaperInfo, 
                      chunk_size: int = 2000) -> Dict:
         """Process single paper to FOL triples"""
         self.logger(f"Processing: {paper_info.title[:60]}...")
         
-        # Extract text
-        full_text = self.pdf_processor.download_and_extract_text(
-            paper_info.pdf_url, paper_info.title
-        )
-        
-        if not full_text:
-            self.logger("No text extracted, using summary")
-            full_text = paper_info.summary
-        
-        # Preprocess
-        clean_text = self.text_processor.preprocess_text(full_text)
-        
-        # Chunk
-        chunks = self.text_processor.chunk_text(clean_text, chunk_size)
+        # Extract, preprocess and chunk page by page
+        pages = self.pdf_processor.iter_pages(paper_info.pdf_url, paper_info.title, paper_info.paper_id)
+        chunks = self.text_processor.iter_chunks(self._with_summary_fallback(pages, paper_info), chunk_size)
         
+        return self._extract_and_write(paper_info, chunks)
+
+    def _extract_and_write(self, paper_info: PaperInfo, chunks: Iterable[str]) -> Dict:
+        """Run rate-limited LLM extraction over the chunks and write the METTA file"""
         # Extract FOL triples
-        all_triples = []
+        extracted = []
+        records = []
+        model = provider_model_name()
         for i, chunk in enumerate(chunks):
-            self.logger(f"Extracting from chunk {i+1}/{len(chunks)}...")
-            triples = self.fol_extractor.extract_triples(chunk)
-            all_triples.extend(triples)
-            time.sleep(1)  # Rate limiting
+            self.logger(f"Extracting from chunk {i+1}...")
+            self.rate_limiter.wait()  # Rate limiting
+            with span("paper.llm_extract"):
+                triples = self.fol_extractor.extract_triples(chunk)
+            cuis = self._seed_entities(chunk) if self.medcat_entities else None
+            with span("paper.normalize"):
+                triples = [self.deduplicator.normalize(triple.to_tuple(), cuis) for triple in triples]
+            extracted.extend(triples)
+            provenance = {"source": "paper", "paper": paper_info.paper_id, "chunk": i, "model": model}
+            records.extend((*triple, provenance) for triple in triples)
+
+        # Overlapping chunks repeat facts; keep each once with its occurrence count.
+        # The run totals across papers are in self.deduplicator.merged()
+        merged = self.deduplicator.merge(extracted, paper_info.paper_id or paper_info.title)
+        all_triples = [FOLTriple(*triple, count=count) for triple, count in merged]
+        if len(all_triples) < len(extracted):
+            self.logger(f"Merged {len(extracted)} extracted triples into {len(all_triples)}")
+
+        with span("paper.store_triples"):
+            ingest_records(records)
         
         # Write METTA file
-        metta_path = self.metta_writer.write_metta(
-            paper_info.title, all_triples, paper_info
-        )
+        with span("paper.write_metta"):
+            metta_path = self.metta_writer.write_metta(
+                paper_info.title, all_triples, paper_info
+            )
         
         return {
             'title': paper_info.title,
@@ -379,22 +622,155 @@ class PaperProcessor:
             'paper_info': paper_info
         }
     
-    def process_papers(self, query: str, max_papers: int = 3) -> Dict:
-        """Process multiple papers"""
+    def _seed_entities(self, chunk: str) -> Dict[str, str]:
+        """Add the chunk's MedCAT concepts to the entity index; returns name key -> CUI for the chunk"""
+        from app.services.abstract_to_fol import annotate_cached
+        try:
+            with span("paper.medcat"):
+                annotations = annotate_cached(chunk)["annotations"]
+        except Exception as e:
+            self.logger(f"MedCAT annotation failed, chunk normalized without CUIs: {e}")
+            return {}
+        self.deduplicator.entities.add_concepts(annotations)
+        return {normalize_key(name): annotation["cui"]
+                for annotation in annotations if annotation.get("cui")
+                for name in (annotation.get("pretty_name"), annotation.get("detected_name")) if name}
+
+    def _with_summary_fallback(self, pages: Iterable[str], paper_info: PaperInfo) -> Iterator[str]:
+        """Pass pages through, falling back to the summary when nothing was extracted"""
+        extracted = False
+        for page in pages:
+            extracted = extracted or bool(page.strip())
+            yield page
+        if not extracted:
+            self.logger("No text extracted, using summary")
+            yield paper_info.summary
+
+    def process_papers(self, query: str, max_papers: int = 3,
+                       chunk_size: int = 2000, workers: int = 1) -> Dict:
+        """
+        Process multiple papers, pipelining the stages when workers > 1.
+        Stage timings and LLM token usage for the run end up in `self.metrics`.
+        """
+        # One entity index per run, so it does not grow across runs of a long-lived processor
+        self.deduplicator = TripleDeduplicator()
+        with track_job(query) as metrics:
+            try:
+                return self._process_papers(query, max_papers, chunk_size, workers)
+            finally:
+                self.metrics = metrics.summary()
+
+    def _process_papers(self, query: str, max_papers: int, chunk_size: int, workers: int) -> Dict:
         papers = self.fetcher.fetch_papers(query, max_papers)
         
         if not papers:
             self.logger("No papers found!")
             return {}
+
+        if workers > 1:
+            return self._process_papers_pipelined(papers, chunk_size, workers)
         
+        progress = ProgressReporter(len(papers), ["processed"])
         results = {}
         for idx, paper in enumerate(papers, 1):
             self.logger(f"Processing paper {idx}/{len(papers)}")
-            result = self.process_paper(paper)
+            result = self.process_paper(paper, chunk_size)
             results[paper.title] = result
+            progress.advance("processed")
         
         return results
 
+    def _process_papers_pipelined(self, papers: List[PaperInfo], chunk_size: int,
+                                  workers: int) -> Dict:
+        """
+        Run download/extract (I/O), preprocessing (CPU) and LLM extraction as
+        separate stages connected by bounded queues, so paper N+1 downloads
+        while paper N is chunked or sent to the LLM.
+        """
+        progress = ProgressReporter(len(papers), ["downloaded", "chunked", "extracted"])
+        pending: "queue.Queue[Optional[int]]" = queue.Queue()
+        extracted: "queue.Queue[Optional[tuple]]" = queue.Queue(maxsize=workers)
+        chunked: "queue.Queue[Optional[tuple]]" = queue.Queue(maxsize=workers)
+        results: Dict[int, Dict] = {}
+
+        for idx in range(len(papers)):
+            pending.put(idx)
+
+        def download_stage():
+            while True:
+                try:
+                    idx = pending.get_nowait()
+                except queue.Empty:
+                    return
+                paper = papers[idx]
+                try:
+                    with span("paper.download_extract"):
+                        pages = self.pdf_processor.download_and_extract_pages(
+                            paper.pdf_url, paper.title, paper.paper_id
+                        )
+                except Exception as e:
+                    self.logger(f"Download failed for {paper.title[:60]}: {e}")
+                    pages = []
+                extracted.put((idx, pages))
+                progress.advance("downloaded")
+
+        def preprocess_stage():
+            try:
+                for _ in papers:
+                    idx, pages = extracted.get()
+                    paper = papers[idx]
+                    try:
+                        with span("paper.chunk"):
+                            chunks = list(self.text_processor.iter_chunks(
+                                self._with_summary_fallback(pages, paper), chunk_size
+                            ))
+                    except Exception as e:
+                        self.logger(f"Preprocessing failed for {paper.title[:60]}: {e}")
+                        results[idx] = {
+                            'title': paper.title, 'triples': [], 'count': 0,
+                            'metta_file': "", 'paper_info': paper, 'error': str(e)
+                        }
+                        progress.advance("chunked")
+                        progress.advance("extracted")
+                        continue
+                    chunked.put((idx, chunks))
+                    progress.advance("chunked")
+            finally:
+                # Always release the LLM workers, or join() below never returns
+                for _ in range(workers):
+                    chunked.put(None)
+
+        def llm_stage():
+            while True:
+                item = chunked.get()
+                if item is None:
+                    return
+                idx, chunks = item
+                paper = papers[idx]
+                try:
+                    results[idx] = self._extract_and_write(paper, chunks)
+                except Exception as e:
+                    self.logger(f"Extraction failed for {paper.title[:60]}: {e}")
+                    results[idx] = {
+                        'title': paper.title, 'triples': [], 'count': 0,
+                        'metta_file': "", 'paper_info': paper, 'error': str(e)
+                    }
+                progress.advance("extracted")
+
+        def in_context(target):
+            # Run each stage in a copy of this context so spans land on the current job
+            return functools.partial(contextvars.copy_context().run, target)
+
+        threads = [threading.Thread(target=in_context(download_stage), name=f"download-{i}") for i in range(workers)]
+        threads.append(threading.Thread(target=in_context(preprocess_stage), name="preprocess"))
+        threads += [threading.Thread(target=in_context(llm_stage), name=f"llm-{i}") for i in range(workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        return {papers[idx].title: results[idx] for idx in sorted(results)}
+
 
 class CLI:
     """Command-line interface"""
@@ -409,6 +785,7 @@ Examples:
     python bio_paper_parser.py --topic "cancer immunotherapy"
     python bio_paper_parser.py --topic "CRISPR gene editing" --max-papers 5
     python bio_paper_parser.py --paper-title "AlphaFold: Protein structure prediction"
+    python bio_paper_parser.py --topic "single-cell RNA-seq" --max-papers 50 --workers 8
             """
         )
         
@@ -445,6 +822,64 @@ Examples:
             help='Output directory for METTA files (default: ./output)'
         )
         
+        parser.add_argument(
+            '--columnar',
+            action='store_true',
+            help='Also write each METTA file in the columnar binary format (.mettac)'
+        )
+        
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Papers processed concurrently; >1 pipelines download, chunking and LLM stages (default: 1)'
+        )
+        
+        parser.add_argument(
+            '--llm-interval',
+            type=float,
+            default=1.0,
+            help='Minimum seconds between LLM calls across all workers (default: 1.0)'
+        )
+        
+        parser.add_argument(
+            '--cache-dir',
+            type=str,
+            default='./paper_cache',
+            help='Local store for arXiv results, PDFs and extracted text (default: ./paper_cache)'
+        )
+        
+        parser.add_argument(
+            '--cache-size-mb',
+            type=int,
+            default=2048,
+            help='Size cap of the local store before LRU eviction (default: 2048)'
+        )
+        
+        parser.add_argument(
+            '--no-cache',
+            action='store_true',
+            help='Do not read or write the local store'
+        )
+        
+        parser.add_argument(
+            '--medcat-entities',
+            action='store_true',
+            help='Annotate chunks with MedCAT so entity normalization can use concept ids (CUIs)'
+        )
+        
+        parser.add_argument(
+            '--refresh',
+            action='store_true',
+            help='Search arXiv again instead of reusing stored results; stored PDFs and text are still used'
+        )
+        
+        parser.add_argument(
+            '--offline',
+            action='store_true',
+            help='Only use papers already in the local store'
+        )
+        
         args = parser.parse_args()
         
         # Validate input
@@ -453,6 +888,11 @@ Examples:
             print("\nError: Please provide either --topic or --paper-title")
             return
         
+        if args.offline and args.no_cache:
+            parser.print_help()
+            print("\nError: --offline needs the local store, drop --no-cache")
+            return
+        
         query = args.topic or args.paper_title
         
         print("\n" + "="*60)
@@ -460,13 +900,21 @@ Examples:
         print("="*60)
         print(f"Query: {query}")
         print(f"Max Papers: {args.max_papers}")
+        print(f"Workers: {args.workers}")
         print("="*60 + "\n")
         
-        processor = PaperProcessor()
-        processor.metta_writer.output_dir = Path(args.output_dir)
-        processor.metta_writer.output_dir.mkdir(exist_ok=True)
+        store = None
+        if not args.no_cache:
+            store = PaperStore(args.cache_dir, max_bytes=args.cache_size_mb * 1024 * 1024)
+        processor = PaperProcessor(store=store, offline=args.offline, medcat_entities=args.medcat_entities,
+                                   refresh=args.refresh, output_dir=args.output_dir)
+        processor.metta_writer.columnar = args.columnar
+        processor.rate_limiter = RateLimiter(args.llm_interval)
         
-        results = processor.process_papers(query, args.max_papers)
+        try:
+            results = processor.process_papers(query, args.max_papers, args.chunk_size, args.workers)
+        finally:
+            processor.close()
         
         # Display results
         print("\n" + "="*60)
@@ -479,6 +927,21 @@ Examples:
             print(f"   METTA File: {data['metta_file']}")
             print()
 
+        merged = processor.deduplicator.merged()
+        if merged:
+            shared = sum(1 for _, _, papers in merged if len(papers) > 1)
+            print(f"🔗 Distinct facts across papers: {len(merged)} ({shared} reported by more than one paper)")
+            print(f"   METTA File: {processor.metta_writer.write_merged(query, merged)}")
+            print()
+
+        if processor.metrics:
+            totals = processor.metrics["totals"]
+            print(f"⏱  Wall time: {processor.metrics['wall_seconds']:.1f}s")
+            for name, entry in sorted(processor.metrics["spans"].items()):
+                print(f"   {name}: {entry['count']} calls, {entry['total_seconds']:.1f}s")
+            print(f"   LLM calls: {totals['llm_calls']}, "
+                  f"tokens: {totals['prompt_tokens']} prompt / {totals['completion_tokens']} completion")
+
 
 if __name__ == "__main__":
     CLI.main()
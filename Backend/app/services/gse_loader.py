@@ -1,6 +1,10 @@
-import GEOparse
+import os
 from typing import Union, Dict, Optional, List
+from app.core.config import config
+from app.utils.instrumentation import span
+from app.utils.cache import get_cache, cache_key
 
+@span("geo.fetch_gse", kind="external")
 def fetch_gse_data(gse_id: str) -> Union[str, Dict[str, str]]:
     """
     Fetches a GSE entry from GEO database.
@@ -12,7 +16,8 @@ def fetch_gse_data(gse_id: str) -> Union[str, Dict[str, str]]:
     - The GSE file as a GEOparse GSE object or a dictionary with error details.
     """
     try:               
-        gse = GEOparse.get_GEO(geo=gse_id, destdir="./data", silent=True)
+        import GEOparse  # deferred: pulls in pandas
+        gse = GEOparse.get_GEO(geo=gse_id, destdir=config.GEO_DATA_DIR, silent=True)
 
         if not gse:
             return {"error": "not_found", "message": f"{gse_id} not found in GEO database"}
@@ -21,6 +26,7 @@ def fetch_gse_data(gse_id: str) -> Union[str, Dict[str, str]]:
         print(f"Error fetching GSE {gse_id} with GEOparse: {e}")
         return None
 
+@span("geo.load_gse")
 def load_gse_data(gse_id: str) -> Union[str, Dict[str, str]]:
     """
     Loads GSE data from a local file.
@@ -31,8 +37,20 @@ def load_gse_data(gse_id: str) -> Union[str, Dict[str, str]]:
     Returns:
     - The GSE file as a GEOparse GSE object or a dictionary with error details.
     """
-    gse = GEOparse.get_GEO(filepath=f"./data/{gse_id}_family.soft.gz")
+    import GEOparse
+    gse = GEOparse.get_GEO(filepath=f"{config.GEO_DATA_DIR}/{gse_id}_family.soft.gz")
     if not gse:
         return {"error": "not_found", "message": f"{gse_id} not found in local files"}
     return gse
+
+
+def load_gsm_table(gse_id: str, gsm_id: str):
+    """
+    The data table of one sample of a local GSE. Tables are cached keyed on
+    the SOFT file's size and modification time, so workers share one parse
+    and a re-downloaded file is parsed again.
+    """
+    stat = os.stat(f"{config.GEO_DATA_DIR}/{gse_id}_family.soft.gz")
+    key = cache_key(gse_id, gsm_id, stat.st_size, stat.st_mtime_ns)
+    return get_cache("gsm_table").get_or_compute(key, lambda: load_gse_data(gse_id).gsms[gsm_id].table)
   
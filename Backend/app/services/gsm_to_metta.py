@@ -2,6 +2,8 @@ from typing import Union, Dict
 from app.core.prompts import column_name_prompt
 from app.core.config import config
 from app.utils.openai_utils import openai_generate
+from app.utils.ai_provider import provider_model_name
+from app.utils.cache import get_cache, cache_key
 import json
 
 
@@ -41,27 +43,26 @@ def declare_instances(df, predicate_mapping):
                 metta_instances.append(f"({mapped_col} {unique_id} {instance})")    
     return metta_instances
 
-def generate_metta_from_gsm(gsm_data: Union[str, Dict[str, str]], gsm_id: str) -> Dict[str, str]:
-    """
-    Generate MeTTa code from GSM data.
-
-    Parameters:
-    - gsm_data: The GSM data as a GEOparse GSM object or a dictionary with error details.
-
-    Returns:
-    - A dictionary containing the MeTTa code.
-    """
-
-    sample_data = gsm_data.sample(15)
-    # Create a unique ID by combining row index and GSM ID
+def sample_gsm_rows(gsm_data, gsm_id: str, rows: int = 15):
+    """Sample rows of a GSM table and prepend a Unique_ID column (row index + GSM ID)."""
+    sample_data = gsm_data.sample(rows)
     sample_data.insert(0, "Unique_ID", sample_data.index.astype(str) + "_" + gsm_id)
+    return sample_data
 
-    columns = list(sample_data.columns) # will be modified to be inn a camel case format
+
+def map_gsm_columns(columns: list) -> Dict[str, str]:
+    """Ask the LLM for a column name -> predicate name mapping."""
     print("Extracted Columns:", columns)
 
     prompt = column_name_prompt
     filled_prompt = prompt.format(columns=columns)
 
+    # Samples of one platform share their columns, so one mapping serves the whole series
+    return get_cache("column_mapping").get_or_compute(
+        cache_key(provider_model_name(), filled_prompt), lambda: _request_column_mapping(filled_prompt))
+
+
+def _request_column_mapping(filled_prompt: str) -> Dict[str, str]:
     messages =[
     {'role':'system', 'content':"You are an expert in data standardization."},
     {'role':'user', 'content':filled_prompt}
@@ -72,7 +73,23 @@ def generate_metta_from_gsm(gsm_data: Union[str, Dict[str, str]], gsm_id: str) -
     # Clean markdown
     predicate_mapping_text = predicate_mapping_text.removeprefix("```json").removeprefix("```").removesuffix("```").strip()
     
-    predicate_mapping = json.loads(predicate_mapping_text)
+    return json.loads(predicate_mapping_text)
+
+
+def generate_metta_from_gsm(gsm_data: Union[str, Dict[str, str]], gsm_id: str) -> Dict[str, str]:
+    """
+    Generate MeTTa code from GSM data.
+
+    Parameters:
+    - gsm_data: The GSM data as a GEOparse GSM object or a dictionary with error details.
+
+    Returns:
+    - A dictionary containing the MeTTa code.
+    """
+
+    sample_data = sample_gsm_rows(gsm_data, gsm_id)
+    # will be modified to be inn a camel case format
+    predicate_mapping = map_gsm_columns(list(sample_data.columns))
 
     instances= declare_instances(sample_data, predicate_mapping)
 
@@ -0,0 +1,104 @@
+import os
+import glob
+import time
+import threading
+from typing import Dict, List, Optional
+from app.core.config import config
+from app.utils.cache import cache_key
+from app.utils.instrumentation import span
+
+
+def _response(text: str, entities: Dict) -> Dict:
+    """Shape `CAT.get_entities` output like medcat-service's /api/process answer."""
+    return {"result": {"text": text, "annotations": [entities.get("entities", {})], "success": True}}
+
+
+def load_cat(model_dir: str):
+    """
+    Load a MedCAT model from `model_dir`: a model pack (`*.zip` or an
+    unpacked pack with model_card.json), else the CDB, vocab and MetaCAT
+    files that medcat-init.sh downloads for the service container.
+    """
+    try:
+        from medcat.cat import CAT
+    except ImportError as e:
+        raise RuntimeError("MEDCAT_BACKEND=local needs the medcat package (pip install medcat)") from e
+
+    packs = sorted(glob.glob(os.path.join(model_dir, "*.zip")))
+    if packs:
+        return CAT.load_model_pack(packs[0])
+    if os.path.exists(os.path.join(model_dir, "model_card.json")):
+        return CAT.load_model_pack(model_dir)
+
+    from medcat.cdb import CDB
+    from medcat.vocab import Vocab
+    from medcat.meta_cat import MetaCAT
+    candidates = [os.path.join(model_dir, "cdb.dat"), *sorted(glob.glob(os.path.join(model_dir, "*.cdb")))]
+    cdb_path = next((path for path in candidates if os.path.exists(path)), None)
+    vocab_path = os.path.join(model_dir, "vocab.dat")
+    if cdb_path is None or not os.path.exists(vocab_path):
+        raise RuntimeError(f"No MedCAT model pack or CDB/vocab files in {model_dir}")
+    cdb = CDB.load(cdb_path)
+    meta_dirs = sorted({os.path.dirname(path) for pattern in ("mc_*/config.json", "mc_*/*/config.json")
+                        for path in glob.glob(os.path.join(model_dir, pattern))})
+    return CAT(cdb=cdb, config=cdb.config, vocab=Vocab.load(vocab_path),
+               meta_cats=[MetaCAT.load(path) for path in meta_dirs])
+
+
+class LocalMedCAT:
+    """
+    In-process annotator with the same response shape as the HTTP service.
+
+    The model is loaded once per process; bulk annotation fans texts out
+    over `processes` worker processes with `get_entities_multi_texts`.
+    """
+
+    def __init__(self, model_dir: str, processes: int = 1):
+        self.model_dir = model_dir
+        self.processes = processes
+        start = time.perf_counter()
+        self.cat = load_cat(model_dir)
+        self._lock = threading.Lock()
+        self._version: Optional[str] = None
+        print(f"[MedCAT] Loaded model from {model_dir} in {time.perf_counter() - start:.1f}s")
+
+    @span("medcat.annotate_local")
+    def annotate(self, text: str) -> Dict:
+        with self._lock:
+            return _response(text, self.cat.get_entities(text))
+
+    @span("medcat.annotate_local_bulk")
+    def annotate_bulk(self, texts: List[str]) -> List[Dict]:
+        texts = list(texts)
+        n_process = self.processes if self.processes > 1 and len(texts) > 1 else None
+        with self._lock:
+            results = self.cat.get_entities_multi_texts(texts, n_process=n_process)
+        return [_response(text, entities) for text, entities in zip(texts, results)]
+
+    def model_version(self) -> str:
+        """The model card's "Model ID", as the service reports it, else the CDB file's identity."""
+        if self._version is None:
+            card = self.cat.get_model_card(as_dict=True) or {}
+            version = card.get("Model ID")
+            if not version:
+                files = sorted(glob.glob(os.path.join(self.model_dir, "*")))
+                version = cache_key([(os.path.basename(path), os.path.getsize(path), os.path.getmtime(path))
+                                     for path in files if os.path.isfile(path)])
+            self._version = version
+        return self._version
+
+
+_lock = threading.Lock()
+_local: Optional[LocalMedCAT] = None
+
+
+def use_local_medcat() -> bool:
+    return config.MEDCAT_BACKEND == "local"
+
+
+def local_medcat() -> LocalMedCAT:
+    global _local
+    with _lock:
+        if _local is None or _local.model_dir != config.MEDCAT_MODEL_DIR:
+            _local = LocalMedCAT(config.MEDCAT_MODEL_DIR, config.MEDCAT_PROCESSES)
+        return _local
@@ -3,20 +3,39 @@ import re
 from app.core.prompts import predicate_instruction
 from app.core.prompts import refinement_prompt
 from app.core.aspects import annotation_aspects_list
+from app.utils.instrumentation import span
+from app.utils.ai_provider import count_tokens_provider
+from app.core.config import config
+from collections import Counter
 
 
 
 
 import re
 
+GSE_FIELDS = ['summary', 'overall_design', 'type']
+GSM_FIELDS = [
+    'source_name_ch1', 'organism_ch1', 'characteristics_ch1',
+    'treatment_protocol_ch1', 'molecule_ch1', 'extract_protocol_ch1',
+    'label_ch1', 'label_protocol_ch1', 'hyb_protocol_ch1', 
+    'scan_protocol', 'data_processing'
+]
+
+# Summary levels tried in order until the prompt fits the token budget:
+# (example values per varying field, max characters per value, include sample groups)
+SUMMARY_LEVELS = [(50, None, True), (20, 2000, True), (10, 1000, True), (5, 500, False), (3, 200, False)]
+MAX_GROUPS = 30
+# Identifier-like fields (a different value for every sample) only get a few examples.
+# In smaller series a value per sample is as likely to be a condition, so there the
+# values must also look like ids: a shared prefix and a number ("D1", "rep 2", "3")
+MAX_IDENTIFIER_EXAMPLES = 5
+MIN_IDENTIFIER_SAMPLES = 20
+NUMBERED = re.compile(r"(.*?)\d+")
+
+
 def format_metadata(gse, gsm):
-    gse_fields = ['summary', 'overall_design', 'type']
-    gsm_fields = [
-        'source_name_ch1', 'organism_ch1', 'characteristics_ch1',
-        'treatment_protocol_ch1', 'molecule_ch1', 'extract_protocol_ch1',
-        'label_ch1', 'label_protocol_ch1', 'hyb_protocol_ch1', 
-        'scan_protocol', 'data_processing'
-    ]
+    gse_fields = GSE_FIELDS
+    gsm_fields = GSM_FIELDS
 
     metadata_str = []
 
@@ -38,6 +57,108 @@ def get_all_metadata_samples(gse):
     return list(field_values)
 
 
+def _field_label(field):
+    return f"GSM {field.replace('_', ' ').title()}"
+
+
+def gsm_field_values(gsm):
+    """
+    Field label -> value for one GSM. Characteristics ("donor: 3", "tissue: liver")
+    are split into one field per key so each can be factored out on its own.
+    """
+    values = {}
+    for field in GSM_FIELDS:
+        entries = gsm.metadata.get(field, ['N/A'])
+        if field == 'characteristics_ch1':
+            for i, entry in enumerate(entries):
+                key, sep, value = str(entry).partition(':')
+                label = f"GSM Characteristics {key.strip().title()}" if sep else f"GSM Characteristics {i + 1}"
+                values[label] = value.strip() if sep else str(entry).strip()
+        else:
+            values[_field_label(field)] = str(entries[0]).strip()
+    return values
+
+
+def _clip(value, max_chars):
+    return value if max_chars is None or len(value) <= max_chars else value[:max_chars] + "..."
+
+
+def _is_identifier(values, total):
+    if len(values) != total or total < 2:
+        return False
+    if total >= MIN_IDENTIFIER_SAMPLES:
+        return True
+    prefixes = {match.group(1) if match else None for match in map(NUMBERED.fullmatch, values)}
+    return len(prefixes) == 1 and None not in prefixes
+
+
+def _render_summary(gse, samples, max_values, max_chars, with_groups):
+    total = len(samples)
+    labels = list(dict.fromkeys(label for sample in samples for label in sample))
+    counts = {label: Counter(sample.get(label, 'N/A') for sample in samples) for label in labels}
+    constant = [label for label in labels if len(counts[label]) == 1]
+    varying = [label for label in labels if len(counts[label]) > 1]
+    identifiers = {label for label in varying if _is_identifier(counts[label], total)}
+
+    lines = [f"Series metadata ({total} samples):"]
+    for field in GSE_FIELDS:
+        value = gse.metadata.get(field, ['N/A'])[0]
+        lines.append(f"GSE {field.replace('_', ' ').title()}: {_clip(str(value), max_chars)}")
+
+    if constant:
+        lines.append("")
+        lines.append("Fields shared by all samples:")
+        lines.extend(f"{label}: {_clip(next(iter(counts[label])), max_chars)}" for label in constant)
+
+    if varying:
+        lines.append("")
+        lines.append("Fields that vary across samples (value (number of samples)):")
+        for label in varying:
+            if label in identifiers:
+                examples = ", ".join(_clip(value, max_chars) for value in list(counts[label])[:MAX_IDENTIFIER_EXAMPLES])
+                lines.append(f"{label}: {total} distinct values, one per sample (e.g. {examples})")
+                continue
+            common = counts[label].most_common(max_values)
+            shown = "; ".join(f"{_clip(value, max_chars)} ({count})" for value, count in common)
+            hidden = len(counts[label]) - len(common)
+            more = f"; ... and {hidden} more distinct values" if hidden else ""
+            lines.append(f"{label}: {shown}{more}")
+
+    # Group samples on the varying fields that are not per-sample identifiers
+    group_labels = [label for label in varying if label not in identifiers]
+    if with_groups and group_labels:
+        groups = Counter(tuple(sample.get(label, 'N/A') for label in group_labels) for sample in samples)
+        if len(groups) <= MAX_GROUPS:
+            lines.append("")
+            lines.append("Sample groups:")
+            for i, (values, count) in enumerate(groups.most_common(), start=1):
+                fields = "; ".join(f"{label}={_clip(value, max_chars)}" for label, value in zip(group_labels, values))
+                lines.append(f"Group {i} ({count} samples): {fields}")
+
+    return "\n".join(lines)
+
+
+def build_metadata_summary(gse, token_budget=None):
+    """
+    Field-level summary of a series' metadata for the aspect prompts.
+
+    Fields with one value across all GSMs are listed once, varying fields as
+    value sets with sample counts, plus the sample groups they form. Detail
+    is reduced until the summary fits `token_budget`, so the prompt grows
+    with metadata diversity rather than with the number of samples.
+    """
+    token_budget = token_budget or config.METADATA_TOKEN_BUDGET
+    samples = [gsm_field_values(gsm) for gsm in gse.gsms.values()]
+    summary = ""
+    for max_values, max_chars, with_groups in SUMMARY_LEVELS:
+        summary = _render_summary(gse, samples, max_values, max_chars, with_groups)
+        if count_tokens_provider(summary) <= token_budget:
+            return summary
+    # Still too large: hard cut at roughly 4 characters per token
+    return summary[:token_budget * 4]
+
+
+@span("gse_metadata.aspect")
 def extract_predicates_for_aspect(aspect, field_values):
     aspect_details = annotation_aspects_list[aspect]
     irrelevant_aspects = [x for x in annotation_aspects_list if x != aspect]
@@ -81,7 +202,7 @@ def extract_predicates_for_aspect(aspect, field_values):
 
 
 def extract_all_predicates(gse):
-    field_values = get_all_metadata_samples(gse)
+    field_values = [build_metadata_summary(gse)]
     all_predicates = {}
 
     for aspect in annotation_aspects_list:
@@ -0,0 +1,245 @@
+"""
+Columnar binary export of MeTTa triples.
+
+Layout (little-endian), designed to be memory-mapped without parsing:
+
+    header      "METTACOL", version u32, flags u32, symbols u64, triples u64,
+                symbol offsets position u64, symbol bytes position u64,
+                columns position u64
+    offsets     u64 * (symbols + 1), byte offsets into the symbol bytes
+    symbols     UTF-8 symbols, sorted, so a symbol's id is found by bisection
+    columns     subject, predicate and object u32 columns, `triples` each;
+                NO_OBJECT marks one-argument atoms (predicate subject)
+
+`flags` records whether the text atoms were (predicate subject object), as
+written by `convert_predicate_to_metta` and GSM exports, or
+(subject predicate object), as written by `METTAWriter`, so converting back
+reproduces the same text shape.
+
+    python -m app.services.metta_columnar to-columnar output/paper.metta paper.mettac --order spo
+    python -m app.services.metta_columnar to-metta paper.mettac paper.metta
+    python -m app.services.metta_columnar from-store triples.mettac
+"""
+import os
+import sys
+import mmap
+import struct
+import argparse
+from array import array
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+MAGIC = b"METTACOL"
+VERSION = 1
+HEADER = struct.Struct("<8sIIQQQQQ")
+FLAG_SPO = 1
+NO_OBJECT = 0xFFFFFFFF
+ORDERS = ("pso", "spo")
+
+# (subject, predicate, object); object is None for one-argument atoms
+Triple = Tuple[str, str, Optional[str]]
+
+
+def _little_endian(values: array) -> array:
+    if sys.byteorder != "little":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values
+
+
+def parse_metta_line(line: str, order: str = "pso") -> Optional[Triple]:
+    """A flat 2- or 3-element atom as (subject, predicate, object); None for comments and nested expressions."""
+    line = line.strip()
+    if not (line.startswith("(") and line.endswith(")")):
+        return None
+    inner = line[1:-1]
+    if "(" in inner or ")" in inner:
+        return None
+    parts = inner.split(None, 2)
+    if len(parts) < 2:
+        return None
+    if order == "spo":
+        return (parts[0], parts[1], parts[2] if len(parts) == 3 else None)
+    return (parts[1], parts[0], parts[2] if len(parts) == 3 else None)
+
+
+def format_metta_line(triple: Triple, order: str = "pso") -> str:
+    subject, predicate, obj = triple
+    head = (subject, predicate) if order == "spo" else (predicate, subject)
+    return f"({' '.join(head)} {obj})" if obj is not None else f"({' '.join(head)})"
+
+
+def write_columnar(triples: Iterable[Triple], path: str, order: str = "pso") -> int:
+    """Write triples to `path` in the columnar layout; returns the triple count."""
+    ids = {}
+    columns = (array("I"), array("I"), array("I"))
+    for triple in triples:
+        for column, symbol in zip(columns, triple):
+            if symbol is None:
+                column.append(NO_OBJECT)
+            else:
+                column.append(ids.setdefault(symbol, len(ids)))
+
+    # Sort the symbol table and remap the columns to the sorted ids
+    symbols = sorted(ids, key=lambda symbol: symbol.encode("utf-8"))
+    remap = array("I", bytes(4 * len(symbols)))
+    for new_id, symbol in enumerate(symbols):
+        remap[ids[symbol]] = new_id
+    columns = tuple(array("I", (NO_OBJECT if v == NO_OBJECT else remap[v] for v in column)) for column in columns)
+
+    encoded = [symbol.encode("utf-8") for symbol in symbols]
+    offsets = array("Q", [0])
+    for data in encoded:
+        offsets.append(offsets[-1] + len(data))
+
+    offsets_pos = HEADER.size
+    blob_pos = offsets_pos + 8 * len(offsets)
+    columns_pos = (blob_pos + offsets[-1] + 7) // 8 * 8
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, FLAG_SPO if order == "spo" else 0, len(symbols),
+                            len(columns[0]), offsets_pos, blob_pos, columns_pos))
+        _little_endian(offsets).tofile(f)
+        for data in encoded:
+            f.write(data)
+        f.write(b"\0" * (columns_pos - f.tell()))
+        for column in columns:
+            _little_endian(column).tofile(f)
+    os.replace(tmp, path)
+    return len(columns[0])
+
+
+class ColumnarTriples:
+    """Read-only, memory-mapped view of a columnar file; nothing is decoded up front."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, flags, self.symbol_count, self.triple_count, offsets_pos, blob_pos, columns_pos = \
+            HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"{path} is not a version {VERSION} columnar MeTTa file")
+        self.order = "spo" if flags & FLAG_SPO else "pso"
+        self._blob_pos = blob_pos
+        view = memoryview(self._map)
+        self._offsets = self._ints(view, offsets_pos, self.symbol_count + 1, "Q")
+        size = 4 * self.triple_count
+        self.subjects, self.predicates, self.objects = (
+            self._ints(view, columns_pos + i * size, self.triple_count, "I") for i in range(3)
+        )
+
+    @staticmethod
+    def _ints(view: memoryview, start: int, count: int, typecode: str):
+        width = struct.calcsize(typecode)
+        raw = view[start:start + count * width]
+        if sys.byteorder == "little":
+            return raw.cast(typecode)
+        values = array(typecode, raw.tobytes())
+        values.byteswap()
+        return values
+
+    def symbol(self, symbol_id: int) -> str:
+        start, end = self._offsets[symbol_id], self._offsets[symbol_id + 1]
+        return self._map[self._blob_pos + start:self._blob_pos + end].decode("utf-8")
+
+    def lookup(self, symbol: str) -> Optional[int]:
+        """Id of `symbol`, by bisection over the sorted symbol table."""
+        target = symbol.encode("utf-8")
+        lo, hi = 0, self.symbol_count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            start, end = self._offsets[mid], self._offsets[mid + 1]
+            if self._map[self._blob_pos + start:self._blob_pos + end] < target:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo if lo < self.symbol_count and self.symbol(lo) == symbol else None
+
+    def triple(self, index: int) -> Triple:
+        obj = self.objects[index]
+        return (self.symbol(self.subjects[index]), self.symbol(self.predicates[index]),
+                None if obj == NO_OBJECT else self.symbol(obj))
+
+    def __iter__(self) -> Iterator[Triple]:
+        for index in range(self.triple_count):
+            yield self.triple(index)
+
+    def __len__(self):
+        return self.triple_count
+
+    def close(self):
+        for view in ("_offsets", "subjects", "predicates", "objects"):
+            if isinstance(getattr(self, view, None), memoryview):
+                getattr(self, view).release()
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def metta_to_columnar(source: str, target: str, order: str = "pso") -> Tuple[int, int]:
+    """Convert a .metta text file; returns (triples written, lines skipped)."""
+    skipped = 0
+
+    def triples():
+        nonlocal skipped
+        with open(source, "r", encoding="utf-8", errors="replace") as f:
+            for line in f:
+                triple = parse_metta_line(line, order)
+                if triple is None:
+                    if line.strip() and not line.lstrip().startswith(";"):
+                        skipped += 1
+                    continue
+                yield triple
+
+    return write_columnar(triples(), target, order), skipped
+
+
+def columnar_to_metta(source: str, target: str) -> int:
+    with ColumnarTriples(source) as columnar, open(target, "w", encoding="utf-8") as f:
+        for triple in columnar:
+            f.write(format_metta_line(triple, columnar.order) + "\n")
+        return len(columnar)
+
+
+def store_to_columnar(target: str) -> int:
+    """Export the triple store (see app.services.triple_store) in (predicate subject object) order."""
+    from app.services.triple_store import UNARY, get_triple_store
+    store = get_triple_store()
+    triples = (store.triple(row) for row in range(len(store)))
+    return write_columnar(((s, p, None if o == UNARY else o) for s, p, o in triples), target)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Convert between .metta text and the columnar triple format")
+    commands = parser.add_subparsers(dest="command", required=True)
+    to_columnar = commands.add_parser("to-columnar", help=".metta text -> columnar")
+    to_columnar.add_argument("source")
+    to_columnar.add_argument("target")
+    to_columnar.add_argument("--order", choices=ORDERS, default="pso",
+                             help="Atom shape of the text: pso = (predicate subject object), "
+                                  "spo = (subject predicate object) as written by METTAWriter")
+    to_metta = commands.add_parser("to-metta", help="columnar -> .metta text")
+    to_metta.add_argument("source")
+    to_metta.add_argument("target")
+    from_store = commands.add_parser("from-store", help="triple store -> columnar")
+    from_store.add_argument("target")
+    args = parser.parse_args(argv)
+
+    if args.command == "to-columnar":
+        count, skipped = metta_to_columnar(args.source, args.target, args.order)
+        print(f"Wrote {count} triples to {args.target} ({skipped} non-triple lines skipped)")
+    elif args.command == "to-metta":
+        print(f"Wrote {columnar_to_metta(args.source, args.target)} atoms to {args.target}")
+    else:
+        print(f"Wrote {store_to_columnar(args.target)} triples to {args.target}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
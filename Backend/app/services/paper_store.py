@@ -0,0 +1,227 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional
+from app.utils.metrics import record_cache_lookup
+
+
+class PaperStore:
+    """
+    Local content store for arXiv papers keyed on the versioned arXiv id.
+
+    Each paper gets a directory holding its metadata, the downloaded PDF and
+    the extracted page text. Search results are stored as lists of paper ids;
+    they are stale after `search_ttl` seconds and at most `max_searches` are
+    kept. Total size is capped and the least recently used papers are evicted
+    first, except those `pinned` while a caller reads their files.
+    Reads only update access times in memory; the index is written with the
+    next write or eviction, or at most every INDEX_SAVE_INTERVAL seconds.
+    """
+
+    INDEX_FILE = "index.json"
+    INDEX_SAVE_INTERVAL = 60.0
+
+    def __init__(self, root: str = "./paper_cache", max_bytes: int = 2 * 1024 ** 3,
+                 search_ttl: float = 7 * 24 * 3600, max_searches: int = 1000):
+        self.root = Path(root)
+        self.papers_dir = self.root / "papers"
+        self.papers_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.search_ttl = search_ttl
+        self.max_searches = max_searches
+        self._lock = threading.RLock()
+        self._pinned: Counter = Counter()
+        self._index = self._load_index()
+        self._dirty = False
+        self._saved_at = time.monotonic()
+        self.logger = lambda msg: print(f"[PaperStore] {msg}")
+
+    # Search results
+
+    def get_search(self, query: str, max_results: int, allow_stale: bool = False) -> Optional[List[Dict]]:
+        """
+        Return cached metadata for a search, or None if any paper is missing
+        or the results are older than `search_ttl` (unless `allow_stale`)
+        """
+        with self._lock:
+            entry = self._index["searches"].get(self._search_key(query, max_results))
+            if entry and not allow_stale and time.time() - entry.get("created", 0) > self.search_ttl:
+                entry = None
+            papers = [self.get_metadata(paper_id) for paper_id in entry["ids"]] if entry else None
+            if papers is None or any(p is None for p in papers):
+                record_cache_lookup("paper_search", hit=False)
+                return None
+            record_cache_lookup("paper_search", hit=True)
+            entry["last_access"] = time.time()
+            self._mark_dirty()
+            return papers
+
+    def put_search(self, query: str, max_results: int, papers: List[Dict]):
+        with self._lock:
+            for paper in papers:
+                self.put_metadata(paper["paper_id"], paper)
+            now = time.time()
+            self._index["searches"][self._search_key(query, max_results)] = {
+                "query": query,
+                "ids": [paper["paper_id"] for paper in papers],
+                "created": now,
+                "last_access": now,
+            }
+            self._evict()
+            self._save_index()
+
+    @contextmanager
+    def pinned(self, paper_id: str):
+        """Keep the paper from being evicted while its files are in use, e.g. a PDF being read"""
+        with self._lock:
+            self._pinned[paper_id] += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._pinned[paper_id] -= 1
+                if not self._pinned[paper_id]:
+                    del self._pinned[paper_id]
+
+    # Per-paper content
+
+    def get_metadata(self, paper_id: str) -> Optional[Dict]:
+        return self._read_json(paper_id, "metadata.json")
+
+    def put_metadata(self, paper_id: str, metadata: Dict):
+        self._write_json(paper_id, "metadata.json", metadata)
+
+    def get_pages(self, paper_id: str) -> Optional[List[str]]:
+        pages = self._read_json(paper_id, "pages.json")
+        record_cache_lookup("paper_pages", hit=pages is not None)
+        return pages
+
+    def put_pages(self, paper_id: str, pages: List[str]):
+        self._write_json(paper_id, "pages.json", pages)
+
+    def get_pdf_path(self, paper_id: str) -> Optional[Path]:
+        """Path of the stored PDF; hold `pinned(paper_id)` while using it"""
+        with self._lock:
+            path = self._paper_dir(paper_id) / "paper.pdf"
+            record_cache_lookup("paper_pdf", hit=path.exists())
+            if not path.exists():
+                return None
+            self._accessed(paper_id)
+            return path
+
+    def put_pdf(self, paper_id: str, source: Path) -> Path:
+        """Move a downloaded PDF into the store"""
+        with self._lock:
+            target = self._paper_dir(paper_id, create=True) / "paper.pdf"
+            shutil.move(str(source), target)
+            self._touch(paper_id)
+            return target
+
+    # Internals
+
+    def _read_json(self, paper_id: str, name: str):
+        with self._lock:
+            path = self._paper_dir(paper_id) / name
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+            except (FileNotFoundError, json.JSONDecodeError):
+                return None
+            self._accessed(paper_id)
+            return data
+
+    def _write_json(self, paper_id: str, name: str, data):
+        with self._lock:
+            path = self._paper_dir(paper_id, create=True) / name
+            tmp = path.with_suffix(".tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp, path)
+            self._touch(paper_id)
+
+    def _paper_dir(self, paper_id: str, create: bool = False) -> Path:
+        path = self.papers_dir / paper_id.replace("/", "_")
+        if create:
+            path.mkdir(exist_ok=True)
+        return path
+
+    def _touch(self, paper_id: str):
+        """After a write: re-measure the paper, evict over the cap and save the index"""
+        size = sum(f.stat().st_size for f in self._paper_dir(paper_id).glob("*") if f.is_file())
+        self._index["papers"][paper_id] = {"size": size, "last_access": time.time()}
+        self._evict()
+        self._save_index()
+
+    def _accessed(self, paper_id: str):
+        """After a read: only the access time changes, saved later"""
+        entry = self._index["papers"].get(paper_id)
+        if entry is None:
+            # Present on disk but not in the index (e.g. an index written by another process)
+            self._touch(paper_id)
+            return
+        entry["last_access"] = time.time()
+        self._mark_dirty()
+
+    def _mark_dirty(self):
+        self._dirty = True
+        if time.monotonic() - self._saved_at >= self.INDEX_SAVE_INTERVAL:
+            self._save_index()
+
+    def flush(self):
+        """Write access times recorded since the last save"""
+        with self._lock:
+            if self._dirty:
+                self._save_index()
+
+    def _evict(self):
+        papers = self._index["papers"]
+        total = sum(entry["size"] for entry in papers.values())
+        # Never evict the entry that was just touched, nor papers in use
+        for paper_id, entry in sorted(papers.items(), key=lambda item: item[1]["last_access"])[:-1]:
+            if total <= self.max_bytes:
+                break
+            if paper_id in self._pinned:
+                continue
+            shutil.rmtree(self._paper_dir(paper_id), ignore_errors=True)
+            total -= entry["size"]
+            del papers[paper_id]
+            self.logger(f"Evicted {paper_id}")
+
+        # Searches whose papers are gone cannot be answered any more; beyond the
+        # cap the least recently used go first
+        searches = self._index["searches"]
+        for key in [key for key, entry in searches.items() if any(i not in papers for i in entry["ids"])]:
+            del searches[key]
+        excess = len(searches) - self.max_searches
+        if excess > 0:
+            for key, _ in sorted(searches.items(), key=lambda item: item[1]["last_access"])[:excess]:
+                del searches[key]
+
+    def _load_index(self) -> Dict:
+        try:
+            with open(self.root / self.INDEX_FILE, "r", encoding="utf-8") as f:
+                index = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            index = {}
+        index.setdefault("papers", {})
+        index.setdefault("searches", {})
+        return index
+
+    def _save_index(self):
+        tmp = self.root / f"{self.INDEX_FILE}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self._index, f)
+        os.replace(tmp, self.root / self.INDEX_FILE)
+        self._dirty = False
+        self._saved_at = time.monotonic()
+
+    @staticmethod
+    def _search_key(query: str, max_results: int) -> str:
+        normalized = " ".join(query.lower().split())
+        return hashlib.sha256(f"{normalized}|{max_results}".encode()).hexdigest()
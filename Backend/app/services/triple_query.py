@@ -0,0 +1,152 @@
+"""
+MeTTa-style pattern queries over the triple store.
+
+A pattern is one or more clauses in the `(predicate subject object)` shape
+that `convert_predicate_to_metta` produces, or `(predicate argument)` for
+one-argument predicates. Terms starting with `$` are variables; clauses
+sharing a variable are joined, either written one after another or as a
+MeTTa conjunction `(, clause ...)`:
+
+    (regulates $x TP53)
+    (, (regulates $x TP53) (inhibits $y $x))
+
+    python -m app.services.triple_query '(regulates $x TP53) (inhibits $y $x)' --limit 20
+"""
+import re
+import sys
+import json
+import argparse
+from itertools import islice
+from typing import Dict, Iterator, List, Optional, Tuple
+from app.services.triple_store import TripleStore, UNARY, get_triple_store
+
+MAX_CLAUSES = 8
+TOKEN_PATTERN = re.compile(r'\(|\)|[^\s()]+')
+VARIABLE_PATTERN = re.compile(r'^\$[A-Za-z_][\w-]*$')
+
+# (subject, predicate, object); variables keep their "$"
+Clause = Tuple[str, str, str]
+
+
+def is_variable(term: str) -> bool:
+    return term.startswith("$")
+
+
+def _read_expressions(text: str) -> List:
+    stack: List[List] = [[]]
+    for token in TOKEN_PATTERN.findall(text):
+        if token == "(":
+            stack.append([])
+        elif token == ")":
+            if len(stack) == 1:
+                raise ValueError("Unbalanced ')' in pattern")
+            expression = stack.pop()
+            stack[-1].append(expression)
+        else:
+            stack[-1].append(token)
+    if len(stack) != 1:
+        raise ValueError("Unbalanced '(' in pattern")
+    return stack[0]
+
+
+def parse_pattern(text: str) -> List[Clause]:
+    """Parse a pattern into clauses; raises ValueError with a user-facing message."""
+    expressions = _read_expressions(text)
+    if len(expressions) == 1 and isinstance(expressions[0], list) and expressions[0][:1] == [","]:
+        expressions = expressions[0][1:]
+    if not expressions:
+        raise ValueError("Pattern has no clauses")
+    if len(expressions) > MAX_CLAUSES:
+        raise ValueError(f"Pattern has more than {MAX_CLAUSES} clauses")
+
+    clauses = []
+    for expression in expressions:
+        if not isinstance(expression, list) or not 2 <= len(expression) <= 3 \
+                or any(isinstance(term, list) for term in expression):
+            raise ValueError(f"Clauses must be (predicate subject object) or (predicate argument): {expression}")
+        for term in expression:
+            if is_variable(term) and not VARIABLE_PATTERN.match(term):
+                raise ValueError(f"Invalid variable name: {term}")
+        predicate, subject = expression[0], expression[1]
+        obj = expression[2] if len(expression) == 3 else UNARY
+        clauses.append((subject, predicate, obj))
+    return clauses
+
+
+def _bind(clause: Clause, bindings: Dict[str, str]) -> Tuple[Optional[str], ...]:
+    return tuple(bindings.get(term) if is_variable(term) else term for term in clause)
+
+
+def _unify(clause: Clause, triple: Tuple[str, str, str], bindings: Dict[str, str]) -> Optional[Dict[str, str]]:
+    extended = dict(bindings)
+    for term, value in zip(clause, triple):
+        if is_variable(term):
+            if value == UNARY:
+                # (predicate $x $y) does not match one-argument facts
+                return None
+            if extended.setdefault(term, value) != value:
+                # Same variable twice in one clause, e.g. (interacts_with $x $x)
+                return None
+    return extended
+
+
+def solve(store: TripleStore, clauses: List[Clause], bindings: Optional[Dict[str, str]] = None) -> Iterator[Dict[str, str]]:
+    """
+    Yield variable bindings satisfying every clause.
+
+    Index nested-loop join: at each step the remaining clause with the fewest
+    matches under the current bindings (an index range count) is evaluated
+    next, and its matches bind variables for the clauses after it.
+    """
+    bindings = bindings or {}
+    if not clauses:
+        yield bindings
+        return
+    patterns = [_bind(clause, bindings) for clause in clauses]
+    counts = [store.count(*pattern) for pattern in patterns]
+    best = min(range(len(clauses)), key=counts.__getitem__)
+    if counts[best] == 0:
+        return
+    rest = clauses[:best] + clauses[best + 1:]
+    for triple in store.match(*patterns[best]):
+        extended = _unify(clauses[best], triple, bindings)
+        if extended is not None:
+            yield from solve(store, rest, extended)
+
+
+def run_query(clauses: List[Clause], offset: int = 0, limit: int = 100,
+              store: Optional[TripleStore] = None) -> Iterator[Tuple[str, Dict]]:
+    """
+    Yield ("result", {"bindings": {...}}) events for one page of solutions,
+    then ("page", {...}) with `next_offset` (None on the last page).
+    """
+    store = store or get_triple_store()
+    returned = 0
+    solutions = islice(solve(store, clauses), offset, None)
+    for bindings in islice(solutions, limit):
+        returned += 1
+        yield "result", {"bindings": {name[1:]: value for name, value in bindings.items()}}
+    # One solution past the page tells whether there is a next one
+    more = next(solutions, None) is not None
+    yield "page", {"offset": offset, "limit": limit, "returned": returned,
+                   "next_offset": offset + returned if more else None}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Query the triple store with a MeTTa-style pattern")
+    parser.add_argument("pattern", help='e.g. "(regulates $x TP53)"')
+    parser.add_argument("--offset", type=int, default=0)
+    parser.add_argument("--limit", type=int, default=100)
+    args = parser.parse_args(argv)
+
+    try:
+        clauses = parse_pattern(args.pattern)
+    except ValueError as e:
+        parser.error(str(e))
+    for event, data in run_query(clauses, args.offset, args.limit):
+        print(json.dumps({"event": event, "data": data}, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
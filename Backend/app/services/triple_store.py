@@ -0,0 +1,459 @@
+import os
+import json
+import bisect
+import pickle
+import logging
+import threading
+from array import array
+try:
+    import fcntl
+except ImportError:  # Windows: appends are still one write each, but not locked
+    fcntl = None
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from app.core.config import config
+from app.services.fol_to_metta import convert_predicate_to_metta
+
+# Object of one-argument predicates: (has_tissue GSE1) is stored as (GSE1 has_tissue "")
+UNARY = ""
+
+# Index name -> positions of (subject, predicate, object) in its sort order
+ORDERS = {"spo": (0, 1, 2), "pos": (1, 2, 0), "osp": (2, 0, 1)}
+
+Triple = Tuple[str, str, str]
+
+
+def parse_atom(line: str) -> Optional[Triple]:
+    """(predicate subject object) or (predicate argument) -> (subject, predicate, object)."""
+    line = line.strip()
+    if not (line.startswith("(") and line.endswith(")")):
+        return None
+    parts = line[1:-1].split(None, 2)
+    if len(parts) == 3:
+        return parts[1], parts[0], parts[2]
+    if len(parts) == 2:
+        return parts[1], parts[0], UNARY
+    return None
+
+
+def predicate_triple(predicate: str) -> Optional[Triple]:
+    """predicate(subject, object) / predicate(argument) -> (subject, predicate, object)."""
+    return parse_atom(convert_predicate_to_metta(predicate))
+
+
+def predicate_records(predicates: Iterable[str], **provenance) -> List[Tuple]:
+    """Store records for FOL predicate strings, skipping ones that do not parse."""
+    return [(*triple, provenance) for triple in map(predicate_triple, predicates) if triple]
+
+
+def atom_records(atoms: Iterable[str], **provenance) -> List[Tuple]:
+    """Store records for MeTTa atoms such as GSM instance declarations."""
+    return [(*triple, provenance) for triple in map(parse_atom, atoms) if triple]
+
+
+class SymbolTable:
+    """Interns strings to dense integer ids."""
+
+    def __init__(self):
+        self._ids: Dict[str, int] = {}
+        self._symbols: List[str] = []
+
+    def intern(self, symbol: str) -> int:
+        symbol_id = self._ids.get(symbol)
+        if symbol_id is None:
+            symbol_id = self._ids[symbol] = len(self._symbols)
+            self._symbols.append(symbol)
+        return symbol_id
+
+    def lookup(self, symbol: str) -> Optional[int]:
+        return self._ids.get(symbol)
+
+    def symbol(self, symbol_id: int) -> str:
+        return self._symbols[symbol_id]
+
+    def __len__(self):
+        return len(self._symbols)
+
+
+def _to_array(values) -> array:
+    result = array("i")
+    result.frombytes(values.tobytes())
+    return result
+
+
+class TripleIndex:
+    """
+    One sort order of the triples as parallel integer arrays.
+
+    `keys[i]` holds the i-th component (in index order) of every triple,
+    sorted lexicographically, so a bound prefix is a contiguous range found
+    with C-level bisects and no key function.
+    """
+
+    def __init__(self, order: Tuple[int, int, int]):
+        self.order = order
+        self.keys = (array("i"), array("i"), array("i"))
+        self.rows = array("i")
+
+    def rebuild(self, columns: Tuple[array, array, array]):
+        import numpy as np  # deferred: only needed once triples are indexed
+        dtype = np.dtype(f"i{columns[0].itemsize}")
+        a, b, c = (np.frombuffer(columns[position], dtype=dtype) for position in self.order)
+        if len(a) and max(a.max(), b.max(), c.max()) < 1 << 21:
+            # Triples are distinct, so one packed 63-bit key per triple sorts them (several times faster)
+            key = (a.astype(np.int64) << 42) | (b.astype(np.int64) << 21) | c
+            rows = np.argsort(key).astype(dtype)
+        else:
+            # lexsort sorts on the last key first
+            rows = np.lexsort((c, b, a)).astype(dtype)
+        self.keys = tuple(_to_array(column[rows]) for column in (a, b, c))
+        self.rows = _to_array(rows)
+
+    def insert(self, triple: Tuple[int, int, int], row: int):
+        key = tuple(triple[position] for position in self.order)
+        lo, hi = self.range(key[:2])
+        at = bisect.bisect_left(self.keys[2], key[2], lo, hi)
+        for keys, value in zip(self.keys, key):
+            keys.insert(at, value)
+        self.rows.insert(at, row)
+
+    def range(self, prefix: Tuple[int, ...]) -> Tuple[int, int]:
+        lo, hi = 0, len(self.rows)
+        for keys, value in zip(self.keys, prefix):
+            lo, hi = bisect.bisect_left(keys, value, lo, hi), bisect.bisect_right(keys, value, lo, hi)
+            if lo == hi:
+                break
+        return lo, hi
+
+
+class TripleStore:
+    """
+    Embedded store of (subject, predicate, object) triples with provenance.
+
+    Symbols are interned to integer ids and every triple is indexed in SPO,
+    POS and OSP order, so any pattern with at least one bound position is
+    answered by bisecting one index. Triples added since the last query are
+    merged into the indexes on the next query.
+
+    Each triple keeps the distinct provenance records it was seen with
+    (source, GSE, PMID, chunk, model, ...). With a `directory`, every batch
+    is appended to `triples.ndjson` there under an exclusive file lock, and
+    each query first reads whatever other processes (uvicorn workers, batch
+    runs) appended since the last one, so all of them answer from the same
+    triples.
+
+    Once the log passes `compact_bytes`, the whole store is written to
+    `snapshot.pickle` and the log is emptied, so opening the store loads the
+    snapshot and replays only what was appended after it. Other processes
+    notice the new snapshot and reload from it.
+    """
+
+    LOG_FILE = "triples.ndjson"
+    SNAPSHOT_FILE = "snapshot.pickle"
+
+    def __init__(self, directory: Optional[str] = None, compact_bytes: Optional[int] = None):
+        self.directory = directory
+        self.compact_bytes = config.TRIPLE_STORE_COMPACT_BYTES if compact_bytes is None else compact_bytes
+        self._lock = threading.RLock()
+        self._reset()
+        self._snapshot_id = None
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+            self._log_path = os.path.join(directory, self.LOG_FILE)
+            self._snapshot_path = os.path.join(directory, self.SNAPSHOT_FILE)
+            self._sync()
+
+    def _reset(self):
+        self.symbols = SymbolTable()
+        self._columns = (array("i"), array("i"), array("i"))
+        self._indexes = {name: TripleIndex(order) for name, order in ORDERS.items()}
+        self._pending: Dict[Tuple[int, int, int], int] = {}
+        self._provenance: List[Dict] = []
+        self._provenance_ids: Dict[Tuple, int] = {}
+        self._triple_provenance: Dict[int, List[int]] = {}
+        self._log_offset = 0
+
+    # Ingestion
+
+    def add(self, records: Iterable[Tuple[str, str, str, Optional[Dict]]]) -> int:
+        """Add (subject, predicate, object, provenance) records as one batch; returns new triples."""
+        records = [record for record in records if record and record[0] and record[1]]
+        if not records:
+            return 0
+        with self._lock:
+            if self.directory:
+                # Logs first, taking in other workers' batches, so `added` counts only what is new
+                self._append_log(records)
+            added = self._add(records)
+            if self.directory and self.compact_bytes and self._log_offset > self.compact_bytes:
+                self.compact()
+            return added
+
+    def add_triples(self, triples: Iterable[Triple], **provenance) -> int:
+        """Add triples sharing one provenance, e.g. add_triples(triples, source="paper", paper=...)."""
+        return self.add((s, p, o, provenance) for s, p, o in triples)
+
+    def _add(self, records) -> int:
+        added = 0
+        for subject, predicate, obj, provenance in records:
+            key = (self.symbols.intern(subject), self.symbols.intern(predicate), self.symbols.intern(obj))
+            row = self._find(key)
+            if row is None:
+                row = len(self._columns[0])
+                for column, value in zip(self._columns, key):
+                    column.append(value)
+                self._pending[key] = row
+                added += 1
+            if provenance:
+                provenance_id = self._intern_provenance(provenance)
+                sources = self._triple_provenance.setdefault(row, [])
+                if provenance_id not in sources:
+                    sources.append(provenance_id)
+        return added
+
+    def _intern_provenance(self, provenance: Dict) -> int:
+        key = tuple(sorted((k, v) for k, v in provenance.items() if v is not None))
+        provenance_id = self._provenance_ids.get(key)
+        if provenance_id is None:
+            provenance_id = self._provenance_ids[key] = len(self._provenance)
+            self._provenance.append(dict(key))
+        return provenance_id
+
+    def _find(self, key: Tuple[int, int, int]) -> Optional[int]:
+        row = self._pending.get(key)
+        if row is None:
+            index = self._indexes["spo"]
+            lo, hi = index.range(key)
+            if lo < hi:
+                row = index.rows[lo]
+        return row
+
+    # Persistence
+
+    def _append_log(self, records):
+        data = (json.dumps({"records": [list(record) for record in records]}, ensure_ascii=False) + "\n").encode("utf-8")
+        fd = os.open(self._log_path, os.O_RDWR | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            if fcntl:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            # Take in other writers' batches first, so the offset can move past our own
+            self._read_log(fd)
+            size = os.fstat(fd).st_size
+            if size and os.pread(fd, 1, size - 1) != b"\n":
+                # A batch cut short by a crash: end it, so it does not swallow this one
+                data = b"\n" + data
+            view = memoryview(data)
+            while view:
+                view = view[os.write(fd, view):]
+            self._log_offset = os.fstat(fd).st_size
+        finally:
+            os.close(fd)  # releases the lock
+
+    def _sync(self):
+        """Apply batches appended to the log (by any process) since the last read."""
+        if not self.directory:
+            return
+        try:
+            if (os.path.getsize(self._log_path) == self._log_offset
+                    and self._snapshot_identity() == self._snapshot_id):
+                return
+        except FileNotFoundError:
+            pass
+        fd = os.open(self._log_path, os.O_RDONLY | os.O_CREAT, 0o644)
+        try:
+            if fcntl:
+                fcntl.flock(fd, fcntl.LOCK_SH)
+            self._read_log(fd)
+        finally:
+            os.close(fd)
+
+    def _snapshot_identity(self) -> Optional[Tuple[int, int, int]]:
+        try:
+            stat = os.stat(self._snapshot_path)
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def _load_snapshot(self):
+        """Reload from the snapshot if another one was written; the caller holds a lock on the log."""
+        identity = self._snapshot_identity()
+        if identity == self._snapshot_id:
+            return
+        self._reset()
+        if identity is not None:
+            with open(self._snapshot_path, "rb") as f:
+                state = pickle.load(f)
+            for symbol in state["symbols"]:
+                self.symbols.intern(symbol)
+            self._columns = tuple(state["columns"])
+            for provenance in state["provenance"]:
+                self._intern_provenance(provenance)
+            self._triple_provenance = state["triple_provenance"]
+            for index in self._indexes.values():
+                index.rebuild(self._columns)
+        self._snapshot_id = identity
+
+    def compact(self):
+        """Write the whole store to the snapshot and empty the log."""
+        if not self.directory:
+            return
+        with self._lock:
+            fd = os.open(self._log_path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                if fcntl:
+                    fcntl.flock(fd, fcntl.LOCK_EX)
+                self._read_log(fd)
+                state = {
+                    "symbols": self.symbols._symbols,
+                    "columns": self._columns,
+                    "provenance": self._provenance,
+                    "triple_provenance": self._triple_provenance,
+                }
+                tmp = f"{self._snapshot_path}.tmp"
+                with open(tmp, "wb") as f:
+                    pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp, self._snapshot_path)
+                # A crash before this truncate only replays batches the snapshot has; adding is idempotent
+                os.ftruncate(fd, 0)
+                self._snapshot_id = self._snapshot_identity()
+                self._log_offset = 0
+            finally:
+                os.close(fd)
+
+    def _read_log(self, fd: int):
+        self._load_snapshot()
+        size = os.fstat(fd).st_size
+        if size < self._log_offset:
+            logging.warning(f"{self._log_path} shrank below the part already loaded; not re-reading it")
+            return
+        data = os.pread(fd, size - self._log_offset, self._log_offset)
+        # Only complete lines; a trailing partial one is still being written or was cut by a crash
+        end = data.rfind(b"\n") + 1
+        for line in data[:end].splitlines():
+            if not line.strip():
+                continue
+            try:
+                self._add(json.loads(line)["records"])
+            except (ValueError, KeyError, TypeError) as e:
+                logging.warning(f"Skipping an unreadable batch in {self._log_path} ({len(line)} bytes): {e}")
+        self._log_offset += end
+
+    # Queries
+
+    def _ensure_indexed(self):
+        with self._lock:
+            self._sync()
+            if not self._pending:
+                return
+            # A few new triples are inserted in place (memmove), a large batch re-sorts
+            if len(self._pending) * 64 < len(self._columns[0]):
+                for key, row in self._pending.items():
+                    for index in self._indexes.values():
+                        index.insert(key, row)
+            else:
+                for index in self._indexes.values():
+                    index.rebuild(self._columns)
+            self._pending = {}
+
+    def _pattern(self, subject, predicate, obj) -> Optional[Tuple[Optional[int], ...]]:
+        ids = []
+        for symbol in (subject, predicate, obj):
+            if symbol is None:
+                ids.append(None)
+            else:
+                symbol_id = self.symbols.lookup(symbol)
+                if symbol_id is None:
+                    return None
+                ids.append(symbol_id)
+        return tuple(ids)
+
+    def _plan(self, pattern: Tuple[Optional[int], ...]) -> Tuple[TripleIndex, Tuple[int, ...]]:
+        # The index whose order starts with the longest run of bound positions
+        best, best_prefix = self._indexes["spo"], ()
+        for index in self._indexes.values():
+            prefix = []
+            for position in index.order:
+                if pattern[position] is None:
+                    break
+                prefix.append(pattern[position])
+            if len(prefix) > len(best_prefix):
+                best, best_prefix = index, tuple(prefix)
+        return best, best_prefix
+
+    def match_rows(self, subject: Optional[str] = None, predicate: Optional[str] = None,
+                   obj: Optional[str] = None) -> Iterator[int]:
+        """Row ids of triples matching the pattern; None is a wildcard."""
+        with self._lock:
+            # Index first: other workers' batches may bring the symbols in
+            self._ensure_indexed()
+            pattern = self._pattern(subject, predicate, obj)
+            if pattern is None:
+                return
+            index, prefix = self._plan(pattern)
+            lo, hi = index.range(prefix)
+            # Copy the range so concurrent ingestion cannot shift it under the caller
+            rows = index.rows[lo:hi]
+        yield from rows
+
+    def match(self, subject: Optional[str] = None, predicate: Optional[str] = None,
+              obj: Optional[str] = None) -> Iterator[Triple]:
+        """Triples matching the pattern, e.g. match(predicate="regulates", obj="TP53")."""
+        for row in self.match_rows(subject, predicate, obj):
+            yield self.triple(row)
+
+    def count(self, subject: Optional[str] = None, predicate: Optional[str] = None,
+              obj: Optional[str] = None) -> int:
+        """Number of matching triples, from index bounds only."""
+        with self._lock:
+            # Index first: other workers' batches may bring the symbols in
+            self._ensure_indexed()
+            pattern = self._pattern(subject, predicate, obj)
+            if pattern is None:
+                return 0
+            index, prefix = self._plan(pattern)
+            lo, hi = index.range(prefix)
+        return hi - lo
+
+    def triple(self, row: int) -> Triple:
+        symbol = self.symbols.symbol
+        return tuple(symbol(column[row]) for column in self._columns)
+
+    def provenance(self, row: int) -> List[Dict]:
+        return [self._provenance[i] for i in self._triple_provenance.get(row, ())]
+
+    def stats(self) -> Dict:
+        with self._lock:
+            self._sync()
+        return {
+            "triples": len(self._columns[0]),
+            "symbols": len(self.symbols),
+            "provenance_records": len(self._provenance),
+            "unindexed": len(self._pending),
+        }
+
+    def __len__(self):
+        return len(self._columns[0])
+
+
+_lock = threading.Lock()
+_store: Optional[TripleStore] = None
+
+
+def get_triple_store() -> TripleStore:
+    """Process-wide store at `config.TRIPLE_STORE_DIR` (in memory when it is empty)."""
+    global _store
+    directory = config.TRIPLE_STORE_DIR or None
+    with _lock:
+        if _store is None or _store.directory != directory:
+            _store = TripleStore(directory)
+        return _store
+
+
+def ingest_records(records: List[Tuple]) -> int:
+    """Add one pipeline run's records as a batch; a store failure never fails the pipeline."""
+    try:
+        return get_triple_store().add(records)
+    except Exception:
+        logging.exception("Failed to add triples to the triple store")
+        return 0
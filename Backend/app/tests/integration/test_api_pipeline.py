@@ -7,16 +7,16 @@ client = TestClient(app)
 KNOWN_GSE_ID = "GSE12272"
 
 @pytest.mark.integration
-def test_pipeline_endpoint_returns_valid_predicates():
-    response = client.get(f"/pipeline/{KNOWN_GSE_ID}")
-    
-    assert response.status_code == 200, "Pipeline endpoint did not return 200"
-    
-    json_response = response.json()
-    assert "result" in json_response, "No 'result' key in response"
+def test_process_endpoint_streams_predicates_over_websocket():
+    with client.websocket_connect("/ws/integration-test") as websocket:
+        response = client.post("/process", params={"client_id": "integration-test", "gse_id": KNOWN_GSE_ID})
 
-    predicates = json_response["result"]
-    assert isinstance(predicates, str), "Predicates should be returned as a string"
-    assert len(predicates) > 10, "Result string too short, may indicate failure"
+        assert response.status_code == 200, "Process endpoint did not return 200"
+        assert response.json() == {"status": "ok"}
 
-    print("Returned predicates:\n", predicates)
+        messages = []
+        while not messages or messages[-1] != "Done ":
+            messages.append(websocket.receive_text())
+
+    assert any("abstract_predicates" in message for message in messages), "No abstract predicates received"
+    print("Received messages:\n", "\n".join(messages))
@@ -2,6 +2,9 @@ from app.services.fol_to_metta import (
     convert_predicate_to_metta,
     convert_all_to_metta,
     split_predicates,
+    PredicateSplitter,
+    iter_metta_records,
+    format_metta_record,
 )
 
 def test_convert_predicate_to_metta_two_args():
@@ -22,3 +25,30 @@ def test_split_predicates():
     text = "likes(Alice, Bob) Organism(Drosophila) Parent(joshua, Mike)"
     result = split_predicates(text)
     assert result == ["likes(Alice, Bob)", " Organism(Drosophila)", " Parent(joshua, Mike)"]
+
+def test_predicate_splitter_matches_split_predicates_across_chunks():
+    text = "likes(Alice, Bob) Organism(Drosophila) junk((x) Parent(joshua, Mike) tail("
+    expected = split_predicates(text)
+    for size in (1, 3, 7, len(text)):
+        splitter = PredicateSplitter()
+        result = []
+        for i in range(0, len(text), size):
+            result.extend(splitter.feed(text[i:i + size]))
+        assert result == expected
+
+def test_predicate_splitter_matches_split_predicates_after_long_prose():
+    prose = "The cells were incubated overnight. " * 2000
+    text = prose + "In these cells p binds(p53, MDM2)\nregulates(MDM2, p53) tail(x"
+    expected = split_predicates(text)
+    for size in (1, 7, 4096):
+        splitter = PredicateSplitter(max_pending=256)
+        result = []
+        for i in range(0, len(text), size):
+            result.extend(splitter.feed(text[i:i + size]))
+        assert result == expected
+
+def test_iter_metta_records_flags_invalid_lines():
+    records = list(iter_metta_records(["likes(Alice, B", "ob) bad(x!)"]))
+    assert [r["metta"] for r in records] == ["(likes Alice Bob)", "(bad x!)"]
+    assert [r["valid"] for r in records] == [True, False]
+    assert format_metta_record(records[1], "text") == "; Invalid MeTTa: (bad x!)\n"
@@ -0,0 +1,63 @@
+import json
+from app.core.config import config
+from app.batch import run_gse_batch
+from app.services.triple_store import get_triple_store
+from app.benchmarks.fakes import FakeAIClient, install_fake_ai_client, uninstall_fake_ai_client
+from app.benchmarks.stubs import StandInServer
+from app.benchmarks.synthetic import write_soft_file
+
+
+def test_batch_shares_lookups_and_resumes(tmp_path, monkeypatch):
+    data_dir = tmp_path / "data"
+    for gse_id in ("GSE900001", "GSE900002"):
+        write_soft_file(str(data_dir), gse_id, samples=3, rows=20, donors=2)
+    output_dir = tmp_path / "out"
+    messages = []
+
+    with StandInServer() as server:
+        monkeypatch.setattr(config, "MEDCAT_URL", server.medcat_url)
+        monkeypatch.setattr(config, "EUTILS_BASE_URL", server.eutils_base_url)
+        monkeypatch.setattr(config, "GEO_DATA_DIR", str(data_dir))
+        monkeypatch.setattr(config, "TRIPLE_STORE_DIR", str(tmp_path / "triples"))
+        monkeypatch.setattr(config, "CACHE_PATH", str(tmp_path / "cache.sqlite3"))
+        install_fake_ai_client(FakeAIClient(latency=0))
+        try:
+            summary = run_gse_batch(["GSE900001", "GSE900002", "bogus"], str(output_dir),
+                                    concurrency=2, send_progress=messages.append)
+            # esearch + esummary + efetch for the whole batch, one MedCAT bulk call
+            # plus the /api/info lookup that keys the annotation cache
+            assert server.requests["eutils"] == 3
+            assert server.requests["medcat"] == 2
+
+            rerun = run_gse_batch(["GSE900001", "GSE900002"], str(output_dir))
+            assert server.requests["eutils"] == 3
+        finally:
+            uninstall_fake_ai_client()
+
+    assert summary["counts"] == {"ok": 2, "failed": 1}
+    assert rerun["counts"] == {"ok": 2, "failed": 1}
+    status = json.loads((output_dir / "status.json").read_text())
+    assert status["series"]["BOGUS"]["error"] == "Invalid GSE ID"
+    result = json.loads((output_dir / "GSE900002.json").read_text())
+    assert result["abstract_predicates"] and result["gse_metadata_predicates"]
+    assert any("batch_status" in json.loads(m) for m in messages)
+    store = get_triple_store()
+    sources = {p["source"] for row in range(len(store)) for p in store.provenance(row)}
+    assert sources == {"abstract", "gse_metadata"}
+
+
+def test_failed_lookup_batches_are_recorded_per_series(monkeypatch):
+    from types import SimpleNamespace
+    from app.batch import prefetch_articles
+    from app.services import abstract_loader
+
+    def refused(*args, **kwargs):
+        raise ConnectionError("connection refused")
+
+    monkeypatch.setattr(abstract_loader, "http_session", lambda: SimpleNamespace(get=refused))
+    monkeypatch.setattr(config, "CACHE_BACKEND", "none")
+
+    articles = prefetch_articles(["GSE900001", "GSE900002"])
+    assert set(articles) == {"GSE900001", "GSE900002"}
+    assert articles["GSE900001"]["pubmed_id"] is None
+    assert articles["GSE900001"]["error"].startswith("PubMed id lookup failed")
@@ -0,0 +1,58 @@
+from app.core.config import config
+from app.benchmarks.fakes import (
+    FakeAIClient, install_fake_ai_client, uninstall_fake_ai_client, install_fake_tokenizer, uninstall_fake_tokenizer
+)
+from app.utils.ai_provider import chunk_text_by_provider, count_tokens_provider
+from app.benchmarks.stubs import StandInServer
+from app.services.abstract_to_fol import generate_valid_predicates_from_abstract, iter_valid_predicates_from_abstract
+from app.utils.instrumentation import track_job
+
+
+def test_abstract_predicates_run_offline_against_stand_ins(monkeypatch):
+    with StandInServer() as server:
+        monkeypatch.setattr(config, "MEDCAT_URL", server.medcat_url)
+        monkeypatch.setattr(config, "CACHE_BACKEND", "none")
+        client = install_fake_ai_client(FakeAIClient(latency=0))
+        try:
+            with track_job("offline") as metrics:
+                predicates = generate_valid_predicates_from_abstract(
+                    ["Hepatocytes regulate apoptosis through TP53 signaling."]
+                )
+        finally:
+            uninstall_fake_ai_client()
+
+    assert predicates and all(p.startswith("associated_with(") for p in predicates)
+    assert client.calls == 1
+    assert server.requests["medcat"] == 1
+    assert metrics.summary()["spans"]["medcat.annotate"]["count"] == 1
+
+
+def test_abstract_predicates_are_yielded_per_chunk(monkeypatch):
+    chunks = iter(["TP53 regulates apoptosis in hepatocytes.", "IL6 drives inflammation in macrophages."])
+    with StandInServer() as server:
+        monkeypatch.setattr(config, "MEDCAT_URL", server.medcat_url)
+        monkeypatch.setattr(config, "CACHE_BACKEND", "none")
+        install_fake_ai_client(FakeAIClient(latency=0))
+        try:
+            results = iter_valid_predicates_from_abstract(chunks)
+            first = next(results)
+            # The second chunk has not been sent anywhere yet
+            assert server.requests["medcat"] == 1
+            rest = list(results)
+        finally:
+            uninstall_fake_ai_client()
+
+    assert [r["chunk"] for r in [first, *rest]] == [0, 1]
+    assert all(r["predicates"] and r["seconds"] >= 0 for r in [first, *rest])
+
+
+def test_fake_tokenizer_chunks_without_tiktoken(monkeypatch):
+    monkeypatch.setattr(config, "AI_PROVIDER", "openai")
+    text = "TP53 regulates apoptosis, and MDM2 inhibits TP53.\n" * 50
+    install_fake_tokenizer()
+    try:
+        chunks = chunk_text_by_provider(text, max_tokens=30)
+        assert "".join(chunks) == text
+        assert len(chunks) == -(-count_tokens_provider(text) // 30)
+    finally:
+        uninstall_fake_tokenizer()
@@ -0,0 +1,77 @@
+import multiprocessing
+from types import SimpleNamespace
+from app.core.config import config
+from app.utils import ai_provider
+from app.utils.cache import Cache, MemoryLRUCache, SQLiteCache
+from app.utils.metrics import CACHE_REQUESTS
+
+
+def _write_from_child(path):
+    Cache("shared", SQLiteCache(path)).set("key", {"from": "child"})
+
+
+def test_memory_lru_evicts_and_expires():
+    backend = MemoryLRUCache(max_entries=2)
+    backend.set("ns", "a", b"1")
+    backend.set("ns", "b", b"2")
+    backend.get("ns", "a")
+    backend.set("ns", "c", b"3")
+    assert (backend.get("ns", "a"), backend.get("ns", "b"), backend.get("ns", "c")) == (b"1", None, b"3")
+
+    backend.set("ns", "short", b"x", ttl=0.000001)
+    assert backend.get("ns", "short") is None
+
+
+def test_sqlite_cache_is_shared_across_processes(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    child = multiprocessing.get_context("spawn").Process(target=_write_from_child, args=(path,))
+    child.start()
+    child.join(30)
+    assert child.exitcode == 0
+
+    cache = Cache("shared", SQLiteCache(path))
+    hits = CACHE_REQUESTS.value(cache="shared", result="hit")
+    assert cache.get("key") == {"from": "child"}
+    assert CACHE_REQUESTS.value(cache="shared", result="hit") == hits + 1
+
+    computed = []
+    compute = lambda: computed.append(1) or None
+    assert cache.get_or_compute("missing", compute, store=lambda value: value is not None) is None
+    assert cache.get_or_compute("missing", compute, store=lambda value: value is not None) is None
+    assert len(computed) == 2
+
+
+def test_deterministic_completions_are_reused(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "CACHE_BACKEND", "sqlite")
+    monkeypatch.setattr(config, "CACHE_PATH", str(tmp_path / "cache.sqlite3"))
+    calls = []
+
+    def create(**kwargs):
+        calls.append(kwargs)
+        usage = SimpleNamespace(prompt_tokens=3, completion_tokens=1)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content="(a b)"))], usage=usage)
+
+    client = object.__new__(ai_provider.UnifiedAIClient)
+    client.provider = "openai"
+    client._client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    messages = [{"role": "user", "content": "predicates please"}]
+
+    for _ in range(2):
+        assert client.chat(messages, temperature=0.0).choices[0].message.content == "(a b)"
+    assert len(calls) == 1
+    client.chat(messages, temperature=0.7)
+    assert len(calls) == 2
+    client.chat(messages, temperature=0.0, use_cache=False)
+    assert len(calls) == 3
+
+
+def test_sqlite_cache_is_bounded_by_bytes(tmp_path):
+    backend = SQLiteCache(str(tmp_path / "cache.sqlite3"), max_bytes=8000)
+    backend.set("ns", "huge", b"x" * 1001)
+    assert backend.get("ns", "huge") is None
+
+    for i in range(20):
+        backend.set("ns", str(i), b"x" * 1000)
+    connection = backend._connect()
+    assert connection.execute("SELECT SUM(LENGTH(value)) FROM cache").fetchone()[0] <= 8000
+    assert backend.get("ns", "19") is not None and backend.get("ns", "0") is None
@@ -0,0 +1,63 @@
+from app.services.entity_normalization import EntityIndex, TripleDeduplicator, normalize_key
+
+
+def test_exact_cui_and_near_duplicate_matching():
+    index = EntityIndex()
+    index.add_concepts([{"cui": "C0079419", "pretty_name": "TP53 gene", "detected_name": "p53~protein"}])
+
+    assert normalize_key("Tp-53 Gene") == "tp53gene"
+    assert index.canonical("tp53_gene") == "TP53_gene"
+    assert index.canonical("p53 protein") == "TP53_gene"
+    assert index.cui("P53_PROTEIN") == "C0079419"
+
+    assert index.canonical("interleukin_6_receptor") == "interleukin_6_receptor"
+    assert index.canonical("Interleukin6 receptors") == "interleukin_6_receptor"
+    # Short symbols only match exactly
+    assert index.canonical("TP63") == "TP63"
+    assert index.canonical("TP53") == "TP53"
+
+
+def test_merge_counts_duplicates():
+    dedup = TripleDeduplicator()
+    merged = dedup.merge([dedup.normalize(triple) for triple in [
+        ("TP53", "regulates", "apoptosis"),
+        ("tp53", "Regulates", "Apoptosis"),
+        ("TP-53", "regulates", "apoptosis"),
+        ("MDM2", "inhibits", "TP53"),
+    ]])
+    assert merged == [(("TP53", "regulates", "apoptosis"), 3), (("MDM2", "inhibits", "TP53"), 1)]
+
+
+def test_merge_counts_duplicates_across_papers():
+    dedup = TripleDeduplicator()
+    first = [dedup.normalize(("TP53", "regulates", "apoptosis")), dedup.normalize(("MDM2", "inhibits", "TP53"))]
+    second = [dedup.normalize(("tp-53", "regulates", "Apoptosis")), dedup.normalize(("tp53", "regulates", "apoptosis"))]
+    assert dedup.merge(first, "2401.00001v1") == [(("TP53", "regulates", "apoptosis"), 1), (("MDM2", "inhibits", "TP53"), 1)]
+    assert dedup.merge(second, "2401.00002v1") == [(("TP53", "regulates", "apoptosis"), 2)]
+
+    assert dedup.merged() == [
+        (("TP53", "regulates", "apoptosis"), 3, ["2401.00001v1", "2401.00002v1"]),
+        (("MDM2", "inhibits", "TP53"), 1, ["2401.00001v1"]),
+    ]
+
+
+def test_normalize_uses_cuis_annotated_in_the_same_text():
+    dedup = TripleDeduplicator()
+    dedup.entities.add_concepts([{"cui": "C0021760", "pretty_name": "interleukin receptor activity"}])
+    cuis = {normalize_key("interleukin receptors activity"): "C9999999"}
+    assert dedup.normalize(("interleukin receptors activity", "involves", "JAK1"), cuis)[0] == \
+        "interleukin_receptors_activity"
+    assert dedup.entities.cui("interleukin receptors activity") == "C9999999"
+
+
+def test_numbers_and_cuis_keep_near_duplicates_apart():
+    index = EntityIndex()
+    assert index.canonical("BRCA1_mutation_carriers_with_breast_cancer") == "BRCA1_mutation_carriers_with_breast_cancer"
+    assert index.canonical("BRCA2_mutation_carriers_with_breast_cancer") == "BRCA2_mutation_carriers_with_breast_cancer"
+    assert index.canonical("interleukin_6_signaling_pathway") == "interleukin_6_signaling_pathway"
+    assert index.canonical("interleukin_8_signaling_pathway") == "interleukin_8_signaling_pathway"
+    assert index.canonical("Interleukin-6 signalling pathway") == "interleukin_6_signaling_pathway"
+
+    index.add_concepts([{"cui": "C0021760", "pretty_name": "interleukin receptor activity"}])
+    assert index.canonical("interleukin receptors activity", cui="C9999999") == "interleukin_receptors_activity"
+    assert index.canonical("interleukin receptor activities", cui="C0021760") == "interleukin_receptor_activity"
@@ -0,0 +1,31 @@
+import asyncio
+import math
+from app.core.executors import run_io, run_cpu, shutdown_executors, EXECUTOR_TASKS_IN_FLIGHT
+from app.utils.instrumentation import track_job, span
+
+
+def _traced():
+    with span("demo.io"):
+        return "ok"
+
+
+def test_run_io_keeps_job_context():
+    async def main():
+        with track_job("demo") as metrics:
+            assert await run_io(_traced) == "ok"
+        return metrics
+
+    metrics = asyncio.run(main())
+    assert metrics.summary()["spans"]["demo.io"]["count"] == 1
+    assert EXECUTOR_TASKS_IN_FLIGHT.value(pool="io") == 0
+
+
+def test_run_cpu_runs_in_process_pool():
+    async def main():
+        return await asyncio.gather(*(run_cpu(math.factorial, n) for n in range(5)))
+
+    try:
+        assert asyncio.run(main()) == [1, 1, 2, 6, 24]
+        assert EXECUTOR_TASKS_IN_FLIGHT.value(pool="cpu") == 0
+    finally:
+        shutdown_executors()
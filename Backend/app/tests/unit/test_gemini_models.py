@@ -0,0 +1,71 @@
+import types
+import pytest
+from app.core.config import config
+from app.utils import ai_provider
+
+
+class FakeModel:
+    created = []
+
+    def __init__(self, name, system_instruction=None, cached_content=None):
+        self.system_instruction = system_instruction
+        self.cached_content = cached_content
+        FakeModel.created.append(self)
+
+    @classmethod
+    def from_cached_content(cls, cached_content):
+        return cls(cached_content["model"], cached_content=cached_content)
+
+    def count_tokens(self, text):
+        return types.SimpleNamespace(total_tokens=len(text.split()))
+
+
+@pytest.fixture
+def fake_genai(monkeypatch):
+    calls = {"configure": 0, "caches": 0}
+
+    def create(model, system_instruction, ttl):
+        calls["caches"] += 1
+        return {"model": model, "system_instruction": system_instruction}
+
+    genai = types.SimpleNamespace(
+        configure=lambda api_key: calls.__setitem__("configure", calls["configure"] + 1),
+        GenerativeModel=FakeModel,
+        caching=types.SimpleNamespace(CachedContent=types.SimpleNamespace(create=create)),
+    )
+    monkeypatch.setattr(ai_provider, "genai", genai)
+    monkeypatch.setattr(ai_provider, "_gemini_configured", False)
+    monkeypatch.setattr(ai_provider, "_gemini_models", type(ai_provider._gemini_models)())
+    monkeypatch.setattr(config, "GEMINI_MODEL_CACHE_SIZE", 2)
+    monkeypatch.setattr(config, "GEMINI_CONTEXT_CACHE", False)
+    FakeModel.created = []
+    return calls
+
+
+def test_models_reused_per_system_instruction(fake_genai):
+    first = ai_provider._gemini_model("extract predicates")
+    assert ai_provider._gemini_model("extract predicates") is first
+    assert ai_provider._gemini_model("refine") is not first
+    assert fake_genai["configure"] == 1
+    assert len(FakeModel.created) == 2
+
+    # Bounded: a third instruction evicts the least recently used one
+    ai_provider._gemini_model("third")
+    assert ai_provider._gemini_model("extract predicates") is not first
+
+
+def test_context_cache_only_for_repeated_long_prompts(fake_genai, monkeypatch):
+    monkeypatch.setattr(config, "GEMINI_CONTEXT_CACHE", True)
+    monkeypatch.setattr(config, "GEMINI_CONTEXT_CACHE_MIN_TOKENS", 5)
+    long_prompt = "a long shared system prompt text"
+
+    plain = ai_provider._gemini_model(long_prompt)
+    assert plain.system_instruction == long_prompt
+    cached = ai_provider._gemini_model(long_prompt)
+    assert cached.cached_content["system_instruction"] == long_prompt
+    assert ai_provider._gemini_model(long_prompt) is cached
+    assert fake_genai["caches"] == 1
+
+    ai_provider._gemini_model("short")
+    assert ai_provider._gemini_model("short").cached_content is None
+    assert fake_genai["caches"] == 1
@@ -0,0 +1,32 @@
+import os
+import sys
+import subprocess
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+# Loaded on first use only; importing the app or a CLI for --help must not pull them in
+HEAVY_MODULES = {"GEOparse", "pandas", "tiktoken", "bs4", "openai", "google.generativeai", "PyPDF2", "arxiv"}
+
+
+def import_times(module: str) -> dict:
+    """{module: cumulative microseconds} from `python -X importtime -c "import <module>"`."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR, capture_output=True, text=True, timeout=120,
+    )
+    assert result.returncode == 0, result.stderr[-2000:]
+    times = {}
+    for line in result.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            _, cumulative, name = line.split("|")
+            if cumulative.strip().isdigit():
+                times[name.strip()] = int(cumulative)
+    return times
+
+
+@pytest.mark.parametrize("module", ["app.main", "app.services.full_paper_semantic_parsing", "app.batch"])
+def test_import_defers_heavy_dependencies(module):
+    times = import_times(module)
+    assert module in times
+    assert not HEAVY_MODULES & set(times), sorted(HEAVY_MODULES & set(times))
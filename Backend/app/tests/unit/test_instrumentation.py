@@ -0,0 +1,29 @@
+import pytest
+
+from app.utils.instrumentation import span, track_job, record_llm_usage, current_job
+
+
+@span("unit.decorated", kind="external")
+def decorated():
+    return 42
+
+
+def test_spans_and_tokens_aggregate_per_job():
+    with track_job("job-1") as metrics:
+        assert decorated() == 42
+        with pytest.raises(ValueError):
+            with span("unit.block"):
+                raise ValueError("boom")
+        record_llm_usage("openai", "gpt-4", 100, 20)
+        record_llm_usage("openai", "gpt-4", 50, 5)
+
+    summary = metrics.summary()
+    assert summary["spans"]["unit.decorated"]["kind"] == "external"
+    assert summary["spans"]["unit.block"]["errors"] == 1
+    assert summary["totals"] == {"llm_calls": 2, "prompt_tokens": 150, "completion_tokens": 25}
+    assert current_job() is None
+
+
+def test_spans_outside_a_job_are_ignored():
+    assert decorated() == 42
+    record_llm_usage("gemini", "flash", 1, 1)
@@ -0,0 +1,43 @@
+from app.core.config import config
+from app.services import medcat_backend
+from app.services.abstract_to_fol import (
+    annotate_with_medcat, annotate_with_medcat_bulk, medcat_model_version, parse_medcat_response
+)
+
+
+class FakeCAT:
+    def __init__(self):
+        self.calls = []
+
+    def get_entities(self, text):
+        self.calls.append(("one", None))
+        return {"entities": {0: {"pretty_name": "TP53 gene", "cui": "C0079419", "types": ["Gene"],
+                                 "detected_name": text.split()[0].lower()}}, "tokens": []}
+
+    def get_entities_multi_texts(self, texts, n_process=None):
+        self.calls.append(("multi", n_process))
+        return [self.get_entities(text) for text in texts]
+
+    def get_model_card(self, as_dict=False):
+        return {"Model ID": "local-pack-01"}
+
+
+def test_local_backend_answers_like_the_service(monkeypatch):
+    cat = FakeCAT()
+    loaded = []
+    monkeypatch.setattr(medcat_backend, "load_cat", lambda model_dir: loaded.append(model_dir) or cat)
+    monkeypatch.setattr(medcat_backend, "_local", None)
+    monkeypatch.setattr(config, "MEDCAT_BACKEND", "local")
+    monkeypatch.setattr(config, "MEDCAT_MODEL_DIR", "./models")
+    monkeypatch.setattr(config, "MEDCAT_PROCESSES", 2)
+
+    parsed = parse_medcat_response(annotate_with_medcat("TP53 regulates apoptosis"))
+    assert parsed == {"text": "TP53 regulates apoptosis", "annotations": [
+        {"pretty_name": "TP53 gene", "detected_name": "tp53", "cui": "C0079419", "types": ["Gene"]}]}
+
+    bulk = annotate_with_medcat_bulk(["TP53 first", "MDM2 second"])
+    assert [parse_medcat_response(r)["annotations"][0]["detected_name"] for r in bulk] == ["tp53", "mdm2"]
+    assert ("multi", 2) in cat.calls
+    assert medcat_model_version() == "local-pack-01"
+    # The model is loaded once per process
+    assert loaded == ["./models"]
@@ -0,0 +1,44 @@
+from app.core.config import config
+from app.benchmarks.stubs import StandInServer
+from app.services import abstract_to_fol
+from app.services.abstract_to_fol import annotate_cached, cached_annotation, medcat_model_version
+
+
+def test_annotations_are_cached_per_text_and_model(tmp_path, monkeypatch):
+    text = "TP53 regulates apoptosis in hepatocytes."
+    with StandInServer() as server:
+        monkeypatch.setattr(config, "MEDCAT_URL", server.medcat_url)
+        monkeypatch.setattr(config, "CACHE_BACKEND", "sqlite")
+        monkeypatch.setattr(config, "CACHE_PATH", str(tmp_path / "cache.sqlite3"))
+
+        assert medcat_model_version() == "stand-in-0001"
+        assert cached_annotation(text) is None
+        first = annotate_cached(text)
+        assert first["annotations"] and first["text"] == text
+        # One /api/info and one /api/process call; the repeat touches neither
+        assert annotate_cached(text) == first == cached_annotation(text)
+        assert server.requests["medcat"] == 2
+
+        monkeypatch.setattr(abstract_to_fol, "medcat_model_version", lambda: "another-model-pack")
+        assert cached_annotation(text) is None
+        annotate_cached(text)
+        assert server.requests["medcat"] == 3
+
+
+def test_unanswered_info_is_remembered(monkeypatch):
+    calls = []
+
+    def unavailable(url):
+        calls.append(url)
+        raise ConnectionError("refused")
+
+    monkeypatch.setattr(config, "MEDCAT_INFO_URL", "http://medcat.invalid/api/info")
+    monkeypatch.setattr(abstract_to_fol, "_medcat_versions", {})
+    monkeypatch.setattr(abstract_to_fol, "_fetch_medcat_info", unavailable)
+    assert medcat_model_version() is None and medcat_model_version() is None
+    assert len(calls) == 1
+
+    monkeypatch.setattr(config, "MEDCAT_INFO_RETRY_SECONDS", 0)
+    monkeypatch.setattr(abstract_to_fol, "_medcat_versions", {})
+    medcat_model_version(), medcat_model_version()
+    assert len(calls) == 3
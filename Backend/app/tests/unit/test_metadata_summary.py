@@ -0,0 +1,52 @@
+from types import SimpleNamespace
+from app.services.metadata_to_fol import build_metadata_summary, format_metadata
+
+
+def fake_gse(samples):
+    gsms = {}
+    for i in range(samples):
+        gsms[f"GSM{i}"] = SimpleNamespace(metadata={
+            "source_name_ch1": ["liver" if i % 2 else "kidney"],
+            "organism_ch1": ["Homo sapiens"],
+            "characteristics_ch1": [f"replicate: {i}", f"donor: D{i % 4}", "age: 42"],
+            "data_processing": ["RMA normalization " * 20],
+        })
+    return SimpleNamespace(metadata={"summary": ["Series summary"], "type": ["Expression profiling"]}, gsms=gsms)
+
+
+def test_summary_factors_out_shared_fields_and_counts_values():
+    summary = build_metadata_summary(fake_gse(8), token_budget=10_000)
+
+    assert summary.count("GSM Organism Ch1: Homo sapiens") == 1
+    assert "GSM Characteristics Age: 42" in summary
+    assert "GSM Source Name Ch1: kidney (4); liver (4)" in summary
+    assert "Sample groups:" in summary
+    # Per-sample identifiers are summarized, not used for grouping
+    assert "replicate=" not in summary
+
+
+def test_summary_size_tracks_diversity_not_sample_count():
+    small = build_metadata_summary(fake_gse(8), token_budget=10_000)
+    large = build_metadata_summary(fake_gse(800), token_budget=10_000)
+    naive = "\n\n\n".join({format_metadata(fake_gse(800), gsm) for gsm in fake_gse(800).gsms.values()})
+
+    assert len(large) < 2 * len(small)
+    assert len(large) < len(naive) / 50
+    assert "GSM Characteristics Replicate: 800 distinct values, one per sample" in large
+
+
+def test_summary_respects_token_budget():
+    assert len(build_metadata_summary(fake_gse(800), token_budget=100)) <= 400
+
+
+def test_small_series_keeps_distinct_conditions():
+    gse = fake_gse(4)
+    for gsm, treatment in zip(gse.gsms.values(), ["DMSO", "cisplatin", "doxorubicin", "untreated"]):
+        gsm.metadata["treatment_protocol_ch1"] = [treatment]
+    summary = build_metadata_summary(gse, token_budget=10_000)
+
+    assert "GSM Treatment Protocol Ch1: DMSO (1); cisplatin (1); doxorubicin (1); untreated (1)" in summary
+    assert "Treatment Protocol Ch1=untreated" in summary
+    # Numbered values are still per-sample identifiers
+    assert "GSM Characteristics Replicate: 4 distinct values, one per sample" in summary
+    assert "replicate=" not in summary
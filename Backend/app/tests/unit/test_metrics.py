@@ -0,0 +1,37 @@
+from app.utils.metrics import MetricsRegistry
+
+
+def test_render_text_exposition_format():
+    registry = MetricsRegistry()
+    requests = registry.counter("demo_requests_total", "Demo requests", ("route",))
+    latency = registry.histogram("demo_latency_seconds", "Demo latency", buckets=(0.1, 1.0))
+    registry.gauge("demo_connections", "Demo connections", callback=lambda: 3)
+
+    requests.inc(route="/a")
+    requests.inc(2, route="/a")
+    latency.observe(0.05)
+    latency.observe(0.5)
+
+    text = registry.render()
+    assert "# TYPE demo_requests_total counter" in text
+    assert 'demo_requests_total{route="/a"} 3' in text
+    assert 'demo_latency_seconds_bucket{le="0.1"} 1' in text
+    assert 'demo_latency_seconds_bucket{le="1"} 2' in text
+    assert 'demo_latency_seconds_bucket{le="+Inf"} 2' in text
+    assert "demo_latency_seconds_count 2" in text
+    assert "demo_connections 3" in text
+
+
+def test_load_test_parses_rendered_histogram():
+    from app.benchmarks.loadtest import parse_metrics, histogram_quantile
+
+    registry = MetricsRegistry()
+    lag = registry.histogram("demo_lag_seconds", "Demo lag", buckets=(0.01, 0.1, 1.0))
+    before = parse_metrics(registry.render())
+    for value in (0.005, 0.005, 0.05, 0.5):
+        lag.observe(value)
+    after = parse_metrics(registry.render())
+
+    assert after["demo_lag_seconds_count"] == 4
+    assert histogram_quantile(before, after, "demo_lag_seconds", 0.5) == 0.01
+    assert histogram_quantile(before, after, "demo_lag_seconds", 0.99) == 1.0
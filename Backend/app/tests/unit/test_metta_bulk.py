@@ -0,0 +1,42 @@
+from app.services.metta_columnar import ColumnarTriples
+from app.utils.metta_bulk import convert_files, plan_shards, validate_files
+
+
+def _write_corpus(directory):
+    (directory / "nested").mkdir()
+    lines = []
+    for i in range(300):
+        lines.append(f"(regulates Gene{i} Gene{i + 1})")
+        if i % 50 == 7:
+            lines.append(f"(bad# Gene{i})  ; trailing comment")
+        if i % 40 == 0:
+            lines.append("; comment only")
+    (directory / "a.metta").write_text("\n".join(lines) + "\n")
+    (directory / "nested" / "b.metta").write_text("(has_tissue GSE1)\n\n(unclosed (x y)\n")
+    (directory / "notes.txt").write_text("(ignored#)\n")
+
+
+def test_sharded_validation_is_deterministic(tmp_path):
+    _write_corpus(tmp_path)
+    assert len(plan_shards(str(tmp_path / "a.metta"), 512)) > 10
+
+    serial = validate_files([str(tmp_path)], workers=1, shard_bytes=512)
+    assert (serial["files"], serial["expressions"], serial["invalid"]) == (2, 308, 7)
+    bad = [error for error in serial["errors"] if "bad#" in error["text"]]
+    assert [error["line"] for error in bad] == [10, 62, 114, 166, 219, 271]
+    assert serial["errors"][-1]["path"].endswith("b.metta") and serial["errors"][-1]["line"] == 3
+
+    parallel = validate_files([str(tmp_path)], workers=2, shard_bytes=512)
+    assert parallel == serial
+    assert validate_files([str(tmp_path)], workers=1) == serial
+
+
+def test_convert_files(tmp_path):
+    source = tmp_path / "source"
+    source.mkdir()
+    _write_corpus(source)
+
+    results = convert_files([str(source)], str(tmp_path / "out"), workers=2)
+    assert [result["triples"] for result in results] == [300, 1]
+    with ColumnarTriples(str(tmp_path / "out" / "nested" / "b.mettac")) as columnar:
+        assert list(columnar) == [("GSE1", "has_tissue", None)]
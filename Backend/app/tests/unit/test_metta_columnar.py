@@ -0,0 +1,27 @@
+from app.services.metta_columnar import (
+    ColumnarTriples, write_columnar, metta_to_columnar, columnar_to_metta
+)
+
+
+def test_text_round_trip(tmp_path):
+    source = tmp_path / "gsm.metta"
+    atoms = ["(regulates TP53 MDM2)", "(regulates MYC TP53)", "(has_tissue GSE1)", "(hasValue 1_GSM1 12.5 mg)"]
+    source.write_text("; comment\n(: subject-property (-> Symbol))\n" + "\n".join(atoms) + "\n")
+
+    count, skipped = metta_to_columnar(str(source), str(tmp_path / "gsm.mettac"))
+    assert (count, skipped) == (4, 1)
+    columnar_to_metta(str(tmp_path / "gsm.mettac"), str(tmp_path / "back.metta"))
+    assert (tmp_path / "back.metta").read_text().splitlines() == atoms
+
+
+def test_memory_mapped_access(tmp_path):
+    path = str(tmp_path / "paper.mettac")
+    write_columnar([("TP53", "regulates", "apoptosis"), ("MDM2", "inhibits", "TP53")], path, order="spo")
+
+    with ColumnarTriples(path) as columnar:
+        assert columnar.order == "spo"
+        assert len(columnar) == 2 and columnar.symbol_count == 5
+        assert list(columnar) == [("TP53", "regulates", "apoptosis"), ("MDM2", "inhibits", "TP53")]
+        tp53 = columnar.lookup("TP53")
+        assert columnar.symbol(tp53) == "TP53" and columnar.lookup("BRCA1") is None
+        assert [i for i in range(len(columnar)) if columnar.objects[i] == tp53] == [1]
@@ -0,0 +1,49 @@
+from app.utils.metta_reader import MettaFile
+
+SOURCE = """; header comment
+(: subject-property (-> Symbol))
+(regulates TP53 MDM2)
+
+(implies (and (a $x)
+              (b $x)) ; trailing comment
+         (c $x))
+(bad# atom)
+(regulates MYC TP53) ; TP53 again
+; TP53 only in a comment
+"""
+
+
+def test_index_and_find(tmp_path):
+    path = tmp_path / "sample.metta"
+    path.write_text(SOURCE)
+
+    with MettaFile(str(path), checkpoint_every=2) as metta:
+        assert len(metta) == 5
+        assert [expression.line for expression in metta] == [2, 3, 5, 8, 9]
+        assert metta.expression(2).text.startswith("(implies") and metta.expression(2).text.endswith("(c $x))")
+        assert metta.expression(4) == list(metta)[4]
+        assert [expression.line for expression in metta.find("TP53")] == [3, 9]
+        assert list(metta.find("TP5")) == []
+
+
+def test_find_after_a_comment_mentioning_the_atom(tmp_path):
+    path = tmp_path / "sample.metta"
+    path.write_text("; TP53 note\n(TP53 regulates apoptosis)\n(x TP53 y)\n")
+
+    with MettaFile(str(path)) as metta:
+        assert [expression.text for expression in metta.find("TP53")] == ["(TP53 regulates apoptosis)", "(x TP53 y)"]
+
+
+def test_validate_reports_lines(tmp_path):
+    path = tmp_path / "sample.metta"
+    path.write_text(SOURCE * 20)
+
+    with MettaFile(str(path), checkpoint_every=4) as metta:
+        report = metta.validate()
+        assert (report["expressions"], report["invalid"]) == (100, 40)
+        assert [error["line"] for error in report["errors"][:2]] == [2, 8]
+        assert "bad#" in report["errors"][1]["error"]
+
+        parallel = metta.validate(workers=2)
+        assert (parallel["expressions"], parallel["invalid"]) == (100, 40)
+        assert parallel["errors"] == report["errors"]
@@ -0,0 +1,63 @@
+from app.services.paper_store import PaperStore
+
+
+def test_search_round_trip(tmp_path):
+    store = PaperStore(str(tmp_path))
+    paper = {"title": "T", "paper_id": "2101.00001v1"}
+    store.put_search("CRISPR  editing", 3, [paper])
+
+    assert store.get_search("crispr editing", 3) == [paper]
+    assert store.get_search("crispr editing", 5) is None
+
+
+def test_least_recently_used_paper_is_evicted(tmp_path):
+    store = PaperStore(str(tmp_path), max_bytes=100)
+    store.put_pages("a", ["x" * 60])
+    store.put_pages("b", ["y" * 60])
+
+    assert store.get_pages("a") is None
+    assert store.get_pages("b") == ["y" * 60]
+
+
+def test_reads_do_not_rewrite_the_index(tmp_path):
+    store = PaperStore(str(tmp_path), max_bytes=100)
+    store.put_pages("a", ["x" * 40])
+    store.put_pages("b", ["y" * 40])
+    index = tmp_path / PaperStore.INDEX_FILE
+    saved = index.read_bytes()
+
+    assert store.get_pages("a") == ["x" * 40]
+    assert index.read_bytes() == saved
+    # The read still counts for eviction: "b" is now the least recently used
+    store.put_pages("c", ["z" * 40])
+    assert store.get_pages("b") is None and store.get_pages("a") == ["x" * 40]
+
+    store.get_pages("c")
+    store.flush()
+    assert PaperStore(str(tmp_path))._index["papers"].keys() == {"a", "c"}
+
+
+def test_searches_expire_and_follow_their_papers(tmp_path):
+    store = PaperStore(str(tmp_path), max_bytes=200, search_ttl=60, max_searches=2)
+    store.put_search("crispr", 3, [{"title": "T", "paper_id": "a"}])
+    store._index["searches"][store._search_key("crispr", 3)]["created"] -= 120
+    assert store.get_search("crispr", 3) is None
+    assert store.get_search("crispr", 3, allow_stale=True) == [{"title": "T", "paper_id": "a"}]
+
+    store.put_search("p53", 3, [{"title": "U", "paper_id": "b"}])
+    store.put_search("myc", 3, [{"title": "V", "paper_id": "c"}])
+    assert len(store._index["searches"]) == 2 and store.get_search("crispr", 3, allow_stale=True) is None
+
+    # Evicting a paper drops the searches that listed it
+    store.put_pages("d", ["x" * 300])
+    assert store.get_search("p53", 3) is None and store._index["searches"] == {}
+
+
+def test_pinned_papers_are_not_evicted(tmp_path):
+    store = PaperStore(str(tmp_path), max_bytes=100)
+    store.put_pages("a", ["x" * 60])
+    with store.pinned("a"):
+        store.put_pages("b", ["y" * 60])
+        assert store.get_pages("a") == ["x" * 60]
+    store.put_pages("c", ["z" * 60])
+    assert store.get_pages("a") is None
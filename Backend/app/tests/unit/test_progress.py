@@ -0,0 +1,75 @@
+import json
+import asyncio
+import threading
+import pytest
+from app.utils.progress import ProgressBus, SlowConsumer, format_frames
+
+
+def test_stage_updates_are_coalesced_and_history_replays_everything():
+    async def main():
+        bus = ProgressBus(queue_size=10)
+        live = bus.subscribe("c1")
+        for message in ("Fetching GSE data...", "Extracting PubMed ID...", '{"abstract": "x"}', "Done "):
+            bus.publish("c1", message)
+        received = [await live.get() for _ in range(len(live))]
+        replay = bus.subscribe("c1", offset=2)
+        replayed = [await replay.get() for _ in range(len(replay))]
+        return received, replayed
+
+    received, replayed = asyncio.run(main())
+    assert received == [(1, "Extracting PubMed ID..."), (2, '{"abstract": "x"}'), (3, "Done ")]
+    assert replayed == [(2, '{"abstract": "x"}'), (3, "Done ")]
+
+
+def test_slow_subscriber_is_dropped_with_resume_offset():
+    async def main():
+        bus = ProgressBus(queue_size=2)
+        subscriber = bus.subscribe("c1")
+        bus.publish("c1", '{"n": 0}')
+        assert await subscriber.get() == (0, '{"n": 0}')
+        for n in range(1, 5):
+            bus.publish("c1", json.dumps({"n": n}))
+        with pytest.raises(SlowConsumer) as info:
+            await subscriber.get()
+        return info.value.offset
+
+    assert asyncio.run(main()) == 1
+
+
+def test_publisher_is_thread_safe():
+    async def main():
+        bus = ProgressBus()
+        subscriber = bus.subscribe("c1")
+        send_progress = bus.publisher("c1")
+        thread = threading.Thread(target=lambda: [send_progress(f'{{"n": {n}}}') for n in range(3)])
+        thread.start()
+        thread.join()
+        return [await subscriber.get() for _ in range(3)]
+
+    assert [seq for seq, _ in asyncio.run(main())] == [0, 1, 2]
+
+
+def test_large_messages_are_chunked_in_envelope_mode():
+    message = "x" * 25
+    assert format_frames(4, message) == [message]
+    frames = [json.loads(frame) for frame in format_frames(4, message, envelope=True, max_frame=10)]
+    assert [frame["chunk"] for frame in frames] == [0, 1, 2]
+    assert {frame["seq"] for frame in frames} == {4}
+    assert "".join(frame["data"] for frame in frames) == message
+
+
+def test_websocket_send_failures_end_the_sender_quietly():
+    from starlette.websockets import WebSocketDisconnect
+    from app.routes import _send_progress
+
+    class GoneWebSocket:
+        async def send_text(self, text):
+            raise WebSocketDisconnect(1006)
+
+    async def main():
+        bus = ProgressBus(queue_size=10)
+        subscriber = bus.subscribe("c1")
+        bus.publish("c1", "Fetching GSE data...")
+        await asyncio.wait_for(_send_progress(GoneWebSocket(), subscriber, False, 0), 5)
+
+    asyncio.run(main())
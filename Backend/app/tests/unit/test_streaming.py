@@ -0,0 +1,15 @@
+import json
+from app.utils.streaming import progress_event, format_event
+
+
+def test_progress_event_uses_single_json_key_as_event_name():
+    assert progress_event("Fetching GSE data...") == ("status", "Fetching GSE data...")
+    assert progress_event(json.dumps({"abstract": "text"})) == ("abstract", "text")
+    assert progress_event(json.dumps({"a": 1, "b": 2})) == ("status", {"a": 1, "b": 2})
+
+
+def test_format_event_sse_and_ndjson():
+    assert format_event("abstract", "text") == 'event: abstract\ndata: "text"\n\n'
+    line = format_event("abstract_predicates_chunk", {"chunk": 0, "predicates": ["p(a, b)"]}, "ndjson")
+    assert line.endswith("\n")
+    assert json.loads(line) == {"event": "abstract_predicates_chunk", "data": {"chunk": 0, "predicates": ["p(a, b)"]}}
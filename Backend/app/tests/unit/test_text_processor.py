@@ -0,0 +1,43 @@
+import threading
+from types import SimpleNamespace
+from app.services.full_paper_semantic_parsing import PaperInfo, PaperProcessor, TextProcessor
+
+
+def test_iter_chunks_matches_chunk_text_on_joined_pages():
+    processor = TextProcessor()
+    pages = [" ".join(f"w{p}_{i}" for i in range(37)) for p in range(9)]
+    joined = processor.preprocess_text("".join(f"{page}\n" for page in pages))
+
+    for chunk_size, overlap in ((50, 10), (37, 0), (333, 33), (1000, 200)):
+        expected = processor.chunk_text(joined, chunk_size, overlap)
+        assert list(processor.iter_chunks(pages, chunk_size, overlap)) == expected
+
+
+def test_iter_chunks_joins_hyphenated_words_across_pages():
+    processor = TextProcessor()
+    chunks = list(processor.iter_chunks(["cell regu-", "lation matters"], chunk_size=10, overlap=2))
+    assert chunks == ["cell regulation matters"]
+
+
+def test_pipeline_records_preprocessing_failures_and_finishes():
+    class FailingTextProcessor(TextProcessor):
+        def iter_chunks(self, pages, chunk_size=2000, overlap=200):
+            pages = list(pages)
+            if "broken" in pages:
+                raise ValueError("bad page")
+            return super().iter_chunks(pages, chunk_size, overlap)
+
+    processor = object.__new__(PaperProcessor)
+    processor.logger = lambda msg: None
+    processor.text_processor = FailingTextProcessor()
+    processor.pdf_processor = SimpleNamespace(download_and_extract_pages=lambda url, title, paper_id: [url])
+    processor._extract_and_write = lambda paper, chunks: {"title": paper.title, "count": len(chunks)}
+    papers = [PaperInfo(title, "", url, "", []) for title, url in (("ok", "fine text"), ("bad", "broken"))]
+
+    results = {}
+    thread = threading.Thread(target=lambda: results.update(processor._process_papers_pipelined(papers, 100, 2)))
+    thread.start()
+    thread.join(10)
+    assert not thread.is_alive()
+    assert results["ok"] == {"title": "ok", "count": 1}
+    assert results["bad"]["error"] == "bad page" and results["bad"]["triples"] == []
@@ -0,0 +1,55 @@
+import json
+import pytest
+from fastapi.testclient import TestClient
+from app.core.config import config
+from app.main import app
+from app.services import triple_store
+from app.services.triple_store import TripleStore, UNARY
+from app.services.triple_query import parse_pattern, run_query
+
+
+@pytest.fixture
+def store(monkeypatch):
+    store = TripleStore()
+    store.add_triples([
+        ("MYC", "regulates", "TP53"), ("E2F1", "regulates", "TP53"), ("TP53", "regulates", "MDM2"),
+        ("MDM2", "inhibits", "MYC"), ("NUTLIN", "inhibits", "MDM2"), ("GSE1", "has_tissue", UNARY),
+    ], source="abstract")
+    monkeypatch.setattr(config, "TRIPLE_STORE_DIR", "")
+    monkeypatch.setattr(triple_store, "_store", store)
+    return store
+
+
+def test_parse_pattern():
+    assert parse_pattern("(regulates $x TP53)") == [("$x", "regulates", "TP53")]
+    assert parse_pattern("(, (regulates $x TP53) (has_tissue $g))") == [
+        ("$x", "regulates", "TP53"), ("$g", "has_tissue", UNARY)]
+    for bad in ("(regulates $x TP53", "(a (b c) d)", "(regulates $1 TP53)", ""):
+        with pytest.raises(ValueError):
+            parse_pattern(bad)
+
+
+def test_multi_hop_join_and_pagination(store):
+    clauses = parse_pattern("(regulates $x TP53) (inhibits $y $x)")
+    events = list(run_query(clauses, store=store))
+    assert events == [("result", {"bindings": {"x": "MYC", "y": "MDM2"}}),
+                      ("page", {"offset": 0, "limit": 100, "returned": 1, "next_offset": None})]
+
+    clauses = parse_pattern("(regulates $x $y)")
+    first = list(run_query(clauses, offset=0, limit=2, store=store))
+    second = list(run_query(clauses, offset=2, limit=2, store=store))
+    assert first[-1][1]["next_offset"] == 2 and second[-1][1]["next_offset"] is None
+    assert len({json.dumps(data) for event, data in first[:-1] + second[:-1]}) == 3
+
+    # Three-term clauses do not match one-argument facts
+    assert list(run_query(parse_pattern("(has_tissue $g $t)"), store=store))[0][1]["returned"] == 0
+
+
+def test_query_endpoint_streams_ndjson(store):
+    client = TestClient(app)
+    response = client.get("/query", params={"pattern": "(inhibits $drug MDM2)"})
+    assert response.status_code == 200
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert lines[0] == {"event": "result", "data": {"bindings": {"drug": "NUTLIN"}}}
+    assert lines[-1]["event"] == "page"
+    assert client.get("/query", params={"pattern": "(unbalanced"}).status_code == 400
@@ -0,0 +1,84 @@
+from app.services.triple_store import TripleStore, UNARY, parse_atom, predicate_records
+
+
+def test_parse_atoms_and_predicates():
+    assert parse_atom("(regulates TP53 MDM2)") == ("TP53", "regulates", "MDM2")
+    assert parse_atom("(has_tissue liver)") == ("liver", "has_tissue", UNARY)
+    assert parse_atom("; Invalid format: foo") is None
+    records = predicate_records(["regulates(TP53, cell cycle)", "not a predicate"], source="abstract")
+    assert records == [("TP53", "regulates", "cell_cycle", {"source": "abstract"})]
+
+
+def test_pattern_queries_and_provenance():
+    store = TripleStore()
+    store.add_triples([("TP53", "regulates", "MDM2"), ("MYC", "regulates", "TP53"),
+                       ("MDM2", "inhibits", "TP53")], source="abstract", gse="GSE1", chunk=0)
+    assert store.add_triples([("MYC", "regulates", "TP53")], source="paper", paper="2401.00001v1") == 0
+
+    assert list(store.match(predicate="regulates", obj="TP53")) == [("MYC", "regulates", "TP53")]
+    assert sorted(store.match(obj="TP53")) == [("MDM2", "inhibits", "TP53"), ("MYC", "regulates", "TP53")]
+    assert store.count(subject="TP53") == 1
+    assert store.count(subject="unknown") == 0
+    assert store.count() == 3
+
+    row = next(store.match_rows("MYC", "regulates", "TP53"))
+    assert [p["source"] for p in store.provenance(row)] == ["abstract", "paper"]
+
+    # Triples added after a query are merged into the indexes
+    store.add_triples([("BRCA1", "regulates", "TP53")])
+    assert store.count(predicate="regulates", obj="TP53") == 2
+
+
+def test_log_is_replayed(tmp_path):
+    store = TripleStore(str(tmp_path))
+    store.add_triples([("TP53", "regulates", "MDM2")], source="abstract", gse="GSE1")
+    store.add_triples([("GSE1", "has_tissue", UNARY)], source="gse_metadata", gse="GSE1")
+    with open(tmp_path / TripleStore.LOG_FILE, "a", encoding="utf-8") as f:
+        f.write('{"records": [["cut')
+
+    reopened = TripleStore(str(tmp_path))
+    assert len(reopened) == 2
+    row = next(reopened.match_rows(predicate="has_tissue"))
+    assert reopened.triple(row) == ("GSE1", "has_tissue", UNARY)
+    assert reopened.provenance(row) == [{"source": "gse_metadata", "gse": "GSE1"}]
+
+
+def test_workers_sharing_a_log_see_each_others_triples(tmp_path, caplog):
+    worker_a, worker_b = TripleStore(str(tmp_path)), TripleStore(str(tmp_path))
+    worker_a.add_triples([("TP53", "regulates", "MDM2")], source="abstract")
+    assert worker_b.count(subject="TP53") == 1
+    assert worker_b.add_triples([("TP53", "regulates", "MDM2"), ("MYC", "regulates", "TP53")]) == 1
+    assert sorted(worker_a.match(predicate="regulates")) == [("MYC", "regulates", "TP53"),
+                                                              ("TP53", "regulates", "MDM2")]
+
+    # A batch cut short by a crash is ended before the next append and reported when read
+    with open(tmp_path / TripleStore.LOG_FILE, "a", encoding="utf-8") as f:
+        f.write('{"records": [["cut')
+    worker_a.add_triples([("BRCA1", "regulates", "TP53")])
+    assert worker_b.count(predicate="regulates") == 3
+    assert len(TripleStore(str(tmp_path))) == 3
+    assert "Skipping an unreadable batch" in caplog.text
+
+
+def test_compaction_snapshots_the_store_and_empties_the_log(tmp_path):
+    worker_a, worker_b = TripleStore(str(tmp_path), compact_bytes=0), TripleStore(str(tmp_path), compact_bytes=0)
+    worker_a.add_triples([("TP53", "regulates", "MDM2")], source="abstract", gse="GSE1")
+    assert worker_b.count() == 1
+    worker_a.compact()
+    assert (tmp_path / TripleStore.LOG_FILE).stat().st_size == 0
+
+    # The other worker reloads from the snapshot and keeps appending after it
+    worker_b.add_triples([("MYC", "regulates", "TP53")], source="paper")
+    assert worker_a.count(predicate="regulates") == 2
+
+    reopened = TripleStore(str(tmp_path))
+    assert sorted(reopened.match(predicate="regulates")) == [("MYC", "regulates", "TP53"), ("TP53", "regulates", "MDM2")]
+    row = next(reopened.match_rows("TP53"))
+    assert reopened.provenance(row) == [{"source": "abstract", "gse": "GSE1"}]
+    assert reopened.count(subject="unknown") == 0
+
+    # Past compact_bytes the log is compacted on its own
+    small = TripleStore(str(tmp_path), compact_bytes=1)
+    small.add_triples([("BRCA1", "regulates", "TP53")])
+    assert (tmp_path / TripleStore.LOG_FILE).stat().st_size == 0
+    assert TripleStore(str(tmp_path)).count() == 3
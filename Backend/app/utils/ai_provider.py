@@ -1,18 +1,38 @@
+import time
+import hashlib
 import logging
+import datetime
+import threading
+from collections import OrderedDict
 from typing import List, Dict, Optional
 
 from app.core.config import config
+from app.utils.instrumentation import span, record_llm_usage
+from app.utils.cache import get_cache, cache_key
 
-# Optional imports; keep lazy to avoid hard dependency if provider not used
-try:
-	from openai import OpenAI as _OpenAIClient
-except Exception:
-	_OpenAIClient = None
+# Optional provider SDKs; imported on first use so importing the app stays cheap
+_OpenAIClient = None
+genai = None
 
-try:
-	import google.generativeai as genai
-except Exception:
-	genai = None
+
+def _load_openai():
+	global _OpenAIClient
+	if _OpenAIClient is None:
+		try:
+			from openai import OpenAI as _OpenAIClient
+		except Exception:
+			pass
+	return _OpenAIClient
+
+
+def _load_genai():
+	global genai
+	if genai is None:
+		try:
+			import google.generativeai as genai
+		except Exception:
+			pass
+	return genai
 
 
 class AIResponse:
@@ -24,8 +44,93 @@ class AIResponse:
 		def __init__(self, content: str):
 			self.message = AIResponse.Choice.Message(content)
 
-	def __init__(self, content: str):
+	def __init__(self, content: str, prompt_tokens: int = 0, completion_tokens: int = 0):
 		self.choices = [AIResponse.Choice(content)]
+		self.usage = {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens}
+
+
+_gemini_lock = threading.Lock()
+_gemini_configured = False
+_gemini_models: "OrderedDict[str, _GeminiModel]" = OrderedDict()
+
+
+class _GeminiModel:
+	"""A configured GenerativeModel for one system instruction, optionally backed by a context cache."""
+
+	def __init__(self, system_text: str):
+		self.system_text = system_text
+		self.base = genai.GenerativeModel(config.GEMINI_MODEL, system_instruction=system_text or None)  # type: ignore[arg-type]
+		self.model = self.base
+		self.uses = 0
+		self.tokens: Optional[int] = None
+		self.cacheable = bool(system_text)
+		self.cached_until = 0.0
+		self.lock = threading.Lock()
+
+	def refresh_context_cache(self):
+		"""
+		Move a repeated, long system instruction into an explicit context cache so
+		later calls are billed for it at the cached rate. Any failure (model
+		without caching support, prompt under the API minimum) falls back to
+		the plain model for good.
+		"""
+		with self.lock:
+			now = time.monotonic()
+			if not self.cacheable or now < self.cached_until:
+				return
+			try:
+				if self.tokens is None:
+					self.tokens = int(self.base.count_tokens(self.system_text).total_tokens)
+				if self.tokens < config.GEMINI_CONTEXT_CACHE_MIN_TOKENS:
+					self.cacheable = False
+					return
+				ttl = config.GEMINI_CONTEXT_CACHE_TTL_SECONDS
+				cached = genai.caching.CachedContent.create(
+					model=config.GEMINI_MODEL,
+					system_instruction=self.system_text,
+					ttl=datetime.timedelta(seconds=ttl),
+				)
+				self.model = genai.GenerativeModel.from_cached_content(cached_content=cached)
+				# Renew a minute early so no call lands on an expired cache
+				self.cached_until = now + max(0, ttl - 60)
+			except Exception as e:
+				logging.getLogger(__name__).warning(f"Gemini context caching disabled for a system prompt: {e}")
+				self.cacheable = False
+				self.model = self.base
+
+
+def _configure_gemini():
+	global _gemini_configured
+	if _load_genai() is None:
+		raise RuntimeError("google-generativeai package is not available")
+	with _gemini_lock:
+		if not _gemini_configured:
+			genai.configure(api_key=config.GEMINI_API_KEY)
+			_gemini_configured = True
+
+
+def _gemini_model(system_text: str = ""):
+	"""
+	GenerativeModel for `system_text` from a bounded LRU keyed on the sha256
+	of model name and instruction, so repeated prompts reuse one object.
+	"""
+	_configure_gemini()
+	key = hashlib.sha256(f"{config.GEMINI_MODEL}\0{system_text}".encode("utf-8")).hexdigest()
+	with _gemini_lock:
+		entry = _gemini_models.get(key)
+	if entry is None:
+		entry = _GeminiModel(system_text)
+	with _gemini_lock:
+		entry = _gemini_models.setdefault(key, entry)
+		_gemini_models.move_to_end(key)
+		while len(_gemini_models) > max(1, config.GEMINI_MODEL_CACHE_SIZE):
+			_gemini_models.popitem(last=False)
+		entry.uses += 1
+		uses = entry.uses
+	# Only instructions seen twice are worth the cache storage (per-series prompts are not)
+	if config.GEMINI_CONTEXT_CACHE and uses > 1 and entry.cacheable:
+		entry.refresh_context_cache()
+	return entry.model
 
 
 class UnifiedAIClient:
@@ -34,29 +139,54 @@ class UnifiedAIClient:
 		self.provider = (provider or config.AI_PROVIDER).lower()
 
 		if self.provider == "openai":
-			if _OpenAIClient is None:
+			if _load_openai() is None:
 				raise RuntimeError("openai package is not available")
 			self._client = _OpenAIClient(api_key=config.OPENAI_API_KEY)
 		elif self.provider == "gemini":
-			if genai is None:
+			if _load_genai() is None:
 				raise RuntimeError("google-generativeai package is not available")
 			if not config.GEMINI_API_KEY:
 				raise RuntimeError("GEMINI_API_KEY is not set")
-			genai.configure(api_key=config.GEMINI_API_KEY)
-			self._client = genai.GenerativeModel(config.GEMINI_MODEL)
+			self._client = _gemini_model()
 		else:
 			raise ValueError(f"Unsupported AI provider: {self.provider}")
 
 	def chat(self, messages: List[Dict[str, str]], model: Optional[str] = None,
-			 temperature: Optional[float] = None, max_tokens: Optional[int] = None) -> AIResponse:
+			 temperature: Optional[float] = None, max_tokens: Optional[int] = None,
+			 use_cache: bool = True) -> AIResponse:
+		model_name = (model or config.OPENAI_MODEL) if self.provider == "openai" else config.GEMINI_MODEL
 		if self.provider == "openai":
-			return self._chat_openai(messages, model or config.OPENAI_MODEL,
-									 temperature if temperature is not None else config.OPENAI_TEMPERATURE,
-									 max_tokens if max_tokens is not None else config.OPENAI_MAX_TOKENS)
+			temperature = temperature if temperature is not None else config.OPENAI_TEMPERATURE
+			max_tokens = max_tokens if max_tokens is not None else config.OPENAI_MAX_TOKENS
 		else:
-			return self._chat_gemini(messages,
-									 temperature if temperature is not None else config.GEMINI_TEMPERATURE,
-									 max_tokens if max_tokens is not None else config.GEMINI_MAX_TOKENS)
+			temperature = temperature if temperature is not None else config.GEMINI_TEMPERATURE
+			max_tokens = max_tokens if max_tokens is not None else config.GEMINI_MAX_TOKENS
+
+		# Only deterministic (temperature 0) completions are shared between calls and workers,
+		# for LLM_CACHE_TTL_SECONDS; LLM_CACHE=false or use_cache=False always asks the model
+		cache = get_cache("llm") if temperature == 0 and use_cache and config.LLM_CACHE else None
+		key = cache_key(self.provider, model_name, messages, max_tokens)
+		if cache is not None:
+			content = cache.get(key)
+			if content is not None:
+				return AIResponse(content)
+
+		with span("llm.chat", kind="external"):
+			try:
+				if self.provider == "openai":
+					response = self._chat_openai(messages, model_name, temperature, max_tokens)
+				else:
+					response = self._chat_gemini(messages, temperature, max_tokens)
+			except Exception:
+				record_llm_usage(self.provider, model_name, error=True)
+				raise
+		content = response.choices[0].message.content
+		# Gemini failures come back as an empty response instead of raising
+		record_llm_usage(self.provider, model_name, response.usage["prompt_tokens"],
+						 response.usage["completion_tokens"], error=not content)
+		if cache is not None and content:
+			cache.set(key, content, config.LLM_CACHE_TTL_SECONDS or None)
+		return response
 
 	def _chat_openai(self, messages: List[Dict[str, str]], model: str, temperature: float, max_tokens: int) -> AIResponse:
 		resp = self._client.chat.completions.create(
@@ -68,7 +198,10 @@ class UnifiedAIClient:
 
 		# normalize
 		content = resp.choices[0].message.content
-		return AIResponse(content)
+		usage = getattr(resp, "usage", None)
+		return AIResponse(content,
+						  getattr(usage, "prompt_tokens", 0) or 0,
+						  getattr(usage, "completion_tokens", 0) or 0)
 
 	def _chat_gemini(self, messages: List[Dict[str, str]], temperature: float, max_tokens: int) -> AIResponse:
 		logger = logging.getLogger(__name__)
@@ -93,11 +226,10 @@ class UnifiedAIClient:
 		model_for_call = self._client
 		if system_text:
 			try:
-				model_for_call = genai.GenerativeModel(config.GEMINI_MODEL, system_instruction=system_text)  # type: ignore[arg-type]
+				model_for_call = _gemini_model(system_text)
 			except Exception:
 				model_for_call = self._client
 
-
 		try:
 			logger.debug(f"Calling Gemini API (model: {config.GEMINI_MODEL}, max_tokens: {max_tokens})")
 			response = model_for_call.generate_content(
@@ -128,7 +260,15 @@ class UnifiedAIClient:
 			except Exception:
 				content = ""
 		
-		return AIResponse(content or "")
+		usage = getattr(response, "usage_metadata", None)
+		return AIResponse(content or "",
+						  getattr(usage, "prompt_token_count", 0) or 0,
+						  getattr(usage, "candidates_token_count", 0) or 0)
+
+
+def provider_model_name() -> str:
+	"""Model answering `ai_generate` calls, for provenance records."""
+	return config.GEMINI_MODEL if config.AI_PROVIDER == "gemini" else config.OPENAI_MODEL
 
 
 # Cached client instance for efficiency (reused across multiple calls)
@@ -138,29 +278,39 @@ _cached_client: Optional[UnifiedAIClient] = None
 def ai_generate(messages: List[Dict[str, str]],
 				model: Optional[str] = None,
 				temperature: Optional[float] = None,
-				max_tokens: Optional[int] = None) -> AIResponse:
+				max_tokens: Optional[int] = None,
+				use_cache: bool = True) -> AIResponse:
 	"""
 	chat entry point.
 	"""
 	global _cached_client
 	if _cached_client is None:
 		_cached_client = UnifiedAIClient()
-	return _cached_client.chat(messages=messages, model=model, temperature=temperature, max_tokens=max_tokens)
+	return _cached_client.chat(messages=messages, model=model, temperature=temperature, max_tokens=max_tokens,
+							   use_cache=use_cache)
+
+
+# tiktoken encoding, loaded on first use (it may download its BPE file); benchmarks install a stand-in
+_openai_encoding = None
+
+
+def _openai_tokenizer():
+	global _openai_encoding
+	if _openai_encoding is None:
+		import tiktoken
+		_openai_encoding = tiktoken.encoding_for_model("gpt-3.5-turbo")
+	return _openai_encoding
 
 
 def count_tokens_provider(text: str) -> int:
 	
 	try:
 		if config.AI_PROVIDER == "openai":
-			import tiktoken
-			enc = tiktoken.encoding_for_model("gpt-3.5-turbo")
-			return len(enc.encode(text))
+			return len(_openai_tokenizer().encode(text))
 		elif config.AI_PROVIDER == "gemini":
-			if genai is None:
+			if _load_genai() is None:
 				raise RuntimeError("google-generativeai not installed")
-			genai.configure(api_key=config.GEMINI_API_KEY)
-			model = genai.GenerativeModel(config.GEMINI_MODEL)
-			return int(model.count_tokens(text).total_tokens) 
+			return int(_gemini_model().count_tokens(text).total_tokens)
 	except Exception:
 		pass
 	# Heuristic fallback with ~4 chars per token
@@ -172,8 +322,7 @@ def chunk_text_by_provider(text: str, max_tokens: int = 300) -> List[str]:
 	# provider-native tokenizer path first
 	if config.AI_PROVIDER == "openai":
 		try:
-			import tiktoken
-			enc = tiktoken.encoding_for_model("gpt-3.5-turbo")
+			enc = _openai_tokenizer()
 			tokens = enc.encode(text)
 			return [enc.decode(tokens[i:i + max_tokens]) for i in range(0, len(tokens), max_tokens)]
 		except Exception:
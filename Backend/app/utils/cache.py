@@ -0,0 +1,277 @@
+import os
+import json
+import time
+import pickle
+import sqlite3
+import hashlib
+import logging
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Callable, Optional, Tuple
+from app.core.config import config
+from app.utils.metrics import record_cache_lookup
+
+logger = logging.getLogger(__name__)
+
+MISSING = object()
+
+
+def cache_key(*parts) -> str:
+    """Stable key for JSON-serializable parts (prompts, id lists, parameters)."""
+    text = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class CacheBackend(ABC):
+    """Byte store shared by all namespaces; `Cache` does the (de)serialization."""
+
+    @abstractmethod
+    def get(self, namespace: str, key: str) -> Optional[bytes]:
+        ...
+
+    @abstractmethod
+    def set(self, namespace: str, key: str, value: bytes, ttl: Optional[float] = None):
+        ...
+
+    @abstractmethod
+    def delete(self, namespace: str, key: str):
+        ...
+
+    @abstractmethod
+    def clear(self, namespace: Optional[str] = None):
+        ...
+
+    def close(self):
+        pass
+
+
+class NullCache(CacheBackend):
+    """Stores nothing (CACHE_BACKEND=none)."""
+
+    def get(self, namespace, key):
+        return None
+
+    def set(self, namespace, key, value, ttl=None):
+        pass
+
+    def delete(self, namespace, key):
+        pass
+
+    def clear(self, namespace=None):
+        pass
+
+
+class MemoryLRUCache(CacheBackend):
+    """Per-process LRU of at most `max_entries` values."""
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[bytes, Optional[float]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, namespace, key):
+        with self._lock:
+            entry = self._entries.get((namespace, key))
+            if entry is None:
+                return None
+            value, expires = entry
+            if expires is not None and expires <= time.time():
+                del self._entries[(namespace, key)]
+                return None
+            self._entries.move_to_end((namespace, key))
+            return value
+
+    def set(self, namespace, key, value, ttl=None):
+        with self._lock:
+            self._entries[(namespace, key)] = (value, time.time() + ttl if ttl else None)
+            self._entries.move_to_end((namespace, key))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, namespace, key):
+        with self._lock:
+            self._entries.pop((namespace, key), None)
+
+    def clear(self, namespace=None):
+        with self._lock:
+            if namespace is None:
+                self._entries.clear()
+            else:
+                for entry in [entry for entry in self._entries if entry[0] == namespace]:
+                    del self._entries[entry]
+
+
+class SQLiteCache(CacheBackend):
+    """
+    File-backed cache shared by every process on the host.
+
+    WAL mode lets readers run alongside the single writer, so uvicorn
+    workers, batch runs and process-pool workers can all use the same file.
+    Each process opens its own connection (connections are not carried
+    across fork). Size is bounded by `max_entries` and by `max_bytes` of
+    values, oldest entries first; reads do not write, so eviction is by
+    insertion time. A value larger than 1/8 of `max_bytes` is not stored.
+    """
+
+    EVICT_EVERY = 256
+
+    def __init__(self, path: str, max_entries: int = 100000, max_bytes: int = 1024 ** 3):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._connection: Optional[sqlite3.Connection] = None
+        self._pid = None
+        self._writes = 0
+        self._bytes_written = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None or self._pid != os.getpid():
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=30, check_same_thread=False, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "namespace TEXT NOT NULL, key TEXT NOT NULL, value BLOB NOT NULL, "
+                "created REAL NOT NULL, expires REAL, PRIMARY KEY (namespace, key))"
+            )
+            connection.execute("CREATE INDEX IF NOT EXISTS cache_created ON cache (created)")
+            self._connection, self._pid = connection, os.getpid()
+        return self._connection
+
+    def get(self, namespace, key):
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT value, expires FROM cache WHERE namespace = ? AND key = ?", (namespace, key)
+            ).fetchone()
+        if row is None or (row[1] is not None and row[1] <= time.time()):
+            return None
+        return row[0]
+
+    def set(self, namespace, key, value, ttl=None):
+        if len(value) > self.max_bytes // 8:
+            logger.debug(f"Not caching a {len(value)} byte value ({namespace})")
+            return
+        now = time.time()
+        with self._lock:
+            connection = self._connect()
+            connection.execute(
+                "INSERT OR REPLACE INTO cache (namespace, key, value, created, expires) VALUES (?, ?, ?, ?, ?)",
+                (namespace, key, sqlite3.Binary(value), now, now + ttl if ttl else None),
+            )
+            self._writes += 1
+            self._bytes_written += len(value)
+            # Every EVICT_EVERY writes, or sooner when large values come in
+            if self._writes % self.EVICT_EVERY == 0 or self._bytes_written > self.max_bytes // 8:
+                self._evict(connection, now)
+                self._bytes_written = 0
+
+    def _evict(self, connection: sqlite3.Connection, now: float):
+        connection.execute("DELETE FROM cache WHERE expires IS NOT NULL AND expires <= ?", (now,))
+        excess = connection.execute("SELECT COUNT(*) FROM cache").fetchone()[0] - self.max_entries
+        if excess > 0:
+            connection.execute(
+                "DELETE FROM cache WHERE rowid IN (SELECT rowid FROM cache ORDER BY created LIMIT ?)", (excess,)
+            )
+        # Keep the newest entries whose values add up to at most max_bytes
+        connection.execute(
+            "DELETE FROM cache WHERE rowid IN (SELECT rowid FROM (SELECT rowid, SUM(LENGTH(value)) "
+            "OVER (ORDER BY created DESC, rowid DESC) AS running FROM cache) WHERE running > ?)",
+            (self.max_bytes,),
+        )
+
+    def delete(self, namespace, key):
+        with self._lock:
+            self._connect().execute("DELETE FROM cache WHERE namespace = ? AND key = ?", (namespace, key))
+
+    def clear(self, namespace=None):
+        with self._lock:
+            if namespace is None:
+                self._connect().execute("DELETE FROM cache")
+            else:
+                self._connect().execute("DELETE FROM cache WHERE namespace = ?", (namespace,))
+
+    def close(self):
+        with self._lock:
+            if self._connection is not None and self._pid == os.getpid():
+                self._connection.close()
+            self._connection = None
+
+
+class Cache:
+    """
+    One namespace of the shared backend. Values are pickled; lookups are
+    counted in `cache_requests_total{cache=<namespace>}`. Backend errors
+    are logged and treated as misses, so a broken cache never fails a request.
+    """
+
+    def __init__(self, namespace: str, backend: CacheBackend):
+        self.namespace = namespace
+        self.backend = backend
+
+    def get(self, key: str, default: Any = None) -> Any:
+        try:
+            data = self.backend.get(self.namespace, key)
+            value = pickle.loads(data) if data is not None else MISSING
+        except Exception as e:
+            logger.warning(f"Cache read failed ({self.namespace}): {e}")
+            value = MISSING
+        record_cache_lookup(self.namespace, hit=value is not MISSING)
+        return default if value is MISSING else value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        try:
+            self.backend.set(self.namespace, key, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), ttl)
+        except Exception as e:
+            logger.warning(f"Cache write failed ({self.namespace}): {e}")
+
+    def get_or_compute(self, key: str, compute: Callable[[], Any], ttl: Optional[float] = None,
+                       store: Callable[[Any], bool] = lambda value: True) -> Any:
+        """Cached value for `key`, else `compute()`, kept only when `store(value)` holds."""
+        value = self.get(key, MISSING)
+        if value is MISSING:
+            value = compute()
+            if store(value):
+                self.set(key, value, ttl)
+        return value
+
+    def delete(self, key: str):
+        try:
+            self.backend.delete(self.namespace, key)
+        except Exception as e:
+            logger.warning(f"Cache delete failed ({self.namespace}): {e}")
+
+    def clear(self):
+        self.backend.clear(self.namespace)
+
+
+_lock = threading.Lock()
+_backend: Optional[CacheBackend] = None
+_backend_settings = None
+
+
+def cache_backend() -> CacheBackend:
+    """Process-wide backend from CACHE_BACKEND / CACHE_PATH, reopened when those change."""
+    global _backend, _backend_settings
+    settings = (config.CACHE_BACKEND, config.CACHE_PATH, config.CACHE_MAX_ENTRIES, config.CACHE_MAX_BYTES)
+    with _lock:
+        if _backend is None or settings != _backend_settings:
+            if _backend is not None:
+                _backend.close()
+            kind, path, max_entries, max_bytes = settings
+            if kind == "sqlite":
+                _backend = SQLiteCache(path, max_entries, max_bytes)
+            elif kind == "memory":
+                _backend = MemoryLRUCache(max_entries)
+            elif kind == "none":
+                _backend = NullCache()
+            else:
+                raise ValueError(f"Unsupported CACHE_BACKEND: {kind}")
+            _backend_settings = settings
+        return _backend
+
+
+def get_cache(namespace: str) -> Cache:
+    return Cache(namespace, cache_backend())
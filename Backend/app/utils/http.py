@@ -0,0 +1,28 @@
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from app.core.config import config
+
+_lock = threading.Lock()
+_session = None
+
+
+def http_session() -> requests.Session:
+    """
+    Process-wide requests.Session, so E-utilities and MedCAT calls reuse
+    keep-alive connections instead of opening one per request.
+
+    GETs are retried with backoff on connection errors, 429 and 5xx.
+    """
+    global _session
+    with _lock:
+        if _session is None:
+            retry = Retry(total=3, backoff_factor=0.5, status_forcelist=(429, 500, 502, 503, 504),
+                          allowed_methods=frozenset({"GET"}), raise_on_status=False)
+            adapter = HTTPAdapter(pool_connections=8, pool_maxsize=config.HTTP_POOL_SIZE, max_retries=retry)
+            session = requests.Session()
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _session = session
+        return _session
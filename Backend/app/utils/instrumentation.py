@@ -0,0 +1,143 @@
+import time
+import logging
+import threading
+import functools
+import contextvars
+from contextlib import contextmanager
+from typing import Dict, Optional
+from app.utils.metrics import observe_span, observe_llm
+
+logger = logging.getLogger(__name__)
+
+_current_job: contextvars.ContextVar = contextvars.ContextVar("current_job_metrics", default=None)
+
+
+class JobMetrics:
+    """
+    Aggregated span timings and LLM token usage for one pipeline job.
+
+    Safe to update from several threads; spans started in worker threads are
+    attributed to the job as long as the thread runs in a copy of the job's
+    context (`asyncio.to_thread` does this, plain threads need
+    `contextvars.copy_context().run`). Jobs started inside another job also
+    report into the enclosing one.
+    """
+
+    def __init__(self, job_id: str, parent: Optional["JobMetrics"] = None):
+        self.job_id = job_id
+        self.parent = parent
+        self.started = time.time()
+        self._start = time.perf_counter()
+        self._lock = threading.Lock()
+        self.spans: Dict[str, Dict] = {}
+        self.llm: Dict[str, Dict] = {}
+
+    def record_span(self, name: str, kind: str, seconds: float, error: bool = False):
+        with self._lock:
+            entry = self.spans.setdefault(
+                name, {"kind": kind, "count": 0, "total_seconds": 0.0, "max_seconds": 0.0, "errors": 0}
+            )
+            entry["count"] += 1
+            entry["total_seconds"] += seconds
+            entry["max_seconds"] = max(entry["max_seconds"], seconds)
+            entry["errors"] += int(error)
+        if self.parent is not None:
+            self.parent.record_span(name, kind, seconds, error)
+
+    def record_llm(self, provider: str, model: str, prompt_tokens: int,
+                   completion_tokens: int, error: bool = False):
+        with self._lock:
+            entry = self.llm.setdefault(
+                f"{provider}/{model}",
+                {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "errors": 0}
+            )
+            entry["calls"] += 1
+            entry["prompt_tokens"] += prompt_tokens
+            entry["completion_tokens"] += completion_tokens
+            entry["errors"] += int(error)
+        if self.parent is not None:
+            self.parent.record_llm(provider, model, prompt_tokens, completion_tokens, error)
+
+    def summary(self) -> Dict:
+        with self._lock:
+            spans = {
+                name: {**entry, "total_seconds": round(entry["total_seconds"], 4),
+                       "max_seconds": round(entry["max_seconds"], 4)}
+                for name, entry in self.spans.items()
+            }
+            llm = {name: dict(entry) for name, entry in self.llm.items()}
+        return {
+            "job_id": self.job_id,
+            "wall_seconds": round(time.perf_counter() - self._start, 4),
+            "spans": spans,
+            "llm": llm,
+            "totals": {
+                "llm_calls": sum(e["calls"] for e in llm.values()),
+                "prompt_tokens": sum(e["prompt_tokens"] for e in llm.values()),
+                "completion_tokens": sum(e["completion_tokens"] for e in llm.values()),
+            },
+        }
+
+
+def current_job() -> Optional[JobMetrics]:
+    return _current_job.get()
+
+
+@contextmanager
+def track_job(job_id: str):
+    """Collect every span and LLM call made inside the block into a JobMetrics."""
+    metrics = JobMetrics(job_id, parent=current_job())
+    token = _current_job.set(metrics)
+    try:
+        yield metrics
+    finally:
+        _current_job.reset(token)
+
+
+class span:
+    """
+    Times a block or function call and records it on the current job.
+
+    `kind` is "stage" for pipeline steps and "external" for calls to other
+    services (GEO, E-utilities, MedCAT, LLM).
+
+        with span("abstract.chunk"):
+            ...
+
+        @span("medcat.annotate", kind="external")
+        def annotate_with_medcat(...):
+            ...
+    """
+
+    def __init__(self, name: str, kind: str = "stage"):
+        self.name = name
+        self.kind = kind
+        self._start = None
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self._start
+        job = current_job()
+        if job is not None:
+            job.record_span(self.name, self.kind, elapsed, error=exc_type is not None)
+        observe_span(self.name, self.kind, elapsed, error=exc_type is not None)
+        logger.debug(f"{self.name} took {elapsed:.3f}s")
+        return False
+
+    def __call__(self, func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(self.name, self.kind):
+                return func(*args, **kwargs)
+        return wrapper
+
+
+def record_llm_usage(provider: str, model: str, prompt_tokens: int = 0,
+                     completion_tokens: int = 0, error: bool = False):
+    job = current_job()
+    if job is not None:
+        job.record_llm(provider, model, prompt_tokens, completion_tokens, error)
+    observe_llm(provider, model, prompt_tokens, completion_tokens, error)
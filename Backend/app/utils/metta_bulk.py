@@ -0,0 +1,186 @@
+"""
+Parallel validation and conversion of many `.metta` files.
+
+Validation uses the line semantics of `validate_metta_block` /
+`validate_metta_lines` (one expression per line, as the exporters write
+them), minus comments and blank lines. Files are cut into byte-range shards
+at line boundaries and the shards are validated in a process pool; results
+come back in shard order and line numbers are rebased per file, so the
+report is identical for any worker count.
+
+    python -m app.utils.metta_bulk validate output/ --workers 8
+    python -m app.utils.metta_bulk to-columnar output/ --output-dir columnar/
+"""
+import os
+import sys
+import json
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+from app.utils.checkMettaCode import validate_metta_syntax
+from app.utils.metta_reader import FLAT_VALID, _open_map
+
+SHARD_BYTES = 4 * 1024 * 1024
+
+
+class Shard(NamedTuple):
+    path: str
+    start: int
+    end: int
+
+
+def collect_files(paths: Iterable[str], suffix: str = ".metta") -> List[Tuple[str, str]]:
+    """(path, path relative to its argument) for each file, directories expanded recursively in sorted order."""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, names in os.walk(path):
+                dirs.sort()
+                for name in sorted(names):
+                    if name.endswith(suffix):
+                        full = os.path.join(root, name)
+                        files.append((full, os.path.relpath(full, path)))
+        else:
+            files.append((path, os.path.basename(path)))
+    return files
+
+
+def plan_shards(path: str, shard_bytes: int = SHARD_BYTES) -> List[Shard]:
+    """Cut `path` into ranges of about `shard_bytes`, each ending just after a newline."""
+    f, data = _open_map(path)
+    try:
+        shards, start, size = [], 0, len(data)
+        while start < size:
+            cut = start + shard_bytes
+            if cut < size:
+                newline = data.find(b"\n", cut - 1)
+                cut = size if newline == -1 else newline + 1
+            else:
+                cut = size
+            shards.append(Shard(path, start, cut))
+            start = cut
+        return shards
+    finally:
+        if not isinstance(data, bytes):
+            data.close()
+        f.close()
+
+
+def validate_shard(shard: Shard, max_errors: int = 100) -> Dict:
+    """Validate each line of one shard; error lines are relative to the shard start."""
+    f, data = _open_map(shard.path)
+    try:
+        checked, invalid, errors = 0, 0, []
+        pos, line = shard.start, 1
+        while pos < shard.end:
+            newline = data.find(b"\n", pos, shard.end)
+            line_end = shard.end if newline == -1 else newline
+            code = data[pos:line_end]
+            if b";" in code:
+                code = code.split(b";", 1)[0]
+            text = code.decode("utf-8", errors="replace").strip()
+            if text:
+                checked += 1
+                if not FLAT_VALID.fullmatch(text):
+                    valid, explanation = validate_metta_syntax(text)
+                    if not valid:
+                        invalid += 1
+                        if len(errors) < max_errors:
+                            errors.append({"line": line, "offset": pos, "error": explanation, "text": text[:200]})
+            pos, line = line_end + 1, line + 1
+        return {"lines": line - 1, "expressions": checked,
+                "invalid": invalid, "errors": errors}
+    finally:
+        if not isinstance(data, bytes):
+            data.close()
+        f.close()
+
+
+def _map(function, jobs: List, workers: int) -> List:
+    if workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(function, *zip(*jobs), chunksize=max(1, len(jobs) // (workers * 4))))
+    return [function(*job) for job in jobs]
+
+
+def validate_files(paths: Iterable[str], workers: Optional[int] = None, max_errors: int = 100,
+                   shard_bytes: int = SHARD_BYTES) -> Dict:
+    """
+    Validate every file under `paths`. Returns totals, per-file counts and
+    the first `max_errors` errors in file and line order.
+    """
+    workers = workers or os.cpu_count() or 1
+    files = [path for path, _ in collect_files(paths)]
+    shards = [shard for path in files for shard in plan_shards(path, shard_bytes)]
+    results = _map(validate_shard, [(shard, max_errors) for shard in shards], workers)
+
+    per_file = {path: {"path": path, "expressions": 0, "invalid": 0} for path in files}
+    errors, line_base = [], {path: 0 for path in files}
+    for shard, result in zip(shards, results):
+        summary = per_file[shard.path]
+        summary["expressions"] += result["expressions"]
+        summary["invalid"] += result["invalid"]
+        for error in result["errors"]:
+            if len(errors) < max_errors:
+                errors.append({"path": shard.path, **error, "line": error["line"] + line_base[shard.path]})
+        line_base[shard.path] += result["lines"]
+    return {
+        "files": len(files),
+        "expressions": sum(summary["expressions"] for summary in per_file.values()),
+        "invalid": sum(summary["invalid"] for summary in per_file.values()),
+        "per_file": list(per_file.values()),
+        "errors": errors,
+    }
+
+
+def _convert(source: str, target: str, order: str) -> Tuple[int, int]:
+    from app.services.metta_columnar import metta_to_columnar
+    os.makedirs(os.path.dirname(target) or ".", exist_ok=True)
+    return metta_to_columnar(source, target, order)
+
+
+def convert_files(paths: Iterable[str], output_dir: str, order: str = "pso",
+                  workers: Optional[int] = None) -> List[Dict]:
+    """Convert each file to `output_dir/<relative path>.mettac`, one file per task; results in input order."""
+    workers = workers or os.cpu_count() or 1
+    jobs = [(path, os.path.join(output_dir, os.path.splitext(relative)[0] + ".mettac"), order)
+            for path, relative in collect_files(paths)]
+    results = _map(_convert, jobs, workers)
+    return [{"path": source, "target": target, "triples": count, "skipped": skipped}
+            for (source, target, _), (count, skipped) in zip(jobs, results)]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Validate or convert many .metta files in parallel")
+    commands = parser.add_subparsers(dest="command", required=True)
+    validate = commands.add_parser("validate", help="Check every line with validate_metta_syntax")
+    validate.add_argument("paths", nargs="+", help=".metta files or directories")
+    validate.add_argument("--max-errors", type=int, default=100)
+    validate.add_argument("--shard-bytes", type=int, default=SHARD_BYTES)
+    validate.add_argument("--json", action="store_true", help="Print the full report as JSON")
+    convert = commands.add_parser("to-columnar", help="Convert each file to the columnar format")
+    convert.add_argument("paths", nargs="+", help=".metta files or directories")
+    convert.add_argument("--output-dir", required=True)
+    convert.add_argument("--order", choices=("pso", "spo"), default="pso")
+    for command in (validate, convert):
+        command.add_argument("--workers", type=int, default=None, help="Processes (default: CPU count)")
+    args = parser.parse_args(argv)
+
+    if args.command == "validate":
+        report = validate_files(args.paths, args.workers, args.max_errors, args.shard_bytes)
+        if args.json:
+            print(json.dumps(report, indent=2))
+        else:
+            for error in report["errors"]:
+                print(f"{error['path']}:{error['line']}: {error['error']}: {error['text']}")
+            print(f"{report['files']} files, {report['expressions']} expressions, {report['invalid']} invalid")
+        return 1 if report["invalid"] else 0
+
+    results = convert_files(args.paths, args.output_dir, args.order, args.workers)
+    for result in results:
+        print(f"{result['path']} -> {result['target']}: {result['triples']} triples, {result['skipped']} skipped")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,205 @@
+import os
+import re
+import mmap
+import bisect
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+from app.utils.checkMettaCode import validate_metta_syntax, tokenize
+
+
+# A flat expression whose atoms all pass checkMettaCode.is_valid_atom; anything
+# else goes through validate_metta_syntax for the verdict and its explanation
+_ATOM = r"(?:\$[\w\-]+|-?\d+(?:\.\d+)?|[a-zA-Z_+\-*/=<>!][\w\-]*)"
+FLAT_VALID = re.compile(rf"\(\s*(?:{_ATOM}(?:\s+{_ATOM})*)?\s*\)")
+
+
+class MettaExpression(NamedTuple):
+    offset: int  # byte offset of the first line
+    line: int    # 1-based line number
+    text: str
+
+
+def strip_comments(text: str) -> str:
+    return "\n".join(line.split(";", 1)[0] for line in text.splitlines()).strip()
+
+
+def _open_map(path: str):
+    f = open(path, "rb")
+    if os.fstat(f.fileno()).st_size == 0:
+        return f, b""
+    return f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def _scan(data, start: int, end: int, line: int) -> Iterator[Tuple[int, int, int]]:
+    """
+    (start, end, line) of each top-level expression in data[start:end].
+
+    An expression is a line, or the lines up to where its parentheses
+    balance; comment-only and blank lines are skipped. Works line by line
+    with C-level find/count, so nothing larger than one line is copied.
+    """
+    pos, depth, expression_start, expression_line = start, 0, None, line
+    while pos < end:
+        newline = data.find(b"\n", pos, end)
+        line_end = end if newline == -1 else newline
+        code = data[pos:line_end]
+        if b";" in code:
+            code = code.split(b";", 1)[0]
+        if expression_start is None and code.strip():
+            expression_start, expression_line, depth = pos, line, 0
+        if expression_start is not None:
+            depth += code.count(b"(") - code.count(b")")
+            if depth <= 0:
+                yield expression_start, line_end, expression_line
+                expression_start = None
+        pos, line = line_end + 1, line + 1
+    if expression_start is not None:
+        # Unclosed at the end of the range; validation reports it
+        yield expression_start, end, expression_line
+
+
+def _validate_range(path: str, start: int, end: int, line: int, max_errors: int) -> Tuple[int, int, List[Dict]]:
+    """Validate the expressions of one byte range; runs in a worker process."""
+    f, data = _open_map(path)
+    try:
+        checked, invalid, errors = 0, 0, []
+        for expression_start, expression_end, expression_line in _scan(data, start, end, line):
+            code = strip_comments(data[expression_start:expression_end].decode("utf-8", errors="replace"))
+            if not code:
+                continue
+            checked += 1
+            if FLAT_VALID.fullmatch(code):
+                continue
+            valid, explanation = validate_metta_syntax(code)
+            if not valid:
+                invalid += 1
+                if len(errors) < max_errors:
+                    errors.append({"offset": expression_start, "line": expression_line,
+                                   "error": explanation, "text": code[:200]})
+        return checked, invalid, errors
+    finally:
+        if isinstance(data, mmap.mmap):
+            data.close()
+        f.close()
+
+
+class MettaFile:
+    """
+    Memory-mapped `.metta` file with a sparse expression index.
+
+    The index keeps the byte offset and line number of every
+    `checkpoint_every`-th expression (16 bytes each), so random access scans
+    at most that many expressions and memory stays small however large the
+    file is. Expressions are decoded one at a time on iteration.
+    """
+
+    def __init__(self, path: str, checkpoint_every: int = 256):
+        self.path = path
+        self.checkpoint_every = checkpoint_every
+        self._file, self._data = _open_map(path)
+        self.size = len(self._data)
+        self._offsets: Optional[array] = None
+        self._lines = array("Q")
+        self._count = 0
+
+    def _index(self):
+        if self._offsets is None:
+            offsets, lines, count = array("Q"), array("Q"), 0
+            for start, _, line in _scan(self._data, 0, self.size, 1):
+                if count % self.checkpoint_every == 0:
+                    offsets.append(start)
+                    lines.append(line)
+                count += 1
+            self._offsets, self._lines, self._count = offsets, lines, count
+        return self._offsets
+
+    def _expression(self, start: int, end: int, line: int) -> MettaExpression:
+        return MettaExpression(start, line, self._data[start:end].decode("utf-8", errors="replace"))
+
+    def __iter__(self) -> Iterator[MettaExpression]:
+        for start, end, line in _scan(self._data, 0, self.size, 1):
+            yield self._expression(start, end, line)
+
+    def __len__(self):
+        self._index()
+        return self._count
+
+    def expression(self, number: int) -> MettaExpression:
+        """The `number`-th expression (0-based)."""
+        offsets = self._index()
+        if not 0 <= number < self._count:
+            raise IndexError(number)
+        checkpoint = number // self.checkpoint_every
+        scan = _scan(self._data, offsets[checkpoint], self.size, self._lines[checkpoint])
+        for _ in range(number % self.checkpoint_every):
+            next(scan)
+        return self._expression(*next(scan))
+
+    def find(self, atom: str) -> Iterator[MettaExpression]:
+        """Expressions containing `atom` as a whole token, outside comments."""
+        offsets = self._index()
+        if not offsets:
+            return
+        pattern = re.compile(rb"(?<![^\s()])" + re.escape(atom.encode("utf-8")) + rb"(?![^\s()])")
+        last = -1
+        # re scans the mapped bytes directly, without copying the file
+        for match in pattern.finditer(self._data):
+            if match.start() < last:
+                continue
+            checkpoint = max(0, bisect.bisect_right(offsets, match.start()) - 1)
+            for start, end, line in _scan(self._data, offsets[checkpoint], self.size, self._lines[checkpoint]):
+                if end >= match.start():
+                    break
+            else:
+                continue  # in trailing comments
+            if start <= match.start():
+                # Later matches inside this expression are covered by this check;
+                # a match in a comment before it must not hide the expression
+                last = end
+                expression = self._expression(start, end, line)
+                if atom in tokenize(strip_comments(expression.text)):
+                    yield expression
+
+    def ranges(self, parts: int) -> List[Tuple[int, int, int]]:
+        """Split the file at checkpoints into up to `parts` (start, end, line) byte ranges."""
+        offsets = self._index()
+        if not offsets:
+            return []
+        step = max(1, -(-len(offsets) // max(1, parts)))
+        bounds = list(range(0, len(offsets), step))
+        return [
+            (offsets[i], offsets[i + step] if i + step < len(offsets) else self.size, self._lines[i])
+            for i in bounds
+        ]
+
+    def validate(self, workers: int = 1, max_errors: int = 100) -> Dict:
+        """
+        Check every expression with `validate_metta_syntax`, across `workers`
+        processes when > 1. Returns counts and the first `max_errors` errors.
+        """
+        ranges = self.ranges(workers * 4 if workers > 1 else 1)
+        jobs = [(self.path, start, end, line, max_errors) for start, end, line in ranges]
+        if workers > 1 and len(jobs) > 1:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(_validate_range, *zip(*jobs)))
+        else:
+            results = [_validate_range(*job) for job in jobs]
+        errors = [error for _, _, range_errors in results for error in range_errors][:max_errors]
+        return {
+            "path": self.path,
+            "expressions": sum(checked for checked, _, _ in results),
+            "invalid": sum(invalid for _, invalid, _ in results),
+            "errors": errors,
+        }
+
+    def close(self):
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
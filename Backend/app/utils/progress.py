@@ -0,0 +1,214 @@
+import json
+import time
+import asyncio
+import threading
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional, Set, Tuple
+from app.core.config import config
+from app.utils.metrics import REGISTRY
+
+PROGRESS_MESSAGES = REGISTRY.counter(
+    "progress_messages_total", "Progress messages published")
+PROGRESS_COALESCED = REGISTRY.counter(
+    "progress_messages_coalesced_total", "Queued stage updates replaced by a newer one")
+PROGRESS_SLOW_CONSUMERS = REGISTRY.counter(
+    "progress_slow_consumers_total", "Subscribers disconnected because their queue overflowed")
+
+
+class SlowConsumer(Exception):
+    """Raised to a subscriber whose queue overflowed; it can resume from `offset`."""
+
+    def __init__(self, offset: int):
+        super().__init__(f"progress queue overflowed, resume from offset {offset}")
+        self.offset = offset
+
+
+def is_stage_update(message: str) -> bool:
+    # "Fetching GSE data..." style messages; only the latest pending one matters
+    return message.endswith("...")
+
+
+class Subscriber:
+    """Bounded per-connection queue of (seq, message); lives on the event loop."""
+
+    def __init__(self, max_queue: int):
+        self.max_queue = max_queue
+        self.next_offset = 0
+        self._items: Deque[Tuple[int, str]] = deque()
+        self._ready = asyncio.Event()
+        self._overflowed = False
+
+    def offer(self, seq: int, message: str, bounded: bool = True):
+        if self._overflowed:
+            return
+        if self._items and is_stage_update(message) and is_stage_update(self._items[-1][1]):
+            self._items[-1] = (seq, message)
+            PROGRESS_COALESCED.inc()
+        elif bounded and len(self._items) >= self.max_queue:
+            # Never block the publisher: drop the backlog and let the client resume from history
+            self._overflowed = True
+            self._items.clear()
+            PROGRESS_SLOW_CONSUMERS.inc()
+        else:
+            self._items.append((seq, message))
+        self._ready.set()
+
+    async def get(self) -> Tuple[int, str]:
+        while not self._items:
+            if self._overflowed:
+                raise SlowConsumer(self.next_offset)
+            self._ready.clear()
+            await self._ready.wait()
+        seq, message = self._items.popleft()
+        self.next_offset = seq + 1
+        return seq, message
+
+    def __len__(self):
+        return len(self._items)
+
+
+class ProgressChannel:
+    """Progress stream of one client id: numbered messages, bounded history, subscribers."""
+
+    def __init__(self, key: str, history_size: int):
+        self.key = key
+        self.next_seq = 0
+        self.history: Deque[Tuple[int, str]] = deque(maxlen=history_size)
+        self.subscribers: Set[Subscriber] = set()
+        self.last_activity = time.monotonic()
+
+    def publish(self, message: str):
+        seq = self.next_seq
+        self.next_seq += 1
+        self.history.append((seq, message))
+        self.last_activity = time.monotonic()
+        for subscriber in self.subscribers:
+            subscriber.offer(seq, message)
+
+    def subscribe(self, offset: Optional[int], max_queue: int) -> Subscriber:
+        subscriber = Subscriber(max_queue)
+        subscriber.next_offset = self.next_seq if offset is None else min(offset, self.next_seq)
+        if offset is not None:
+            # Replay is bounded by the history size, not the live queue size
+            for seq, message in self.history:
+                if seq >= offset:
+                    subscriber.offer(seq, message, bounded=False)
+        self.subscribers.add(subscriber)
+        self.last_activity = time.monotonic()
+        return subscriber
+
+
+class ProgressBus:
+    """
+    Fan-out of pipeline progress to websocket subscribers.
+
+    Pipeline threads publish through `publisher(key)`, which only schedules
+    the message on the event loop and never waits on a client. Each
+    subscriber has a bounded queue; pending stage updates are coalesced and a
+    subscriber that still falls behind is dropped with a `SlowConsumer`
+    telling it which offset to resume from. Every channel keeps a bounded
+    history so a reconnecting client can pass `offset` to catch up.
+    """
+
+    def __init__(self, history_size: int = 500, queue_size: int = 100, retention: float = 600.0):
+        self.history_size = history_size
+        self.queue_size = queue_size
+        self.retention = retention
+        self._channels: Dict[str, ProgressChannel] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+
+    def _channel(self, key: str) -> ProgressChannel:
+        channel = self._channels.get(key)
+        if channel is None:
+            channel = self._channels[key] = ProgressChannel(key, self.history_size)
+            self._loop.call_later(self.retention, self._expire, key)
+        return channel
+
+    def _bind_loop(self):
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self._loop is not loop:
+                self._loop = loop
+                self._channels.clear()
+
+    def _expire(self, key: str):
+        channel = self._channels.get(key)
+        if channel is None:
+            return
+        idle = time.monotonic() - channel.last_activity
+        delay = self.retention if channel.subscribers else self.retention - idle
+        if delay > 0:
+            self._loop.call_later(delay, self._expire, key)
+        else:
+            del self._channels[key]
+
+    # Event loop side
+
+    def publish(self, key: str, message: str):
+        PROGRESS_MESSAGES.inc()
+        self._channel(key).publish(message)
+
+    def subscribe(self, key: str, offset: Optional[int] = None) -> Subscriber:
+        """Subscribe to new messages, or replay history from `offset` first."""
+        self._bind_loop()
+        return self._channel(key).subscribe(offset, self.queue_size)
+
+    def unsubscribe(self, key: str, subscriber: Subscriber):
+        channel = self._channels.get(key)
+        if channel is not None:
+            channel.subscribers.discard(subscriber)
+            channel.last_activity = time.monotonic()
+
+    def subscriber_count(self) -> int:
+        return sum(len(channel.subscribers) for channel in list(self._channels.values()))
+
+    def queued_messages(self) -> int:
+        return sum(len(s) for channel in list(self._channels.values()) for s in list(channel.subscribers))
+
+    # Worker thread side
+
+    def publisher(self, key: str) -> Callable[[str], None]:
+        """Return a thread-safe, non-blocking `send_progress(message)` for `key`."""
+        self._bind_loop()
+        loop = self._loop
+
+        def send_progress(message: str):
+            try:
+                loop.call_soon_threadsafe(self.publish, key, message)
+            except RuntimeError:
+                # Loop already closed (shutdown); progress has nowhere to go
+                pass
+
+        return send_progress
+
+
+def format_frames(seq: int, message: str, envelope: bool = False, max_frame: int = 0) -> List[str]:
+    """
+    Websocket frames for one message.
+
+    Without `envelope` the message is sent as-is. With it every frame is
+    `{"seq": n, "data": ...}` and messages longer than `max_frame`
+    characters are split into `{"seq", "chunk", "chunks", "data"}` parts.
+    """
+    if not envelope:
+        return [message]
+    if not max_frame or len(message) <= max_frame:
+        return [json.dumps({"seq": seq, "data": message}, ensure_ascii=False)]
+    parts = [message[i:i + max_frame] for i in range(0, len(message), max_frame)]
+    return [
+        json.dumps({"seq": seq, "chunk": i, "chunks": len(parts), "data": part}, ensure_ascii=False)
+        for i, part in enumerate(parts)
+    ]
+
+
+progress_bus = ProgressBus(
+    history_size=config.PROGRESS_HISTORY_SIZE,
+    queue_size=config.PROGRESS_QUEUE_SIZE,
+    retention=config.PROGRESS_RETENTION_SECONDS,
+)
+
+REGISTRY.gauge("websocket_connections_active", "Open progress websocket connections",
+               callback=progress_bus.subscriber_count)
+REGISTRY.gauge("progress_messages_queued", "Progress messages waiting in subscriber queues",
+               callback=progress_bus.queued_messages)
@@ -0,0 +1,42 @@
+import json
+from starlette.responses import StreamingResponse
+
+
+class DuplexStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse for handlers that keep reading the request body while
+    the response is being written.
+
+    The stock response listens for `http.disconnect` on the same receive
+    channel the request stream reads from, so both would compete for body
+    messages. Disconnects still surface through the body stream itself.
+    """
+
+    async def __call__(self, scope, receive, send) -> None:
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
+
+def progress_event(message: str):
+    """
+    Split a pipeline progress message into (event, data).
+
+    JSON messages with a single key (`{"abstract": ...}`) become that event,
+    everything else is a plain "status" update.
+    """
+    try:
+        payload = json.loads(message)
+    except (TypeError, ValueError):
+        return "status", message
+    if isinstance(payload, dict) and len(payload) == 1:
+        return next(iter(payload.items()))
+    return "status", payload
+
+
+def format_event(event: str, data, output_format: str = "sse") -> str:
+    """Serialize one event as an SSE block or an NDJSON line."""
+    encoded = json.dumps(data, ensure_ascii=False)
+    if output_format == "sse":
+        return f"event: {event}\ndata: {encoded}\n\n"
+    return json.dumps({"event": event, "data": data}, ensure_ascii=False) + "\n"
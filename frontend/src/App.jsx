@@ -120,6 +120,12 @@ function App() {
           setAbstract(json.abstract);
         }
 
+        if (json.abstract_predicates_chunk) {
+          // Partial predicates arrive per chunk; the full list replaces them at the end
+          const { chunk, predicates } = json.abstract_predicates_chunk;
+          setAbstractPredicates((prev) => [...(chunk === 0 || !Array.isArray(prev) ? [] : prev), ...predicates]);
+        }
+
         if (json.abstract_predicates) {
           setAbstractPredicates(json.abstract_predicates);
         }
@@ -131,7 +137,7 @@ function App() {
 
 
         // If none of the expected fields exist, treat as plain message
-        if (!json.abstract && !json.abstract_predicates && !json.gse_metadata_predicates) {
+        if (!json.abstract && !json.abstract_predicates && !json.abstract_predicates_chunk && !json.gse_metadata_predicates) {
           setMessages((prev) => [...prev, message]);
         }
 